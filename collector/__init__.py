@@ -1,7 +1,17 @@
 from .mgm_client import fetch_latest_weather
-from .config import CollectorConfig, load_config
+from .config import (
+    CollectorConfig,
+    DaemonConfig,
+    RetryPolicy,
+    load_config,
+    load_daemon_config,
+    load_s3_config,
+)
+from .fanout import FanOut
+from .resilience import CircuitOpenError
 from .processor import normalize, clean
-from .storage import append_json, save_csv
+from .storage import append_json, convert_to_lines, save_csv
+from .parquet_storage import append_parquet, compact_parquet, read_parquet_range
 from .sqlite_storage import (
     init_db,
     append_to_db,
@@ -10,17 +20,24 @@ from .sqlite_storage import (
     get_statistics,
     query_range,
     hourly_average,
+    daily_average,
+    rebuild_rollups,
+    verify_statistics,
 )
-from .postgres_storage import init_pg, append_to_pg, query_range_pg
-from .timescale_storage import init_ts, append_to_ts, query_range_ts
+from .postgres_storage import init_pg, append_to_pg, iter_range_pg, query_range_pg
+from .timescale_storage import init_ts, append_to_ts, iter_range_ts, query_buckets_ts, query_range_ts
 from .influx_storage import write_to_influx
 from .satellite_client import (
     fetch_modis_data,
     fetch_viirs_data,
     fetch_sentinel2_data,
     fetch_effis_data,
+    iter_fire_csv,
+    stream_to_parquet,
 )
-from .s3_storage import upload_file
+from .async_fetch import fetch_all, fetch_all_sync
+from .s3_storage import sync_dir, sync_file, upload_file
+from .watermark import Watermark
 from .middlewares import RateLimitMiddleware
 from .metrics import WEATHER_FETCH_TOTAL, WEATHER_FETCH_ERRORS
 
@@ -30,6 +47,10 @@ __all__ = [
     "clean",
     "append_json",
     "save_csv",
+    "convert_to_lines",
+    "append_parquet",
+    "compact_parquet",
+    "read_parquet_range",
     "init_db",
     "append_to_db",
     "query_latest",
@@ -37,21 +58,40 @@ __all__ = [
     "get_statistics",
     "query_range",
     "hourly_average",
+    "daily_average",
+    "rebuild_rollups",
+    "verify_statistics",
     "init_pg",
     "append_to_pg",
     "query_range_pg",
     "init_ts",
     "append_to_ts",
     "query_range_ts",
+    "query_buckets_ts",
+    "iter_range_pg",
+    "iter_range_ts",
     "write_to_influx",
     "fetch_modis_data",
     "fetch_viirs_data",
     "fetch_sentinel2_data",
     "fetch_effis_data",
+    "iter_fire_csv",
+    "stream_to_parquet",
+    "fetch_all",
+    "fetch_all_sync",
     "upload_file",
+    "sync_file",
+    "sync_dir",
+    "Watermark",
     "RateLimitMiddleware",
     "WEATHER_FETCH_TOTAL",
     "WEATHER_FETCH_ERRORS",
     "CollectorConfig",
     "load_config",
+    "RetryPolicy",
+    "DaemonConfig",
+    "load_daemon_config",
+    "load_s3_config",
+    "FanOut",
+    "CircuitOpenError",
 ]
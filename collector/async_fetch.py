@@ -0,0 +1,157 @@
+"""Fetch MGM and the satellite sources concurrently over one HTTP client."""
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+import weakref
+from collections import defaultdict
+
+import httpx
+import pandas as pd
+import structlog
+
+from .config import (
+    CollectorConfig,
+    FetchConfig,
+    RetryPolicy,
+    load_config,
+    load_fetch_config,
+    load_retry_policy,
+)
+from .metrics import SOURCE_FETCH_SECONDS, WEATHER_FETCH_ERRORS, WEATHER_FETCH_TOTAL
+from .resilience import call_with_retry_async
+from .satellite_client import SOURCES as SATELLITE_SOURCES
+
+logger = structlog.get_logger(__name__)
+
+
+class Fetcher:
+    """Keep-alive ``httpx.AsyncClient`` with a connection cap per host."""
+
+    def __init__(self, config: FetchConfig | None = None, transport=None) -> None:
+        config = config or load_fetch_config()
+        self.client = httpx.AsyncClient(
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            transport=transport,
+        )
+        self.per_host = config.per_host
+        self._hosts: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host)
+        )
+
+    async def get(self, url: str, source: str) -> httpx.Response:
+        started = time.perf_counter()
+        async with self._hosts[httpx.URL(url).host]:
+            try:
+                response = await self.client.get(url)
+                response.raise_for_status()
+            finally:
+                SOURCE_FETCH_SECONDS.labels(source).observe(time.perf_counter() - started)
+        return response
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# an AsyncClient is bound to the loop it first ran on, so each loop gets its
+# own fetcher; entries go away with their loop instead of being replaced
+_fetchers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Fetcher] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_fetcher(config: FetchConfig | None = None, transport=None) -> Fetcher:
+    """Return the shared fetcher of the running event loop."""
+    loop = asyncio.get_running_loop()
+    fetcher = _fetchers.get(loop)
+    if fetcher is None:
+        fetcher = _fetchers[loop] = Fetcher(config, transport)
+    return fetcher
+
+
+async def close_fetcher() -> None:
+    """Close the running loop's fetcher, if it has one."""
+    fetcher = _fetchers.pop(asyncio.get_running_loop(), None)
+    if fetcher is not None:
+        await fetcher.close()
+
+
+async def fetch_latest_weather_async(
+    config: CollectorConfig | None = None, policy: RetryPolicy | None = None
+) -> pd.DataFrame:
+    config = config or load_config()
+    logger.info("Fetching weather data from MGM API", url=config.mgm_url)
+
+    async def fetch() -> pd.DataFrame:
+        try:
+            response = await get_fetcher().get(config.mgm_url, "mgm")
+            return pd.DataFrame(response.json())
+        except (httpx.HTTPError, ValueError):
+            WEATHER_FETCH_ERRORS.inc()
+            raise
+
+    df = await call_with_retry_async(
+        fetch, "mgm", policy or load_retry_policy(config), retry_on=(httpx.HTTPError, ValueError)
+    )
+    WEATHER_FETCH_TOTAL.inc()
+    return df
+
+
+async def fetch_csv_async(url: str, source: str, policy: RetryPolicy | None = None) -> pd.DataFrame:
+    logger.info("fetching_satellite", source=source, url=url)
+
+    async def fetch() -> httpx.Response:
+        return await get_fetcher().get(url, source)
+
+    try:
+        response = await call_with_retry_async(
+            fetch, source, policy or load_retry_policy(), retry_on=(httpx.HTTPError,)
+        )
+    except httpx.HTTPError as exc:
+        logger.error("satellite_failed", source=source, error=str(exc))
+        raise
+    return pd.read_csv(io.StringIO(response.text))
+
+
+async def fetch_all(
+    config: CollectorConfig | None = None,
+    sources: dict[str, str] | None = None,
+    return_exceptions: bool = False,
+    policy: RetryPolicy | None = None,
+) -> dict[str, pd.DataFrame | BaseException]:
+    """Fetch MGM and every satellite source at once, keyed by source name.
+
+    With ``return_exceptions`` a failed source maps to its exception instead
+    of failing the whole cycle.
+    """
+    sources = SATELLITE_SOURCES if sources is None else sources
+    names = ["mgm", *sources]
+    results = await asyncio.gather(
+        fetch_latest_weather_async(config, policy),
+        *(fetch_csv_async(url, name, policy) for name, url in sources.items()),
+        return_exceptions=return_exceptions,
+    )
+    return dict(zip(names, results))
+
+
+def fetch_all_sync(
+    config: CollectorConfig | None = None,
+    sources: dict[str, str] | None = None,
+    return_exceptions: bool = False,
+    policy: RetryPolicy | None = None,
+) -> dict[str, pd.DataFrame | BaseException]:
+    """Run :func:`fetch_all` from synchronous code."""
+
+    async def run():
+        try:
+            return await fetch_all(config, sources, return_exceptions, policy)
+        finally:
+            await close_fetcher()
+
+    return asyncio.run(run())
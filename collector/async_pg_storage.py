@@ -0,0 +1,344 @@
+"""Asyncio PostgreSQL/TimescaleDB backend with the async_storage surface."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Iterable
+
+import asyncpg
+import pandas as pd
+from sqlalchemy.engine import make_url
+
+from .config import DatabaseConfig, load_database_config
+from .postgres_storage import (
+    COPY_CHUNK_SIZE,
+    COPY_COLUMNS,
+    DISTRICT_INDEX_SQL,
+    DISTRICT_KEY_SQL,
+    REPLICA_LAG_SQL,
+    STAGE_SQL,
+    merge_sql,
+)
+from .processor import DISTRICT_FOLD_FROM, DISTRICT_FOLD_TO, district_key, district_keys
+from .timescale_storage import TABLE_SQL
+from .sqlite_common import (
+    PAGE_SIZE,
+    STATS_KEYS,
+    VALUE_COLUMNS,
+    UpsertResult,
+    decode_cursor,
+    next_cursor,
+)
+
+_pools: dict[str, asyncpg.Pool] = {}
+_pool_lock = asyncio.Lock()
+
+SELECT_SQL = "SELECT district, date, temp, humidity, wind_speed FROM weather"
+ROLLUPS = {"hourly": "hour", "daily": "day"}
+
+
+def _dsn(db_url: str) -> str:
+    """Return *db_url* as a plain ``postgresql://`` DSN for asyncpg."""
+    url = make_url(db_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def _timestamp(value: str) -> datetime:
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.to_pydatetime()
+
+
+class _Query:
+    """Collects ``$n`` placeholders and their values while building SQL."""
+
+    def __init__(self) -> None:
+        self.where: list[str] = []
+        self.params: list = []
+
+    def bind(self, value) -> str:
+        self.params.append(value)
+        return f"${len(self.params)}"
+
+    def filter(
+        self,
+        column: str,
+        start: str | None,
+        end: str | None,
+        districts: Iterable[str] | None,
+    ) -> "_Query":
+        # ``date`` is TIMESTAMPTZ (see _init_schema), so aware bounds are
+        # compared as instants whatever the session TimeZone
+        if start:
+            self.where.append(f"{column} >= {self.bind(_timestamp(start))}::timestamptz")
+        if end:
+            self.where.append(f"{column} <= {self.bind(_timestamp(end))}::timestamptz")
+        if districts:
+            keys = [district_key(d) for d in districts]
+            self.where.append(f"district_key = ANY({self.bind(keys)}::text[])")
+        return self
+
+    def clause(self) -> str:
+        return " WHERE " + " AND ".join(self.where) if self.where else ""
+
+
+async def _init_schema(conn: asyncpg.Connection) -> None:
+    # the Timescale schema: dates are TIMESTAMPTZ, so aware datetimes are
+    # stored and compared independently of the session TimeZone
+    async with conn.transaction():
+        created = await conn.fetchval("SELECT to_regclass('weather') IS NULL")
+        await conn.execute(TABLE_SQL)
+        column_type = await conn.fetchval(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'weather' AND column_name = 'date'"
+        )
+        if column_type != "timestamp with time zone":
+            raise RuntimeError(
+                f"weather.date is {column_type}; the async backend needs the "
+                "TIMESTAMPTZ Timescale schema (see timescale_storage.init_ts)"
+            )
+        timescale = await conn.fetchval(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+        )
+        if created and timescale:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+            await conn.execute("SELECT create_hypertable('weather', 'date', if_not_exists => TRUE)")
+        exists = await conn.fetchval(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'weather' AND column_name = 'district_key'"
+        )
+        if not exists:
+            await conn.execute("ALTER TABLE weather ADD COLUMN district_key TEXT")
+            sql = DISTRICT_KEY_SQL.replace(":fold_from", "$1").replace(":fold_to", "$2")
+            await conn.execute(
+                f"UPDATE weather SET district_key = {sql}", DISTRICT_FOLD_FROM, DISTRICT_FOLD_TO
+            )
+        await conn.execute(DISTRICT_INDEX_SQL)
+
+
+async def open_pool(
+    db_url: str, config: DatabaseConfig | None = None, init_schema: bool = True
+) -> asyncpg.Pool:
+    """Return the pool for *db_url*, creating it on first use.
+
+    A new pool creates or migrates the schema unless *init_schema* is false,
+    as for read-only standbys.  The backend needs the Timescale schema with
+    a TIMESTAMPTZ ``date``; a ``weather`` table created by
+    :mod:`collector.postgres_storage` (``date TIMESTAMP``) is refused and has
+    to be migrated first, e.g. ``ALTER TABLE weather ALTER COLUMN date TYPE
+    timestamptz USING date AT TIME ZONE 'UTC'``.
+    """
+    if db_url in _pools:
+        return _pools[db_url]
+    async with _pool_lock:
+        if db_url in _pools:
+            return _pools[db_url]
+        config = config or load_database_config()
+        settings = {}
+        if config.statement_timeout:
+            settings["statement_timeout"] = str(config.statement_timeout)
+        pool = await asyncpg.create_pool(
+            _dsn(db_url),
+            min_size=1,
+            max_size=config.pool_size + config.max_overflow,
+            max_inactive_connection_lifetime=config.pool_recycle,
+            server_settings=settings,
+        )
+        try:
+            if init_schema:
+                async with pool.acquire() as conn:
+                    await _init_schema(conn)
+        except BaseException:
+            await pool.close()
+            raise
+        _pools[db_url] = pool
+    return pool
+
+
+async def close_pool() -> None:
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
+
+
+async def init_db(db_url: str) -> None:
+    await open_pool(db_url)
+
+
+async def replica_lag(primary: str, replica: str) -> float:
+    """Return the replay lag the standby at *replica* reports, in seconds.
+
+    The replica's pool is opened without schema DDL, so routed reads reuse
+    it as is.  *primary* is not contacted.
+    """
+    pool = await open_pool(replica, init_schema=False)
+    return float(await pool.fetchval(REPLICA_LAG_SQL))
+
+
+async def _fetch_frame(db_url: str, sql: str, params: list) -> pd.DataFrame:
+    pool = await open_pool(db_url)
+    async with pool.acquire() as conn:
+        stmt = await conn.prepare(sql)
+        rows = await stmt.fetch(*params)
+        cols = [a.name for a in stmt.get_attributes()]
+    df = pd.DataFrame.from_records([tuple(r) for r in rows], columns=cols)
+    # match the SQLite backends, which return dates as ISO strings
+    for col in df.columns:
+        if len(df) and isinstance(df[col].iloc[0], datetime):
+            df[col] = [v.isoformat() if v is not None else None for v in df[col]]
+    return df
+
+
+def _records(df: pd.DataFrame) -> list[tuple]:
+    frame = df.assign(district_key=district_keys(df["district"]))[COPY_COLUMNS]
+    frame = frame.drop_duplicates(subset=["district", "date"], keep="last")
+    dates = pd.to_datetime(frame["date"], utc=True, format="ISO8601")
+    frame = frame.astype({c: float for c in VALUE_COLUMNS}).astype(object)
+    frame = frame.where(frame.notna(), None)
+    frame["date"] = [d.to_pydatetime() for d in dates]
+    return list(frame.itertuples(index=False, name=None))
+
+
+async def append_to_db(
+    df: pd.DataFrame,
+    db_url: str,
+    on_conflict: str = "replace",
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> UpsertResult:
+    if df.empty:
+        return UpsertResult()
+    merge = merge_sql(on_conflict)
+    records = _records(df)
+    result = UpsertResult()
+    pool = await open_pool(db_url)
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute(STAGE_SQL)
+        for start in range(0, len(records), chunk_size):
+            await conn.copy_records_to_table(
+                "weather_stage", records=records[start:start + chunk_size], columns=COPY_COLUMNS
+            )
+            inserted, updated = await conn.fetchrow(merge)
+            result.inserted += inserted
+            result.updated += updated
+            await conn.execute("TRUNCATE weather_stage")
+    return result
+
+
+async def query_latest(db_url: str, limit: int = 100) -> pd.DataFrame:
+    return await _fetch_frame(db_url, f"{SELECT_SQL} ORDER BY date DESC LIMIT $1", [limit])
+
+
+async def query_by_district(db_url: str, district: str, limit: int = 100) -> pd.DataFrame:
+    return await _fetch_frame(
+        db_url,
+        f"{SELECT_SQL} WHERE district_key = $1 ORDER BY date DESC LIMIT $2",
+        [district_key(district), limit],
+    )
+
+
+async def get_statistics(db_url: str, district: str | None = None) -> dict:
+    q = _Query().filter("date", None, None, [district] if district else None)
+    values = ", ".join(
+        [f"avg({c})" for c in VALUE_COLUMNS]
+        + [f"max({c}), min({c})" for c in VALUE_COLUMNS]
+    )
+    pool = await open_pool(db_url)
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(f"SELECT {values} FROM weather{q.clause()}", *q.params)
+    return dict(zip(STATS_KEYS, row))
+
+
+def range_query(
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+    limit: int | None = None,
+    after: tuple[str, str] | None = None,
+) -> tuple[str, list]:
+    q = _Query().filter("date", start, end, districts)
+    if after:
+        q.where.append(
+            f"(date, district) > ({q.bind(_timestamp(after[0]))}::timestamptz, {q.bind(after[1])})"
+        )
+    sql = f"{SELECT_SQL}{q.clause()} ORDER BY date, district"
+    if limit:
+        sql += f" LIMIT {q.bind(limit)}"
+    return sql, q.params
+
+
+async def query_range(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    limit: int | None = None,
+) -> pd.DataFrame:
+    sql, params = range_query(start, end, districts, limit)
+    return await _fetch_frame(db_url, sql, params)
+
+
+async def query_range_page(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    page_size: int = PAGE_SIZE,
+    cursor: str | None = None,
+) -> tuple[pd.DataFrame, str | None]:
+    after = decode_cursor(cursor) if cursor else None
+    sql, params = range_query(start, end, districts, page_size, after)
+    df = await _fetch_frame(db_url, sql, params)
+    return df, next_cursor(df, page_size)
+
+
+async def iter_range(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    chunk_size: int = PAGE_SIZE,
+) -> AsyncIterator[pd.DataFrame]:
+    cursor = None
+    while True:
+        df, cursor = await query_range_page(db_url, start, end, districts, chunk_size, cursor)
+        if not df.empty:
+            yield df
+        if cursor is None:
+            return
+
+
+def rollup_query(
+    rollup: str,
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+) -> tuple[str, list]:
+    label = ROLLUPS[rollup]
+    q = _Query().filter("date", start, end, [district] if district else None)
+    avgs = ", ".join(f"avg({c}) AS avg_{c}" for c in VALUE_COLUMNS)
+    sql = (
+        f"SELECT date_trunc('{label}', date) AS {label}, {avgs} "
+        f"FROM weather{q.clause()} GROUP BY 1 ORDER BY 1"
+    )
+    return sql, q.params
+
+
+async def hourly_average(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+) -> pd.DataFrame:
+    sql, params = rollup_query("hourly", start, end, district)
+    return await _fetch_frame(db_url, sql, params)
+
+
+async def daily_average(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+) -> pd.DataFrame:
+    sql, params = rollup_query("daily", start, end, district)
+    return await _fetch_frame(db_url, sql, params)
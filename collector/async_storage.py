@@ -1,90 +1,215 @@
+import asyncio
+from contextlib import asynccontextmanager
 import aiosqlite
 import pandas as pd
 from pathlib import Path
+from typing import AsyncIterator
 
-TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS weather (
-    district TEXT,
-    date TEXT,
-    temp REAL,
-    humidity REAL,
-    wind_speed REAL,
-    PRIMARY KEY (district, date)
+from .config import SQLiteConfig, load_sqlite_config
+from .processor import district_key
+from .sqlite_common import (
+    CHUNK_SIZE,
+    LATEST_SQL,
+    PAGE_SIZE,
+    STATS_KEYS,
+    UpsertResult,
+    connection_pragmas,
+    date_lag,
+    decode_cursor,
+    iter_chunks,
+    next_cursor,
+    pending_statements,
+    range_query,
+    read_only_uri,
+    rebuild_rollups_sql,
+    rollup_query,
+    statistics_query,
+    upsert_statements,
 )
-"""
+
+
+class Pool:
+    """Long-lived aiosqlite connections for one database file.
+
+    Reads are spread over ``readers`` connections; all writes go through a
+    single connection guarded by a lock, matching SQLite's one-writer model.
+    """
+
+    def __init__(self, db_path: Path, config: SQLiteConfig) -> None:
+        self.db_path = db_path
+        self.config = config
+        self.writer: aiosqlite.Connection | None = None
+        self.write_lock = asyncio.Lock()
+        self.readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._all: list[aiosqlite.Connection] = []
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path, timeout=self.config.busy_timeout / 1000)
+        self._all.append(conn)
+        for pragma in connection_pragmas(self.config):
+            await conn.execute(pragma)
+        return conn
+
+    async def open(self) -> None:
+        self.writer = await self._open()
+        await _init_schema(self.writer)
+        for _ in range(max(self.config.async_readers, 1)):
+            conn = await self._open()
+            await conn.execute("PRAGMA query_only=1")
+            self.readers.put_nowait(conn)
+
+    async def close(self) -> None:
+        for conn in self._all:
+            await conn.close()
+        self._all.clear()
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[aiosqlite.Connection]:
+        conn = await self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with self.write_lock:
+            try:
+                yield self.writer
+            except BaseException:
+                await self.writer.rollback()
+                raise
+            await self.writer.commit()
+
+
+_pools: dict[Path, Pool] = {}
+# replicas are opened read-only and never have their schema touched
+_read_only: set[Path] = set()
+
+
+async def open_pool(db_path: Path, config: SQLiteConfig | None = None) -> Pool:
+    key = Path(db_path).resolve()
+    if key not in _pools:
+        pool = Pool(db_path, config or load_sqlite_config())
+        await pool.open()
+        _pools[key] = pool
+    return _pools[key]
+
+
+async def close_pool() -> None:
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
+
+
+async def _init_schema(conn: aiosqlite.Connection) -> None:
+    cursor = await conn.execute("PRAGMA user_version")
+    (version,) = await cursor.fetchone()
+    stmts = pending_statements(version)
+    for stmt in stmts:
+        await conn.execute(stmt)
+    if stmts:
+        await conn.commit()
+
 
 async def init_db(db_path: Path) -> None:
     async with aiosqlite.connect(db_path) as conn:
-        await conn.execute(TABLE_SQL)
-        await conn.commit()
+        await _init_schema(conn)
 
-async def append_to_db(df: pd.DataFrame, db_path: Path) -> None:
-    if df.empty:
+
+@asynccontextmanager
+async def _reader(db_path: Path) -> AsyncIterator[aiosqlite.Connection]:
+    key = Path(db_path).resolve()
+    if key in _read_only:
+        async with aiosqlite.connect(read_only_uri(db_path), uri=True) as conn:
+            yield conn
+        return
+    pool = _pools.get(key)
+    if pool is not None:
+        async with pool.read() as conn:
+            yield conn
+        return
+    async with aiosqlite.connect(db_path) as conn:
+        await _init_schema(conn)
+        yield conn
+
+
+@asynccontextmanager
+async def _writer(db_path: Path) -> AsyncIterator[aiosqlite.Connection]:
+    pool = _pools.get(Path(db_path).resolve())
+    if pool is not None:
+        async with pool.write() as conn:
+            yield conn
         return
-    await init_db(db_path)
-    records = df[["district", "date", "temp", "humidity", "wind_speed"]].to_records(index=False)
     async with aiosqlite.connect(db_path) as conn:
-        await conn.executemany(
-            "INSERT OR REPLACE INTO weather (district, date, temp, humidity, wind_speed) VALUES (?,?,?,?,?)",
-            list(records),
-        )
+        await _init_schema(conn)
+        yield conn
         await conn.commit()
 
+
+async def _fetch_frame(db_path: Path, sql: str, params) -> pd.DataFrame:
+    # plain tuples keep bulk reads cheap; DataFrame construction does the rest
+    async with _reader(db_path) as conn:
+        async with conn.execute(sql, params) as cursor:
+            rows = await cursor.fetchall()
+            cols = [c[0] for c in cursor.description]
+    return pd.DataFrame.from_records(rows, columns=cols)
+
+
+async def append_to_db(
+    df: pd.DataFrame,
+    db_path: Path,
+    on_conflict: str = "replace",
+    chunk_size: int = CHUNK_SIZE,
+) -> UpsertResult:
+    if df.empty:
+        return UpsertResult()
+    insert_sql, update_sql = upsert_statements(on_conflict)
+    result = UpsertResult()
+    async with _writer(db_path) as conn:
+        for chunk in iter_chunks(df, chunk_size):
+            cursor = await conn.executemany(insert_sql, chunk)
+            result.inserted += cursor.rowcount
+            if update_sql:
+                cursor = await conn.executemany(update_sql, chunk)
+                result.updated += cursor.rowcount
+    return result
+
+async def _latest_date(db_path: Path) -> str | None:
+    async with aiosqlite.connect(read_only_uri(db_path), uri=True) as conn:
+        async with conn.execute(LATEST_SQL) as cursor:
+            (latest,) = await cursor.fetchone()
+    return latest
+
+
+async def replica_lag(primary: Path, replica: Path) -> float:
+    """Async version of :func:`collector.sqlite_storage.replica_lag`."""
+    lag = date_lag(await _latest_date(primary), await _latest_date(replica))
+    _read_only.add(Path(replica).resolve())
+    return lag
+
+
 async def query_latest(db_path: Path, limit: int = 100) -> pd.DataFrame:
-    await init_db(db_path)
-    async with aiosqlite.connect(db_path) as conn:
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(
-            "SELECT district, date, temp, humidity, wind_speed FROM weather ORDER BY date DESC LIMIT ?",
-            (limit,),
-        )
-        rows = await cursor.fetchall()
-        cols = [c[0] for c in cursor.description]
-    return pd.DataFrame(rows, columns=cols)
+    return await _fetch_frame(
+        db_path,
+        "SELECT district, date, temp, humidity, wind_speed FROM weather ORDER BY date DESC LIMIT ?",
+        (limit,),
+    )
 
 async def query_by_district(db_path: Path, district: str, limit: int = 100) -> pd.DataFrame:
-    await init_db(db_path)
-    async with aiosqlite.connect(db_path) as conn:
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(
-            "SELECT district, date, temp, humidity, wind_speed FROM weather WHERE LOWER(district)=LOWER(?) ORDER BY date DESC LIMIT ?",
-            (district, limit),
-        )
-        rows = await cursor.fetchall()
-        cols = [c[0] for c in cursor.description]
-    return pd.DataFrame(rows, columns=cols)
-
-async def get_statistics(db_path: Path) -> dict:
-    await init_db(db_path)
-    async with aiosqlite.connect(db_path) as conn:
-        cursor = await conn.execute(
-            """
-            SELECT
-                AVG(temp) as avg_temp,
-                AVG(humidity) as avg_humidity,
-                AVG(wind_speed) as avg_wind_speed,
-                MAX(temp) as max_temp,
-                MIN(temp) as min_temp,
-                MAX(humidity) as max_humidity,
-                MIN(humidity) as min_humidity,
-                MAX(wind_speed) as max_wind_speed,
-                MIN(wind_speed) as min_wind_speed
-            FROM weather
-            """
-        )
-        row = await cursor.fetchone()
-    keys = [
-        "avg_temp",
-        "avg_humidity",
-        "avg_wind_speed",
-        "max_temp",
-        "min_temp",
-        "max_humidity",
-        "min_humidity",
-        "max_wind_speed",
-        "min_wind_speed",
-    ]
-    return dict(zip(keys, row))
+    return await _fetch_frame(
+        db_path,
+        "SELECT district, date, temp, humidity, wind_speed FROM weather WHERE district_key = ? ORDER BY date DESC LIMIT ?",
+        (district_key(district), limit),
+    )
+
+async def get_statistics(db_path: Path, district: str | None = None) -> dict:
+    sql, params = statistics_query(district)
+    async with _reader(db_path) as conn:
+        async with conn.execute(sql, params) as cursor:
+            row = await cursor.fetchone()
+    return dict(zip(STATS_KEYS, row))
 
 async def query_range(
     db_path: Path,
@@ -93,32 +218,40 @@ async def query_range(
     districts: list[str] | None = None,
     limit: int | None = None,
 ) -> pd.DataFrame:
-    await init_db(db_path)
-    where = []
-    params: list = []
-    if start:
-        where.append("date >= ?")
-        params.append(start)
-    if end:
-        where.append("date <= ?")
-        params.append(end)
-    if districts:
-        placeholders = ",".join("?" for _ in districts)
-        where.append(f"LOWER(district) IN ({placeholders})")
-        params.extend(d.lower() for d in districts)
-    sql = "SELECT district, date, temp, humidity, wind_speed FROM weather"
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY date"
-    if limit:
-        sql += " LIMIT ?"
-        params.append(limit)
-    async with aiosqlite.connect(db_path) as conn:
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(sql, params)
-        rows = await cursor.fetchall()
-        cols = [c[0] for c in cursor.description]
-    return pd.DataFrame(rows, columns=cols)
+    sql, params = range_query(start, end, districts, limit)
+    return await _fetch_frame(db_path, sql, params)
+
+async def query_range_page(
+    db_path: Path,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    page_size: int = PAGE_SIZE,
+    cursor: str | None = None,
+) -> tuple[pd.DataFrame, str | None]:
+    after = decode_cursor(cursor) if cursor else None
+    sql, params = range_query(start, end, districts, page_size, after)
+    df = await _fetch_frame(db_path, sql, params)
+    return df, next_cursor(df, page_size)
+
+async def iter_range(
+    db_path: Path,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    chunk_size: int = PAGE_SIZE,
+) -> AsyncIterator[pd.DataFrame]:
+    cursor = None
+    while True:
+        df, cursor = await query_range_page(db_path, start, end, districts, chunk_size, cursor)
+        if not df.empty:
+            yield df
+        if cursor is None:
+            return
+
+async def _rollup_average(db_path: Path, rollup: str, start, end, district) -> pd.DataFrame:
+    sql, params = rollup_query(rollup, start, end, district)
+    return await _fetch_frame(db_path, sql, params)
 
 async def hourly_average(
     db_path: Path,
@@ -126,28 +259,17 @@ async def hourly_average(
     end: str | None = None,
     district: str | None = None,
 ) -> pd.DataFrame:
-    await init_db(db_path)
-    where = []
-    params: list = []
-    if start:
-        where.append("date >= ?")
-        params.append(start)
-    if end:
-        where.append("date <= ?")
-        params.append(end)
-    if district:
-        where.append("LOWER(district) = LOWER(?)")
-        params.append(district)
-    sql = (
-        "SELECT substr(date,1,13) as hour, AVG(temp) as avg_temp, AVG(humidity) as avg_humidity, "
-        "AVG(wind_speed) as avg_wind_speed FROM weather"
-    )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " GROUP BY hour ORDER BY hour"
-    async with aiosqlite.connect(db_path) as conn:
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(sql, params)
-        rows = await cursor.fetchall()
-        cols = [c[0] for c in cursor.description]
-    return pd.DataFrame(rows, columns=cols)
+    return await _rollup_average(db_path, "hourly", start, end, district)
+
+async def daily_average(
+    db_path: Path,
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+) -> pd.DataFrame:
+    return await _rollup_average(db_path, "daily", start, end, district)
+
+async def rebuild_rollups(db_path: Path) -> None:
+    async with _writer(db_path) as conn:
+        for stmt in rebuild_rollups_sql():
+            await conn.execute(stmt)
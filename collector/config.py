@@ -1,5 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
+import random
 
 @dataclass
 class CollectorConfig:
@@ -8,7 +9,207 @@ class CollectorConfig:
     mgm_url: str = os.getenv("MGM_API_URL", "https://api.mgm.gov.tr/api/sonDurumlar")
     retries: int = int(os.getenv("MGM_RETRIES", "3"))
     retry_delay: int = int(os.getenv("MGM_RETRY_DELAY", "5"))
+    watermark_path: str = os.getenv("COLLECTOR_WATERMARK", "")
+
+
+@dataclass
+class SQLiteConfig:
+    """Connection settings for pooled SQLite access."""
+
+    pool: bool = os.getenv("SQLITE_POOL", "0") == "1"
+    journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    busy_timeout: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+    async_readers: int = int(os.getenv("SQLITE_ASYNC_READERS", "4"))
+
+
+@dataclass
+class DatabaseConfig:
+    """Connection pool settings for the PostgreSQL/Timescale backends."""
+
+    pool_size: int = int(os.getenv("PG_POOL_SIZE", "5"))
+    max_overflow: int = int(os.getenv("PG_MAX_OVERFLOW", "10"))
+    pool_timeout: float = float(os.getenv("PG_POOL_TIMEOUT", "30"))
+    pool_recycle: int = int(os.getenv("PG_POOL_RECYCLE", "1800"))
+    pre_ping: bool = os.getenv("PG_POOL_PRE_PING", "1") == "1"
+    statement_timeout: int = int(os.getenv("PG_STATEMENT_TIMEOUT", "30000"))
+
+
+@dataclass
+class TimescaleConfig:
+    """Hypertable chunking, compression and retention policies.
+
+    Intervals are PostgreSQL interval strings; an empty ``compress_after``
+    or ``drop_after`` removes the corresponding policy.
+    """
+
+    chunk_interval: str = os.getenv("TS_CHUNK_INTERVAL", "7 days")
+    compress_segmentby: str = os.getenv("TS_COMPRESS_SEGMENTBY", "district_key, district")
+    compress_after: str = os.getenv("TS_COMPRESS_AFTER", "30 days")
+    drop_after: str = os.getenv("TS_DROP_AFTER", "")
+
+
+@dataclass
+class RouterConfig:
+    """Read replicas and the limits used to route reads to them."""
+
+    replicas: list[str] = field(
+        default_factory=lambda: [
+            r.strip() for r in os.getenv("DB_REPLICAS", "").split(",") if r.strip()
+        ]
+    )
+    max_lag: float = float(os.getenv("DB_REPLICA_MAX_LAG", "300"))
+    check_interval: float = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "30"))
+
+
+@dataclass
+class InfluxConfig:
+    """Batching and retry settings for the InfluxDB writer (times in ms)."""
+
+    batch_size: int = int(os.getenv("INFLUX_BATCH_SIZE", "5000"))
+    flush_interval: int = int(os.getenv("INFLUX_FLUSH_INTERVAL", "1000"))
+    retry_interval: int = int(os.getenv("INFLUX_RETRY_INTERVAL", "5000"))
+    max_retries: int = int(os.getenv("INFLUX_MAX_RETRIES", "5"))
+    max_retry_delay: int = int(os.getenv("INFLUX_MAX_RETRY_DELAY", "125000"))
+    exponential_base: int = int(os.getenv("INFLUX_EXPONENTIAL_BASE", "2"))
+
+
+@dataclass
+class S3Config:
+    """S3 endpoint, multipart transfer and directory sync settings."""
+
+    endpoint_url: str | None = os.getenv("S3_ENDPOINT_URL") or None
+    multipart_threshold: int = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+    multipart_chunksize: int = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+    max_concurrency: int = int(os.getenv("S3_MAX_CONCURRENCY", "10"))
+    parquet_prefix: str = os.getenv("S3_PARQUET_PREFIX", "parquet")
+    sync_delete: bool = os.getenv("S3_SYNC_DELETE", "0") == "1"
+
+
+@dataclass
+class FetchConfig:
+    """Shared HTTP client limits for the async fetch layer."""
+
+    max_connections: int = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+    per_host: int = int(os.getenv("FETCH_PER_HOST", "4"))
+    timeout: float = float(os.getenv("FETCH_TIMEOUT", "10"))
+    keepalive_expiry: float = float(os.getenv("FETCH_KEEPALIVE_EXPIRY", "30"))
+
+
+@dataclass
+class HttpCacheConfig:
+    """On-disk cache of parsed upstream responses; disabled without a directory."""
+
+    directory: str = os.getenv("HTTP_CACHE_DIR", "")
+    ttl: int = int(os.getenv("HTTP_CACHE_TTL", "86400"))
+    max_bytes: int = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter for upstream fetches (times in seconds).
+
+    ``attempts`` and ``base_delay`` default to ``MGM_RETRIES`` and
+    ``MGM_RETRY_DELAY``.  A retry is skipped when its delay would overrun
+    ``deadline``, counted from the first attempt.  Failed responses are only
+    retried if their status is in ``retry_statuses``; connection errors and
+    timeouts always are.
+    """
+
+    attempts: int = int(os.getenv("MGM_RETRIES", "3"))
+    base_delay: float = float(os.getenv("MGM_RETRY_DELAY", "5"))
+    multiplier: float = float(os.getenv("RETRY_MULTIPLIER", "2"))
+    max_delay: float = float(os.getenv("RETRY_MAX_DELAY", "60"))
+    jitter: float = float(os.getenv("RETRY_JITTER", "0.5"))
+    deadline: float = float(os.getenv("RETRY_DEADLINE", "120"))
+    retry_statuses: frozenset[int] = field(
+        default_factory=lambda: frozenset(
+            int(s) for s in os.getenv("RETRY_STATUSES", "408,429,500,502,503,504").split(",")
+            if s.strip()
+        )
+    )
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number *attempt* (from 0)."""
+        delay = min(self.base_delay * self.multiplier ** attempt, self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+
+@dataclass
+class BreakerConfig:
+    """Consecutive failures that open a source's circuit, and for how long."""
+
+    failures: int = int(os.getenv("BREAKER_FAILURES", "5"))
+    cooldown: float = float(os.getenv("BREAKER_COOLDOWN", "60"))
+
+
+@dataclass
+class DaemonConfig:
+    """Schedule and sink queue sizes for the long-running collector."""
+
+    interval: float = float(os.getenv("COLLECT_INTERVAL", "600"))
+    queue_size: int = int(os.getenv("SINK_QUEUE_SIZE", "4"))
+
 
 def load_config() -> CollectorConfig:
     """Load configuration from environment variables."""
     return CollectorConfig()
+
+
+def load_sqlite_config() -> SQLiteConfig:
+    """Load SQLite connection settings from environment variables."""
+    return SQLiteConfig()
+
+
+def load_database_config() -> DatabaseConfig:
+    """Load PostgreSQL pool settings from environment variables."""
+    return DatabaseConfig()
+
+
+def load_timescale_config() -> TimescaleConfig:
+    """Load Timescale policies from environment variables."""
+    return TimescaleConfig()
+
+
+def load_router_config() -> RouterConfig:
+    """Load read replica settings from environment variables."""
+    return RouterConfig()
+
+
+def load_influx_config() -> InfluxConfig:
+    """Load InfluxDB writer settings from environment variables."""
+    return InfluxConfig()
+
+
+def load_s3_config() -> S3Config:
+    """Load S3 settings from environment variables."""
+    return S3Config()
+
+
+def load_fetch_config() -> FetchConfig:
+    """Load async HTTP client limits from environment variables."""
+    return FetchConfig()
+
+
+def load_http_cache_config() -> HttpCacheConfig:
+    """Load response cache settings from environment variables."""
+    return HttpCacheConfig()
+
+
+def load_retry_policy(config: CollectorConfig | None = None) -> RetryPolicy:
+    """Load the retry policy, taking attempts and base delay from *config*."""
+    if config is None:
+        return RetryPolicy()
+    return RetryPolicy(attempts=config.retries, base_delay=config.retry_delay)
+
+
+def load_breaker_config() -> BreakerConfig:
+    """Load circuit breaker settings from environment variables."""
+    return BreakerConfig()
+
+
+def load_daemon_config() -> DaemonConfig:
+    """Load collector daemon settings from environment variables."""
+    return DaemonConfig()
@@ -0,0 +1,85 @@
+"""Process-wide SQLAlchemy engines for the PostgreSQL/Timescale backends."""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine, make_url
+
+from .config import DatabaseConfig, load_database_config
+from .metrics import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUTS, DB_POOL_WAIT_SECONDS
+
+_engines: dict[str, Engine] = {}
+_lock = threading.Lock()
+
+
+def engine_options(db_url: str, config: DatabaseConfig | None = None) -> dict:
+    """Return the ``create_engine`` keyword arguments for *db_url*."""
+    config = config or load_database_config()
+    options = {"pool_pre_ping": config.pre_ping, "pool_recycle": config.pool_recycle}
+    url = make_url(db_url)
+    if url.get_backend_name() == "postgresql":
+        options.update(
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+        )
+        if config.statement_timeout:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={config.statement_timeout:d}"
+            }
+    return options
+
+
+def pool_label(db_url: str) -> str:
+    """Return a metrics label for *db_url* without credentials."""
+    url = make_url(db_url)
+    return f"{url.host or ''}/{url.database or ''}"
+
+
+def _instrument(engine: Engine, label: str) -> None:
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        DB_POOL_CHECKOUTS.labels(label).inc()
+        DB_POOL_CHECKED_OUT.labels(label).inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, record):
+        DB_POOL_CHECKED_OUT.labels(label).dec()
+
+
+def get_engine(db_url: str, config: DatabaseConfig | None = None) -> Engine:
+    """Return the shared engine for *db_url*, creating it on first use."""
+    engine = _engines.get(db_url)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            engine = create_engine(db_url, **engine_options(db_url, config))
+            _instrument(engine, pool_label(db_url))
+            _engines[db_url] = engine
+    return engine
+
+
+@contextmanager
+def begin(db_url: str) -> Iterator[Connection]:
+    """Yield a pooled connection inside a transaction, timing the checkout."""
+    engine = get_engine(db_url)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        DB_POOL_WAIT_SECONDS.labels(pool_label(db_url)).observe(
+            time.perf_counter() - started
+        )
+        yield conn
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection and forget the engines."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
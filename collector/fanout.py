@@ -0,0 +1,111 @@
+"""Concurrent fan-out of collected batches to independent sinks."""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+import pandas as pd
+import structlog
+
+from .metrics import (
+    SINK_DROPPED,
+    SINK_ERRORS,
+    SINK_LAG_SECONDS,
+    SINK_QUEUE_DEPTH,
+    SINK_WRITE_SECONDS,
+)
+
+logger = structlog.get_logger(__name__)
+
+_STOP = object()
+
+
+class BatchDropped(RuntimeError):
+    """A batch was pushed out of a full sink queue before it was written."""
+
+
+class SinkWorker:
+    """One sink fed from a bounded queue by its own thread.
+
+    When the queue is full the oldest waiting batch is dropped, so a stuck
+    sink holds at most ``queue_size`` batches and never blocks the others.
+    Errors are logged and counted and the worker moves on to the next batch.
+    Every batch gets a future that resolves once it is written, or holds the
+    error, or :class:`BatchDropped`.
+    """
+
+    def __init__(self, name: str, write: Callable[[pd.DataFrame], object], queue_size: int):
+        self.name = name
+        self.write = write
+        self.queue: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+        self.thread = threading.Thread(target=self._run, name=f"sink-{name}", daemon=True)
+
+    def submit(self, df: pd.DataFrame) -> Future:
+        done: Future = Future()
+        item = (time.monotonic(), df, done)
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    dropped = self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.queue.task_done()
+                dropped[2].set_exception(BatchDropped(f"queue of sink {self.name} is full"))
+                SINK_DROPPED.labels(self.name).inc()
+                logger.error("sink_batch_dropped", sink=self.name)
+        SINK_QUEUE_DEPTH.labels(self.name).set(self.queue.qsize())
+        return done
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                queued_at, df, done = item
+                SINK_QUEUE_DEPTH.labels(self.name).set(self.queue.qsize())
+                started = time.monotonic()
+                try:
+                    self.write(df)
+                except Exception as exc:
+                    SINK_ERRORS.labels(self.name).inc()
+                    logger.error("sink_failed", sink=self.name, error=str(exc))
+                    done.set_exception(exc)
+                    continue
+                done.set_result(None)
+                finished = time.monotonic()
+                SINK_WRITE_SECONDS.labels(self.name).observe(finished - started)
+                SINK_LAG_SECONDS.labels(self.name).set(finished - queued_at)
+            finally:
+                self.queue.task_done()
+
+
+class FanOut:
+    """Hands every batch to each sink's worker without waiting for any of them."""
+
+    def __init__(self, sinks: dict[str, Callable[[pd.DataFrame], object]], queue_size: int = 4):
+        self.workers = [SinkWorker(name, write, queue_size) for name, write in sinks.items()]
+        for worker in self.workers:
+            worker.thread.start()
+
+    def submit(self, df: pd.DataFrame) -> dict[str, Future]:
+        """Queue *df* for every sink; returns each sink's completion future."""
+        return {worker.name: worker.submit(df) for worker in self.workers}
+
+    def join(self) -> None:
+        """Block until every queued batch has been handled."""
+        for worker in self.workers:
+            worker.queue.join()
+
+    def close(self, timeout: float | None = None) -> None:
+        """Let the workers drain their queues, then stop them."""
+        for worker in self.workers:
+            worker.queue.put(_STOP)
+        for worker in self.workers:
+            worker.thread.join(timeout)
@@ -0,0 +1,151 @@
+"""Conditional GETs backed by an on-disk cache of parsed responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+import requests
+import structlog
+
+from .config import HttpCacheConfig, load_http_cache_config
+from .metrics import HTTP_CACHE_BYTES_SAVED, HTTP_CACHE_HITS, HTTP_CACHE_MISSES
+
+logger = structlog.get_logger(__name__)
+
+
+class ResponseCache:
+    """Parsed DataFrames keyed by URL, with their ETag and Last-Modified.
+
+    Each entry is a pickled frame plus a JSON sidecar.  Entries not
+    revalidated within ``ttl`` seconds are dropped, and the least recently
+    used are evicted once the frames exceed ``max_bytes``.
+    """
+
+    def __init__(self, directory: Path, ttl: int, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.pkl"
+
+    def get(self, url: str) -> dict | None:
+        meta_path, frame_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - meta["validated_at"] > self.ttl or not frame_path.exists():
+            self._remove(meta_path)
+            return None
+        return meta
+
+    def frame(self, url: str) -> pd.DataFrame:
+        return pd.read_pickle(self._paths(url)[1])
+
+    def touch(self, url: str, meta: dict) -> None:
+        meta["validated_at"] = time.time()
+        self._write_meta(self._paths(url)[0], meta)
+
+    def put(self, url: str, response: requests.Response, df: pd.DataFrame) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        meta_path, frame_path = self._paths(url)
+        tmp = frame_path.with_suffix(".tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, frame_path)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": len(response.content),
+            "validated_at": time.time(),
+        }
+        self._write_meta(meta_path, meta)
+        self.evict()
+
+    def _write_meta(self, path: Path, meta: dict) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, path)
+
+    def _remove(self, meta_path: Path) -> None:
+        meta_path.unlink(missing_ok=True)
+        meta_path.with_suffix(".pkl").unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        entries = []
+        for meta_path in self.directory.glob("*.json"):
+            frame_path = meta_path.with_suffix(".pkl")
+            try:
+                entries.append((meta_path.stat().st_mtime, frame_path.stat().st_size, meta_path))
+            except FileNotFoundError:
+                self._remove(meta_path)
+        total = sum(size for _, size, _ in entries)
+        for _, size, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(meta_path)
+            total -= size
+
+
+_caches: dict[str, ResponseCache] = {}
+
+
+def get_cache(config: HttpCacheConfig | None = None) -> ResponseCache | None:
+    """Return the cache for ``HTTP_CACHE_DIR``, or ``None`` when it is unset."""
+    config = config or load_http_cache_config()
+    if not config.directory:
+        return None
+    if config.directory not in _caches:
+        _caches[config.directory] = ResponseCache(
+            Path(config.directory), config.ttl, config.max_bytes
+        )
+    return _caches[config.directory]
+
+
+def fetch_frame(
+    url: str,
+    source: str,
+    parse: Callable[[requests.Response], pd.DataFrame],
+    timeout: float = 10,
+    cache: ResponseCache | None = None,
+) -> pd.DataFrame:
+    """GET *url* and parse it, revalidating a cached frame when possible.
+
+    A ``304 Not Modified`` returns the frame parsed on the last download
+    without reading or parsing the body again.
+    """
+    cache = cache or get_cache()
+    if cache is None:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return parse(response)
+    meta = cache.get(url)
+    headers = {}
+    if meta:
+        if meta["etag"]:
+            headers["If-None-Match"] = meta["etag"]
+        if meta["last_modified"]:
+            headers["If-Modified-Since"] = meta["last_modified"]
+    response = requests.get(url, timeout=timeout, headers=headers)
+    if meta and response.status_code == 304:
+        HTTP_CACHE_HITS.labels(source).inc()
+        HTTP_CACHE_BYTES_SAVED.labels(source).inc(meta["size"])
+        cache.touch(url, meta)
+        logger.info("http_cache_hit", source=source)
+        return cache.frame(url)
+    response.raise_for_status()
+    HTTP_CACHE_MISSES.labels(source).inc()
+    df = parse(response)
+    cache.put(url, response, df)
+    return df
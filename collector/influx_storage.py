@@ -1,9 +1,132 @@
 """InfluxDB storage utilities."""
 from __future__ import annotations
 
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+import atexit
+import threading
+import time
+
+from influxdb_client import InfluxDBClient, WritePrecision
+from influxdb_client.client.write_api import WriteOptions
 import pandas as pd
+import structlog
+
+from .config import InfluxConfig, load_influx_config
+from .metrics import INFLUX_BATCHES, INFLUX_QUEUE_DEPTH, INFLUX_WRITE_SECONDS
+
+MEASUREMENT = "weather"
+FIELDS = ["temp", "humidity", "wind_speed"]
+
+logger = structlog.get_logger(__name__)
+
+_writers: dict[tuple[str, str, str], "InfluxWriter"] = {}
+_lock = threading.Lock()
+
+
+def _escape_tag(values: pd.Series) -> pd.Series:
+    return values.astype(str).str.replace(r"([,= \\])", r"\\\1", regex=True)
+
+
+def to_line_protocol(df: pd.DataFrame) -> list[str]:
+    """Render weather rows as InfluxDB line protocol, column by column.
+
+    Missing field values are left out of their line; rows without any
+    field or without a parseable date are dropped.
+    """
+    if df.empty:
+        return []
+    times = pd.to_datetime(df["date"], errors="coerce", utc=True, format="ISO8601")
+    times = times.dt.as_unit("ns")
+    fields = pd.Series("", index=df.index)
+    for name in FIELDS:
+        values = pd.to_numeric(df[name], errors="coerce").astype(float)
+        rendered = (name + "=" + values.astype(str)).where(values.notna(), "")
+        fields = fields.str.cat(rendered, sep=",")
+    fields = fields.str.replace(r",{2,}", ",", regex=True).str.strip(",")
+    keep = fields.ne("") & times.notna()
+    lines = (
+        f"{MEASUREMENT},district="
+        + _escape_tag(df["district"][keep])
+        + " "
+        + fields[keep]
+        + " "
+        + times[keep].astype("int64").astype(str)
+    )
+    return lines.tolist()
+
+
+def _lines(data) -> int:
+    return data.count(b"\n" if isinstance(data, bytes) else "\n") + 1
+
+
+class InfluxWriter:
+    """Long-lived client whose writes are batched and retried in the background."""
+
+    def __init__(self, url: str, token: str, org: str, config: InfluxConfig | None = None):
+        config = config or load_influx_config()
+        self.client = InfluxDBClient(url=url, token=token, org=org)
+        self.write_api = self.client.write_api(
+            write_options=WriteOptions(
+                batch_size=config.batch_size,
+                flush_interval=config.flush_interval,
+                retry_interval=config.retry_interval,
+                max_retries=config.max_retries,
+                max_retry_delay=config.max_retry_delay,
+                exponential_base=config.exponential_base,
+            ),
+            success_callback=self._on_success,
+            error_callback=self._on_error,
+            retry_callback=self._on_retry,
+        )
+
+    def _on_success(self, conf, data) -> None:
+        INFLUX_BATCHES.labels("success").inc()
+        INFLUX_QUEUE_DEPTH.dec(_lines(data))
+
+    def _on_error(self, conf, data, exc) -> None:
+        INFLUX_BATCHES.labels("error").inc()
+        INFLUX_QUEUE_DEPTH.dec(_lines(data))
+        logger.error("influx_write_failed", bucket=conf[0], error=str(exc))
+
+    def _on_retry(self, conf, data, exc) -> None:
+        INFLUX_BATCHES.labels("retry").inc()
+        logger.warning("influx_write_retry", bucket=conf[0], error=str(exc))
+
+    def write(self, df: pd.DataFrame, bucket: str) -> int:
+        """Queue *df* for writing and return the number of lines queued."""
+        started = time.perf_counter()
+        lines = to_line_protocol(df)
+        if lines:
+            INFLUX_QUEUE_DEPTH.inc(len(lines))
+            self.write_api.write(bucket=bucket, record=lines, write_precision=WritePrecision.NS)
+        INFLUX_WRITE_SECONDS.observe(time.perf_counter() - started)
+        return len(lines)
+
+    def close(self) -> None:
+        """Flush pending batches and close the client."""
+        self.write_api.close()
+        self.client.close()
+
+
+def get_writer(url: str, token: str, org: str) -> InfluxWriter:
+    """Return the shared writer for this server and org, creating it on first use."""
+    key = (url, token, org)
+    with _lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = InfluxWriter(url, token, org)
+    return writer
+
+
+def close_writers() -> None:
+    """Flush and close every shared writer."""
+    with _lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_writers)
 
 
 def write_to_influx(
@@ -13,19 +136,11 @@ def write_to_influx(
     org: str,
     bucket: str,
 ) -> None:
-    """Write a dataframe to InfluxDB."""
+    """Write a dataframe to InfluxDB.
+
+    Rows are queued on a shared batching writer and sent in the background;
+    call :func:`close_writers` to flush before exiting early.
+    """
     if df.empty:
         return
-    client = InfluxDBClient(url=url, token=token, org=org)
-    write_api = client.write_api(write_options=SYNCHRONOUS)
-    points = [
-        Point("weather")
-        .tag("district", row["district"])
-        .field("temp", row["temp"])
-        .field("humidity", row["humidity"])
-        .field("wind_speed", row["wind_speed"])
-        .time(row["date"])
-        for row in df.to_dict("records")
-    ]
-    write_api.write(bucket=bucket, record=points)
-    client.close()
+    get_writer(url, token, org).write(df, bucket)
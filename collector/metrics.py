@@ -1,4 +1,4 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 
 WEATHER_FETCH_TOTAL = Counter(
     "weather_fetch_total", "Total successful weather fetches"
@@ -6,3 +6,66 @@ WEATHER_FETCH_TOTAL = Counter(
 WEATHER_FETCH_ERRORS = Counter(
     "weather_fetch_errors_total", "Total weather fetch errors"
 )
+COLLECTOR_ROWS = Counter(
+    "collector_rows_total", "Rows per collection cycle: fetched, new or skipped", ["kind"]
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state", "Upstream circuit: 0 closed, 1 half-open, 2 open", ["source"]
+)
+FETCH_RETRIES = Counter(
+    "fetch_retries_total", "Upstream fetch attempts that were retried", ["source"]
+)
+SINK_WRITE_SECONDS = Histogram(
+    "sink_write_seconds", "Time a sink took to write one batch", ["sink"]
+)
+SINK_LAG_SECONDS = Gauge(
+    "sink_lag_seconds", "Time from queuing the last written batch to it being written", ["sink"]
+)
+SINK_QUEUE_DEPTH = Gauge(
+    "sink_queue_depth", "Batches waiting for a sink", ["sink"]
+)
+SINK_ERRORS = Counter(
+    "sink_errors_total", "Batches a sink failed to write", ["sink"]
+)
+SINK_DROPPED = Counter(
+    "sink_dropped_total", "Batches dropped because a sink's queue was full", ["sink"]
+)
+SOURCE_FETCH_SECONDS = Histogram(
+    "source_fetch_seconds", "Upstream fetch latency by source", ["source"]
+)
+HTTP_CACHE_HITS = Counter(
+    "http_cache_hits_total", "Upstream responses served from cache after a 304", ["source"]
+)
+HTTP_CACHE_MISSES = Counter(
+    "http_cache_misses_total", "Upstream responses downloaded and parsed", ["source"]
+)
+HTTP_CACHE_BYTES_SAVED = Counter(
+    "http_cache_bytes_saved_total", "Response bytes not downloaded thanks to a 304", ["source"]
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["pool"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["pool"]
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["pool"]
+)
+STORAGE_CALL_SECONDS = Histogram(
+    "storage_call_seconds", "Storage call latency by operation and route", ["op", "route"]
+)
+STORAGE_REPLICA_LAG = Gauge(
+    "storage_replica_lag_seconds", "Newest row on primary minus newest on replica", ["replica"]
+)
+STORAGE_REPLICA_HEALTHY = Gauge(
+    "storage_replica_healthy", "1 if the replica answered its last health check", ["replica"]
+)
+INFLUX_WRITE_SECONDS = Histogram(
+    "influx_write_seconds", "Time to serialise and enqueue a DataFrame for InfluxDB"
+)
+INFLUX_QUEUE_DEPTH = Gauge(
+    "influx_queue_depth", "Lines handed to the InfluxDB writer but not yet written"
+)
+INFLUX_BATCHES = Counter(
+    "influx_batches_total", "InfluxDB batch outcomes", ["outcome"]
+)
@@ -1,40 +1,36 @@
-import time
 import structlog
 
 from .metrics import WEATHER_FETCH_ERRORS, WEATHER_FETCH_TOTAL
-from .config import CollectorConfig, load_config
+from .config import CollectorConfig, RetryPolicy, load_config, load_retry_policy
+from .http_cache import fetch_frame
+from .resilience import call_with_retry
 
 import pandas as pd
-import requests
 from requests.exceptions import RequestException
 
 logger = structlog.get_logger(__name__)
 
 
-def fetch_latest_weather(config: CollectorConfig | None = None) -> pd.DataFrame:
-    """Fetch latest weather data from MGM API with retry logic."""
+def fetch_latest_weather(
+    config: CollectorConfig | None = None, policy: RetryPolicy | None = None
+) -> pd.DataFrame:
+    """Fetch latest weather data from MGM API with retry logic.
+
+    Retries follow *policy* (by default built from ``config.retries`` and
+    ``config.retry_delay``) under the ``mgm`` circuit breaker.
+    """
     if config is None:
         config = load_config()
+    policy = policy or load_retry_policy(config)
     logger.info("Fetching weather data from MGM API", url=config.mgm_url)
-    for attempt in range(config.retries):
+
+    def fetch() -> pd.DataFrame:
         try:
-            response = requests.get(config.mgm_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            WEATHER_FETCH_TOTAL.inc()
-            return pd.DataFrame(data)
-        except RequestException as exc:
+            return fetch_frame(config.mgm_url, "mgm", lambda r: pd.DataFrame(r.json()))
+        except RequestException:
             WEATHER_FETCH_ERRORS.inc()
-            logger.warning(
-                "Failed to fetch MGM data (attempt %d/%d): %s",
-                attempt + 1,
-                config.retries,
-                exc,
-            )
-            if attempt + 1 < config.retries:
-                logger.info("Retrying in %d seconds...", config.retry_delay)
-                time.sleep(config.retry_delay)
-            else:
-                logger.error("All retries failed. Giving up.")
-                raise
-    raise RuntimeError("Failed to fetch data after multiple retries.")
+            raise
+
+    df = call_with_retry(fetch, "mgm", policy, retry_on=(RequestException,))
+    WEATHER_FETCH_TOTAL.inc()
+    return df
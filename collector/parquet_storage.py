@@ -0,0 +1,137 @@
+"""Append-only Parquet archive partitioned by month and district."""
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+import structlog
+
+from .processor import district_key, district_keys
+
+COMPACT_AFTER = int(os.getenv("PARQUET_COMPACT_AFTER", "24"))
+KEY = ["district", "date"]
+
+logger = structlog.get_logger(__name__)
+
+
+def _timestamp(value: str) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _parts(partition: Path) -> list[Path]:
+    # part names start with a nanosecond timestamp, so sorting by name
+    # orders them oldest to newest
+    return sorted(partition.glob("part-*.parquet"))
+
+
+def append_parquet(df: pd.DataFrame, root: Path) -> list[Path]:
+    """Write *df* as new part files under ``root/month=YYYY-MM/district=<key>``.
+
+    Existing files are never read or rewritten; a partition is compacted
+    once it holds more than ``PARQUET_COMPACT_AFTER`` parts.  Rows without a
+    parseable date are skipped.
+    """
+    if df.empty:
+        return []
+    df = df.assign(
+        date=pd.to_datetime(df["date"], errors="coerce", utc=True, format="ISO8601")
+    )
+    df = df.dropna(subset=["date"])
+    months = df["date"].dt.strftime("%Y-%m")
+    keys = district_keys(df["district"].astype(str))
+    written = []
+    for (month, key), part in df.groupby([months, keys], sort=False):
+        partition = root / f"month={month}" / f"district={key}"
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        part.to_parquet(path, index=False)
+        written.append(path)
+        if len(_parts(partition)) > COMPACT_AFTER:
+            compact_partition(partition)
+    return written
+
+
+def compact_partition(partition: Path) -> Path | None:
+    """Merge the parts of one partition, keeping the newest row per key."""
+    parts = _parts(partition)
+    if len(parts) < 2:
+        return parts[0] if parts else None
+    df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    df = df.drop_duplicates(subset=KEY, keep="last").sort_values(KEY)
+    # The merged file keeps the newest merged part's timestamp, so parts
+    # appended meanwhile still sort after it and win during de-duplication.
+    target = parts[-1].with_name(parts[-1].stem + "-compacted.parquet")
+    tmp = partition / f".{target.name}.tmp"
+    df.to_parquet(tmp, index=False)
+    tmp.replace(target)
+    for p in parts:
+        p.unlink()
+    logger.info("parquet_compacted", partition=str(partition), parts=len(parts), rows=len(df))
+    return target
+
+
+def compact_parquet(root: Path, month: str | None = None) -> int:
+    """Compact every partition (or those of one ``YYYY-MM`` month)."""
+    pattern = f"month={month}/district=*" if month else "month=*/district=*"
+    compacted = 0
+    for partition in sorted(root.glob(pattern)):
+        if len(_parts(partition)) > 1:
+            compact_partition(partition)
+            compacted += 1
+    return compacted
+
+
+def read_parquet_range(
+    root: Path,
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Read archived rows, opening only partitions that can match."""
+    lo = _timestamp(start) if start else None
+    hi = _timestamp(end) if end else None
+    wanted = {district_key(d) for d in districts} if districts else None
+    files = []
+    for month_dir in sorted(root.glob("month=*")):
+        month = month_dir.name.split("=", 1)[1]
+        if lo is not None and month < f"{lo:%Y-%m}":
+            continue
+        if hi is not None and month > f"{hi:%Y-%m}":
+            continue
+        for partition in sorted(month_dir.glob("district=*")):
+            if wanted is not None and partition.name.split("=", 1)[1] not in wanted:
+                continue
+            files.extend(_parts(partition))
+    if not files:
+        return pd.DataFrame(columns=KEY)
+    df = pd.concat([pd.read_parquet(p) for p in files], ignore_index=True)
+    df = df.drop_duplicates(subset=KEY, keep="last")
+    if lo is not None:
+        df = df[df["date"] >= lo]
+    if hi is not None:
+        df = df[df["date"] <= hi]
+    return df.sort_values(["date", "district"]).reset_index(drop=True)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parquet archive maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    compact = sub.add_parser("compact", help="Merge part files and drop duplicates")
+    compact.add_argument("--root", required=True, help="Archive directory")
+    compact.add_argument("--month", help="Only compact this YYYY-MM month")
+    args = parser.parse_args()
+
+    if args.cmd == "compact":
+        count = compact_parquet(Path(args.root), args.month)
+        print(f"compacted {count} partitions")
+
+
+if __name__ == "__main__":
+    main()
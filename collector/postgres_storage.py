@@ -2,9 +2,19 @@ from __future__ import annotations
 
 """PostgreSQL storage utilities using SQLAlchemy."""
 
-from typing import Iterable
-from sqlalchemy import create_engine, text
+import io
+import time
+from typing import Iterable, Iterator
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 import pandas as pd
+import structlog
+
+from .engines import begin
+from .processor import DISTRICT_FOLD_FROM, DISTRICT_FOLD_TO, district_key, district_keys
+from .sqlite_common import CONFLICT_POLICIES, UpsertResult
+
+logger = structlog.get_logger(__name__)
 
 TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS weather (
@@ -13,36 +23,170 @@ CREATE TABLE IF NOT EXISTS weather (
     temp REAL,
     humidity REAL,
     wind_speed REAL,
+    district_key TEXT,
     PRIMARY KEY (district, date)
 )
 """
 
+# Same key as collector.processor.district_key, computed by the database.
+DISTRICT_KEY_SQL = "translate(trim(district), :fold_from, :fold_to)"
+DISTRICT_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_weather_district_key "
+    "ON weather (district_key, date DESC)"
+)
+
+# Seconds a hot standby is behind its primary; 0 on a primary or a standby
+# that has replayed everything it received.  Read-only, no schema needed.
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE coalesce(
+        extract(epoch FROM now() - pg_last_xact_replay_timestamp())::float8,
+        'Infinity'::float8
+    )
+END
+"""
+
+COPY_CHUNK_SIZE = 50_000
+STREAM_CHUNK_SIZE = 50_000
+COPY_COLUMNS = ["district", "date", "temp", "humidity", "wind_speed", "district_key"]
+_COLUMN_LIST = ", ".join(COPY_COLUMNS)
+
+STAGE_SQL = (
+    "CREATE TEMP TABLE IF NOT EXISTS weather_stage "
+    "(LIKE weather INCLUDING DEFAULTS) ON COMMIT DROP"
+)
+COPY_SQL = f"COPY weather_stage ({_COLUMN_LIST}) FROM STDIN WITH (FORMAT csv)"
+CONFLICT_SQL = {
+    "replace": (
+        " ON CONFLICT (district, date) DO UPDATE SET temp = EXCLUDED.temp, "
+        "humidity = EXCLUDED.humidity, wind_speed = EXCLUDED.wind_speed, "
+        "district_key = EXCLUDED.district_key "
+        "WHERE (weather.temp, weather.humidity, weather.wind_speed, weather.district_key) "
+        "IS DISTINCT FROM "
+        "(EXCLUDED.temp, EXCLUDED.humidity, EXCLUDED.wind_speed, EXCLUDED.district_key)"
+    ),
+    "ignore": " ON CONFLICT (district, date) DO NOTHING",
+    "error": "",
+}
+
+
+def merge_sql(on_conflict: str = "replace") -> str:
+    """Return the statement moving staged rows into ``weather``.
+
+    It returns one row of (inserted, updated) counts; ``xmax = 0`` marks
+    rows that did not exist before.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of {CONFLICT_POLICIES}")
+    return (
+        f"WITH merged AS (INSERT INTO weather ({_COLUMN_LIST}) "
+        f"SELECT {_COLUMN_LIST} FROM weather_stage{CONFLICT_SQL[on_conflict]} "
+        "RETURNING (xmax = 0) AS inserted) "
+        "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) "
+        "FROM merged"
+    )
+
+
+def _copy_frame(conn: Connection, df: pd.DataFrame) -> None:
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S%z")
+    buf.seek(0)
+    with conn.connection.dbapi_connection.cursor() as cur:
+        cur.copy_expert(COPY_SQL, buf)
+
+
+def copy_upsert(
+    conn: Connection,
+    df: pd.DataFrame,
+    on_conflict: str = "replace",
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> UpsertResult:
+    """Bulk load *df* through ``COPY`` into a staging table and merge it.
+
+    Runs inside the caller's transaction; rows sharing a ``(district, date)``
+    keep the last occurrence, as with the SQLite upsert.
+    """
+    merge = text(merge_sql(on_conflict))
+    frame = df.assign(district_key=district_keys(df["district"]))[COPY_COLUMNS]
+    frame = frame.drop_duplicates(subset=["district", "date"], keep="last")
+    result = UpsertResult()
+    conn.execute(text(STAGE_SQL))
+    for start in range(0, len(frame), chunk_size):
+        _copy_frame(conn, frame.iloc[start:start + chunk_size])
+        inserted, updated = conn.execute(merge).one()
+        result.inserted += inserted
+        result.updated += updated
+        conn.execute(text("TRUNCATE weather_stage"))
+    return result
+
+
+def bulk_load(
+    df: pd.DataFrame,
+    db_url: str,
+    on_conflict: str = "replace",
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> UpsertResult:
+    """Upsert *df* with :func:`copy_upsert` in one transaction and log throughput."""
+    if df.empty:
+        return UpsertResult()
+    started = time.perf_counter()
+    with begin(db_url) as conn:
+        result = copy_upsert(conn, df, on_conflict, chunk_size)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "bulk_load",
+        rows=len(df),
+        inserted=result.inserted,
+        updated=result.updated,
+        seconds=round(elapsed, 3),
+        rows_per_sec=round(len(df) / elapsed) if elapsed else None,
+    )
+    return result
+
+
+def migrate_district_key(conn: Connection) -> None:
+    """Add and backfill ``district_key`` on tables created before it existed."""
+    exists = conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'weather' AND column_name = 'district_key'"
+        )
+    ).first()
+    if not exists:
+        conn.execute(text("ALTER TABLE weather ADD COLUMN district_key TEXT"))
+        conn.execute(
+            text(f"UPDATE weather SET district_key = {DISTRICT_KEY_SQL}"),
+            {"fold_from": DISTRICT_FOLD_FROM, "fold_to": DISTRICT_FOLD_TO},
+        )
+    conn.execute(text(DISTRICT_INDEX_SQL))
+
 
 def init_pg(db_url: str) -> None:
     """Ensure the weather table exists."""
-    engine = create_engine(db_url)
-    with engine.begin() as conn:
+    with begin(db_url) as conn:
         conn.execute(text(TABLE_SQL))
+        migrate_district_key(conn)
 
 
-def append_to_pg(df: pd.DataFrame, db_url: str) -> None:
-    """Append dataframe to PostgreSQL."""
-    if df.empty:
-        return
-    engine = create_engine(db_url)
-    with engine.begin() as conn:
-        df.to_sql("weather", conn, if_exists="append", index=False)
+def append_to_pg(
+    df: pd.DataFrame,
+    db_url: str,
+    on_conflict: str = "replace",
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> UpsertResult:
+    """Upsert dataframe rows into PostgreSQL."""
+    return bulk_load(df, db_url, on_conflict, chunk_size)
 
 
-def query_range_pg(
-    db_url: str,
+def range_sql(
     start: str | None = None,
     end: str | None = None,
     districts: Iterable[str] | None = None,
     limit: int | None = None,
-) -> pd.DataFrame:
-    """Query data from PostgreSQL within an optional time range and district list."""
-    engine = create_engine(db_url)
+) -> tuple[str, dict]:
+    """Build the date-ordered range query shared by the PG/Timescale readers."""
     where = []
     params = {}
     if start:
@@ -52,8 +196,8 @@ def query_range_pg(
         where.append("date <= :end")
         params["end"] = end
     if districts:
-        where.append("lower(district) IN :dlist")
-        params["dlist"] = tuple(d.lower() for d in districts)
+        where.append("district_key IN :dlist")
+        params["dlist"] = tuple(district_key(d) for d in districts)
     sql = "SELECT district, date, temp, humidity, wind_speed FROM weather"
     if where:
         sql += " WHERE " + " AND ".join(where)
@@ -61,6 +205,42 @@ def query_range_pg(
     if limit:
         sql += " LIMIT :limit"
         params["limit"] = limit
-    with engine.begin() as conn:
+    return sql, params
+
+
+def query_range_pg(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+    limit: int | None = None,
+) -> pd.DataFrame:
+    """Query data from PostgreSQL within an optional time range and district list."""
+    sql, params = range_sql(start, end, districts, limit)
+    with begin(db_url) as conn:
         df = pd.read_sql(text(sql), conn, params=params)
     return df
+
+
+def iter_range_pg(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    arrow: bool = False,
+) -> Iterator:
+    """Yield the rows of :func:`query_range_pg` in chunks of *chunk_size*.
+
+    Rows are read through a server-side cursor, so memory stays flat however
+    long the history is. With *arrow* each chunk is a
+    :class:`pyarrow.RecordBatch` instead of a DataFrame. The connection is
+    held until the iterator is exhausted or closed.
+    """
+    if arrow:
+        import pyarrow as pa
+    sql, params = range_sql(start, end, districts)
+    with begin(db_url) as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_size)
+        for df in pd.read_sql(text(sql), conn, params=params, chunksize=chunk_size):
+            yield pa.RecordBatch.from_pandas(df, preserve_index=False) if arrow else df
@@ -1,3 +1,5 @@
+import string
+
 import pandas as pd
 
 COLUMN_MAP = {
@@ -21,6 +23,24 @@ EXPECTED = [
 ]
 
 
+# Turkish letters folded to ASCII before lower-casing so that "Muğla",
+# "MUĞLA" and "mugla" share one key.  Only ASCII is lower-cased, which
+# matches SQLite's LOWER() and lets the databases compute the same key.
+DISTRICT_FOLD_FROM = "ÇĞİÖŞÜÂÎÛçğıöşüâîû" + string.ascii_uppercase
+DISTRICT_FOLD_TO = "cgiosuaiucgiosuaiu" + string.ascii_lowercase
+_DISTRICT_FOLD = str.maketrans(DISTRICT_FOLD_FROM, DISTRICT_FOLD_TO)
+
+
+def district_key(name: str) -> str:
+    """Return the case- and diacritic-insensitive lookup key for a district."""
+    return name.strip().translate(_DISTRICT_FOLD)
+
+
+def district_keys(districts: pd.Series) -> pd.Series:
+    """Vectorised :func:`district_key` that leaves missing values as-is."""
+    return districts.str.strip().str.translate(_DISTRICT_FOLD)
+
+
 def normalize(df: pd.DataFrame) -> pd.DataFrame:
     """Rename columns and ensure expected structure."""
     df = df.rename(columns=COLUMN_MAP)
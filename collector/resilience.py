@@ -0,0 +1,195 @@
+"""Retries with backoff and per-source circuit breakers for upstream fetches."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import structlog
+
+from .config import BreakerConfig, RetryPolicy, load_breaker_config
+from .metrics import CIRCUIT_BREAKER_STATE, FETCH_RETRIES
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+logger = structlog.get_logger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a source whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Stops calling a source after ``failures`` consecutive failures.
+
+    Once ``cooldown`` seconds have passed a single trial call is let
+    through; its success closes the circuit, its failure re-opens it.
+    """
+
+    def __init__(self, source: str, config: BreakerConfig | None = None) -> None:
+        config = config or load_breaker_config()
+        self.source = source
+        self.failures = config.failures
+        self.cooldown = config.cooldown
+        self.state = CLOSED
+        self._count = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        CIRCUIT_BREAKER_STATE.labels(source).set(CLOSED)
+
+    def _set(self, state: int) -> None:
+        if state != self.state:
+            logger.info("circuit_state", source=self.source, state=state)
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(self.source).set(state)
+
+    def before(self) -> None:
+        """Raise :class:`CircuitOpenError` unless a call may go ahead."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._set(HALF_OPEN)
+                return
+            raise CircuitOpenError(f"circuit open for {self.source}")
+
+    def success(self) -> None:
+        with self._lock:
+            self._count = 0
+            self._set(CLOSED)
+
+    def abort(self) -> None:
+        """End a call that failed for reasons unrelated to the source.
+
+        Only a half-open trial is affected: it re-opens the circuit so a
+        later call can try again.  Nothing counts toward ``failures``.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._opened_at = time.monotonic()
+                self._set(OPEN)
+
+    def failure(self) -> None:
+        with self._lock:
+            self._count += 1
+            if self.state == HALF_OPEN or self._count >= self.failures:
+                self._opened_at = time.monotonic()
+                self._set(OPEN)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(source: str) -> CircuitBreaker:
+    """Return the process-wide breaker for *source*."""
+    with _lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(source)
+        return _breakers[source]
+
+
+def reset_breakers() -> None:
+    with _lock:
+        _breakers.clear()
+
+
+def _retryable(exc: BaseException, policy: RetryPolicy) -> bool:
+    # requests and httpx both attach the response to HTTP status errors
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return not isinstance(status, int) or status in policy.retry_statuses
+
+
+def _next_delay(
+    exc: BaseException, attempt: int, policy: RetryPolicy, started: float, source: str
+) -> float | None:
+    """Record a failed attempt and return how long to wait, or ``None`` to give up."""
+    retryable = _retryable(exc, policy)
+    breaker = get_breaker(source)
+    # a non-retryable status still means the source answered
+    if retryable:
+        breaker.failure()
+    else:
+        breaker.success()
+    delay = policy.delay(attempt)
+    if (
+        not retryable
+        or breaker.state == OPEN
+        or attempt + 1 >= policy.attempts
+        or time.monotonic() - started + delay > policy.deadline
+    ):
+        logger.error("fetch_failed", source=source, attempts=attempt + 1, error=str(exc))
+        return None
+    FETCH_RETRIES.labels(source).inc()
+    logger.warning(
+        "fetch_retry",
+        source=source,
+        attempt=attempt + 1,
+        attempts=policy.attempts,
+        delay=round(delay, 2),
+        error=str(exc),
+    )
+    return delay
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    source: str,
+    policy: RetryPolicy,
+    retry_on: tuple[type[BaseException], ...] = (Exception,),
+) -> T:
+    """Call *fn* under *source*'s breaker, retrying failures per *policy*."""
+    breaker = get_breaker(source)
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        breaker.before()
+        try:
+            result = fn()
+        except retry_on as exc:
+            delay = _next_delay(exc, attempt, policy, started, source)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+        except BaseException:
+            # anything else, cancellation included, says nothing about the
+            # source; it only must not leave a half-open trial hanging
+            breaker.abort()
+            raise
+        else:
+            breaker.success()
+            return result
+
+
+async def call_with_retry_async(
+    fn: Callable[[], Awaitable[T]],
+    source: str,
+    policy: RetryPolicy,
+    retry_on: tuple[type[BaseException], ...] = (Exception,),
+) -> T:
+    """Async version of :func:`call_with_retry` that never blocks the loop."""
+    breaker = get_breaker(source)
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        breaker.before()
+        try:
+            result = await fn()
+        except retry_on as exc:
+            delay = _next_delay(exc, attempt, policy, started, source)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+        except BaseException:
+            # anything else, cancellation included, says nothing about the
+            # source; it only must not leave a half-open trial hanging
+            breaker.abort()
+            raise
+        else:
+            breaker.success()
+            return result
@@ -0,0 +1,189 @@
+"""Route storage reads to replicas and writes to the primary."""
+from __future__ import annotations
+
+import inspect
+import itertools
+import math
+import time
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Iterator
+
+import structlog
+
+from .config import RouterConfig, load_router_config
+from .metrics import STORAGE_CALL_SECONDS, STORAGE_REPLICA_HEALTHY, STORAGE_REPLICA_LAG
+
+logger = structlog.get_logger(__name__)
+
+READS = {"get_statistics", "hourly_average", "daily_average"}
+READ_PREFIXES = ("query_", "iter_")
+
+
+def is_read(name: str) -> bool:
+    """Return whether backend function *name* only reads data."""
+    return name in READS or name.startswith(READ_PREFIXES)
+
+
+def _label(target: Any) -> str:
+    # never put credentials of a database URL into a metric label
+    text = str(target)
+    return text.rsplit("@", 1)[-1] if "://" in text else text
+
+
+@dataclass
+class Replica:
+    target: Any
+    healthy: bool = False
+    lag: float = math.inf
+
+
+class StorageRouter:
+    """Drop-in stand-in for a storage backend module with read replicas.
+
+    Every backend function is called with the primary target as its first
+    argument, exactly as on the module.  Reads are redirected round-robin
+    to replicas that passed their last health check and lag the primary by
+    at most ``max_lag`` seconds; everything else, and every read when no
+    replica qualifies, goes to the primary.  Replicas are re-checked at
+    most every ``check_interval`` seconds, lazily on the next read.
+    """
+
+    def __init__(
+        self,
+        backend: ModuleType,
+        replicas: list[Any],
+        config: RouterConfig | None = None,
+    ) -> None:
+        config = config or load_router_config()
+        self.backend = backend
+        self.replicas = [Replica(r) for r in replicas]
+        self.max_lag = config.max_lag
+        self.check_interval = config.check_interval
+        self._checked_at = -math.inf
+        self._turn = itertools.count()
+
+    @classmethod
+    def from_env(cls, backend: ModuleType, path_targets: bool = False):
+        """Wrap *backend* if ``DB_REPLICAS`` is set, else return it unchanged."""
+        config = load_router_config()
+        if not config.replicas:
+            return backend
+        replicas = [Path(r) for r in config.replicas] if path_targets else config.replicas
+        return cls(backend, replicas, config)
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def _record(self, replica: Replica, lag: float = math.inf, error=None) -> None:
+        label = _label(replica.target)
+        if error is not None:
+            replica.healthy, replica.lag = False, math.inf
+            logger.warning("replica_unhealthy", replica=label, error=str(error))
+        else:
+            replica.healthy, replica.lag = True, lag
+            STORAGE_REPLICA_LAG.labels(label).set(lag)
+        STORAGE_REPLICA_HEALTHY.labels(label).set(int(replica.healthy))
+
+    def check(self, primary: Any) -> None:
+        """Probe every replica with the backend's read-only ``replica_lag``."""
+        self._checked_at = time.monotonic()
+        for replica in self.replicas:
+            try:
+                lag = self.backend.replica_lag(primary, replica.target)
+            except Exception as exc:
+                self._record(replica, error=exc)
+            else:
+                self._record(replica, lag)
+
+    async def check_async(self, primary: Any) -> None:
+        """Async version of :meth:`check` for asyncio backends."""
+        self._checked_at = time.monotonic()
+        for replica in self.replicas:
+            try:
+                lag = await self.backend.replica_lag(primary, replica.target)
+            except Exception as exc:
+                self._record(replica, error=exc)
+            else:
+                self._record(replica, lag)
+
+    def route(self, primary: Any) -> tuple[Any, str]:
+        """Return the target for a read and whether it is a replica."""
+        usable = [r for r in self.replicas if r.healthy and r.lag <= self.max_lag]
+        if not usable:
+            return primary, "primary"
+        return usable[next(self._turn) % len(usable)].target, "replica"
+
+    def __getattr__(self, name: str):
+        fn = getattr(self.backend, name)
+        if not callable(fn):
+            return fn
+        read = is_read(name)
+
+        if inspect.isasyncgenfunction(fn):
+            @wraps(fn)
+            async def agen(primary, *args, **kwargs):
+                if self._due():
+                    await self.check_async(primary)
+                target, route = self.route(primary)
+                started = time.perf_counter()
+                try:
+                    async for item in fn(target, *args, **kwargs):
+                        yield item
+                finally:
+                    _observe(name, route, started)
+            return agen
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def coro(*args, **kwargs):
+                route = "primary"
+                if read and self.replicas:
+                    primary, *rest = args
+                    if self._due():
+                        await self.check_async(primary)
+                    target, route = self.route(primary)
+                    args = (target, *rest)
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _observe(name, route, started)
+            return coro
+
+        # writers take the DataFrame first, so only reads have their first
+        # argument swapped for a replica
+        @wraps(fn)
+        def call(*args, **kwargs):
+            route = "primary"
+            if read and self.replicas:
+                primary, *rest = args
+                if self._due():
+                    self.check(primary)
+                target, route = self.route(primary)
+                args = (target, *rest)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                _observe(name, route, started)
+                raise
+            if inspect.isgenerator(result):
+                return _timed(result, name, route, started)
+            _observe(name, route, started)
+            return result
+        return call
+
+
+def _observe(name: str, route: str, started: float) -> None:
+    STORAGE_CALL_SECONDS.labels(name, route).observe(time.perf_counter() - started)
+
+
+def _timed(items: Iterator, name: str, route: str, started: float) -> Iterator:
+    # streaming reads are timed until the caller is done with them
+    try:
+        yield from items
+    finally:
+        _observe(name, route, started)
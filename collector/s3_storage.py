@@ -1,14 +1,68 @@
 """S3 backup utilities."""
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+import structlog
+
+from .config import S3Config, load_s3_config
+
+MANIFEST = ".s3sync.json"
+HASH_KEY = "md5"
+# most keys a single DeleteObjects request accepts
+DELETE_BATCH = 1000
+
+logger = structlog.get_logger(__name__)
+
+_client = None
+_config: S3Config | None = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide S3 client, creating it on first use.
+
+    ``S3_ENDPOINT_URL`` points the client at a local stand-in such as MinIO.
+    """
+    global _client, _config
+    with _lock:
+        if _client is None:
+            _config = load_s3_config()
+            kwargs = {"endpoint_url": _config.endpoint_url} if _config.endpoint_url else {}
+            _client = boto3.client("s3", **kwargs)
+        return _client
+
+
+def reset_client() -> None:
+    """Forget the shared client, e.g. after changing S3 settings."""
+    global _client, _config
+    with _lock:
+        _client = _config = None
+
+
+def _transfer_config() -> TransferConfig:
+    config = _config or load_s3_config()
+    return TransferConfig(
+        multipart_threshold=config.multipart_threshold,
+        multipart_chunksize=config.multipart_chunksize,
+        max_concurrency=config.max_concurrency,
+        use_threads=True,
+    )
 
 
 def upload_file(path: Path, bucket: str, key: Optional[str] = None) -> None:
     """Upload a file to an S3 bucket.
 
+    Files above ``S3_MULTIPART_THRESHOLD`` are sent as parallel multipart
+    uploads.
+
     Parameters
     ----------
     path: Path
@@ -21,5 +75,116 @@ def upload_file(path: Path, bucket: str, key: Optional[str] = None) -> None:
     key = key or path.name
     if not path.exists():
         raise FileNotFoundError(path)
-    s3 = boto3.client("s3")
-    s3.upload_file(str(path), bucket, key)
+    s3 = get_client()
+    s3.upload_file(str(path), bucket, key, Config=_transfer_config())
+
+
+def file_md5(path: Path) -> str:
+    """Return the hex MD5 of *path*, read in 1 MiB blocks."""
+    digest = hashlib.md5()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remote_md5(bucket: str, key: str) -> str | None:
+    try:
+        head = get_client().head_object(Bucket=bucket, Key=key)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    # multipart ETags are not an MD5 of the content, so prefer our metadata
+    return head.get("Metadata", {}).get(HASH_KEY) or head.get("ETag", "").strip('"')
+
+
+def sync_file(path: Path, bucket: str, key: Optional[str] = None, md5: str | None = None) -> bool:
+    """Upload *path* unless the object already holds the same content.
+
+    Returns ``True`` if the file was uploaded.
+    """
+    key = key or path.name
+    md5 = md5 or file_md5(path)
+    if _remote_md5(bucket, key) == md5:
+        return False
+    get_client().upload_file(
+        str(path),
+        bucket,
+        key,
+        ExtraArgs={"Metadata": {HASH_KEY: md5}},
+        Config=_transfer_config(),
+    )
+    return True
+
+
+def _delete_keys(bucket: str, keys: list[str]) -> None:
+    client = get_client()
+    for i in range(0, len(keys), DELETE_BATCH):
+        batch = keys[i:i + DELETE_BATCH]
+        client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+
+
+def sync_dir(root: Path, bucket: str, prefix: str = "", delete: bool = False) -> list[str]:
+    """Upload the files under *root* that changed since the last sync.
+
+    A manifest in *root* remembers size, mtime and MD5 of every file that
+    was synced, so untouched partitions cost neither a hash nor a request.
+    Changed files are compared with the remote object before uploading and
+    are sent in parallel. With *delete*, objects synced earlier whose file
+    is gone are removed from the bucket and the manifest. Returns the
+    uploaded keys.
+    """
+    manifest_path = root / MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+    pending = []
+    local = set()
+    for path in sorted(root.rglob("*")):
+        rel = path.relative_to(root).as_posix()
+        if not path.is_file() or any(part.startswith(".") for part in rel.split("/")):
+            continue
+        key = f"{prefix.rstrip('/')}/{rel}" if prefix else rel
+        local.add(f"{bucket}/{key}")
+        stat = path.stat()
+        entry = manifest.get(f"{bucket}/{key}")
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            continue
+        pending.append((path, key, stat))
+
+    def sync(item):
+        path, key, stat = item
+        md5 = file_md5(path)
+        return key, stat, md5, sync_file(path, bucket, key, md5)
+
+    uploaded = []
+    config = _config or load_s3_config()
+    with ThreadPoolExecutor(max_workers=max(config.max_concurrency, 1)) as pool:
+        for key, stat, md5, sent in pool.map(sync, pending):
+            manifest[f"{bucket}/{key}"] = [stat.st_size, stat.st_mtime_ns, md5]
+            if sent:
+                uploaded.append(key)
+
+    stale = []
+    if delete:
+        scope = f"{bucket}/{prefix.rstrip('/')}/" if prefix else f"{bucket}/"
+        stale = sorted(k for k in manifest if k.startswith(scope) and k not in local)
+        _delete_keys(bucket, [k[len(bucket) + 1:] for k in stale])
+        for name in stale:
+            del manifest[name]
+    if pending or stale:
+        manifest_path.write_text(json.dumps(manifest, indent=0, sort_keys=True))
+    logger.info(
+        "s3_sync",
+        bucket=bucket,
+        prefix=prefix,
+        checked=len(pending),
+        uploaded=len(uploaded),
+        deleted=len(stale),
+    )
+    return uploaded
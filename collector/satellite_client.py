@@ -1,9 +1,19 @@
 import os
 import io
+from pathlib import Path
+from typing import Iterator
+
 import structlog
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
 from requests.exceptions import RequestException
+from urllib3.exceptions import HTTPError as TransferError
+
+from .config import RetryPolicy, load_retry_policy
+from .http_cache import fetch_frame
+from .resilience import call_with_retry
 
 MODIS_URL = os.getenv(
     "MODIS_URL",
@@ -22,19 +32,34 @@ EFFIS_URL = os.getenv(
     "https://effis.example.com/api/fire.csv?country=Turkey",
 )
 
+CHUNK_SIZE = int(os.getenv("SATELLITE_CHUNK_SIZE", "50000"))
+# the FIRMS/EFFIS columns we use; VIIRS reports brightness as bright_ti4
+FIRE_DTYPES = {
+    "latitude": "float64",
+    "longitude": "float64",
+    "brightness": "float64",
+    "bright_ti4": "float64",
+    "acq_date": "string",
+    "acq_time": "string",
+    "confidence": "string",
+}
+
 logger = structlog.get_logger(__name__)
 
 
-def _fetch_csv(url: str, source: str) -> pd.DataFrame:
-    """Fetch CSV data from a satellite source."""
+def _fetch_csv(url: str, source: str, policy: RetryPolicy | None = None) -> pd.DataFrame:
+    """Fetch CSV data from a satellite source, retrying under its circuit breaker."""
     logger.info("fetching_satellite", source=source, url=url)
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        return call_with_retry(
+            lambda: fetch_frame(url, source, lambda r: pd.read_csv(io.StringIO(r.text))),
+            source,
+            policy or load_retry_policy(),
+            retry_on=(RequestException,),
+        )
     except RequestException as exc:
         logger.error("satellite_failed", source=source, error=str(exc))
         raise
-    return pd.read_csv(io.StringIO(response.text))
 
 
 def fetch_modis_data(url: str = MODIS_URL) -> pd.DataFrame:
@@ -55,3 +80,108 @@ def fetch_sentinel2_data(url: str = SENTINEL_URL) -> pd.DataFrame:
 def fetch_effis_data(url: str = EFFIS_URL) -> pd.DataFrame:
     """Fetch EFFIS fire data."""
     return _fetch_csv(url, "effis")
+
+
+def iter_fire_csv(url: str, source: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Stream a fire CSV in typed chunks of at most *chunk_size* rows.
+
+    The body is parsed as it is read and only the columns in
+    :data:`FIRE_DTYPES` are kept, so memory is bounded by the chunk size
+    rather than the payload.  This is a single request: it bypasses the
+    response cache, which stores whole frames, and is not retried, since
+    chunks already yielded cannot be taken back.  Use
+    :func:`stream_to_parquet` for a download that retries.
+    """
+    logger.info("streaming_satellite", source=source, url=url)
+    try:
+        response = requests.get(url, timeout=10, stream=True)
+        response.raise_for_status()
+    except RequestException as exc:
+        logger.error("satellite_failed", source=source, error=str(exc))
+        raise
+    with response:
+        response.raw.decode_content = True
+        yield from pd.read_csv(
+            response.raw,
+            usecols=lambda c: c in FIRE_DTYPES,
+            dtype=FIRE_DTYPES,
+            chunksize=chunk_size,
+        )
+
+
+def _write_parquet(url: str, source: str, tmp: Path, chunk_size: int) -> int:
+    writer = None
+    rows = 0
+    try:
+        for chunk in iter_fire_csv(url, source, chunk_size):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+def stream_to_parquet(
+    url: str,
+    source: str,
+    path: Path,
+    chunk_size: int = CHUNK_SIZE,
+    policy: RetryPolicy | None = None,
+) -> int:
+    """Stream a fire CSV into the Parquet file *path*, one row group per chunk.
+
+    The file is written next to *path* and moved into place once complete.
+    A download that fails, including one cut off halfway through, is
+    started over under *source*'s retry policy and circuit breaker.  The
+    response cache is not used, so every call downloads the full body.
+    Returns the number of rows written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    rows = call_with_retry(
+        lambda: _write_parquet(url, source, tmp, chunk_size),
+        source,
+        policy or load_retry_policy(),
+        retry_on=(RequestException, TransferError),
+    )
+    if not tmp.exists():
+        return 0
+    os.replace(tmp, path)
+    logger.info("satellite_archived", source=source, path=str(path), rows=rows)
+    return rows
+
+
+SOURCES = {
+    "modis": MODIS_URL,
+    "viirs": VIIRS_URL,
+    "sentinel2": SENTINEL_URL,
+    "effis": EFFIS_URL,
+}
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive satellite fire data")
+    parser.add_argument("source", choices=sorted(SOURCES))
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument("--url", help="Override the source URL")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    rows = stream_to_parquet(
+        args.url or SOURCES[args.source], args.source, Path(args.output), args.chunk_size
+    )
+    print(f"wrote {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,559 @@
+"""Schema and SQL shared by the sync and async SQLite backends."""
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+import json
+import math
+import sqlite3
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from .config import SQLiteConfig
+from .processor import DISTRICT_FOLD_FROM, DISTRICT_FOLD_TO, district_key, district_keys
+
+# ``district_key`` is added to this table by migration 3.
+TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS weather (
+    district TEXT,
+    date TEXT,
+    temp REAL,
+    humidity REAL,
+    wind_speed REAL,
+    PRIMARY KEY (district, date)
+)
+"""
+
+INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_weather_date_district ON weather(date, district)"
+)
+DISTRICT_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_weather_district_key ON weather(district_key, date)"
+)
+
+COLUMNS = ["district", "date", "temp", "humidity", "wind_speed"]
+VALUE_COLUMNS = ["temp", "humidity", "wind_speed"]
+
+CHUNK_SIZE = 10_000
+PAGE_SIZE = 1_000
+CONFLICT_POLICIES = ("replace", "ignore", "error")
+
+# Every statement binds the same
+# (district, date, temp, humidity, wind_speed, district_key) tuple so one
+# chunk can be passed to both the insert and the update.
+INSERT_SQL = (
+    "INSERT INTO weather (district, date, temp, humidity, wind_speed, district_key) "
+    "VALUES (?1, ?2, ?3, ?4, ?5, ?6)"
+)
+INSERT_OR_IGNORE_SQL = INSERT_SQL.replace("INSERT", "INSERT OR IGNORE", 1)
+UPDATE_SQL = (
+    "UPDATE weather SET temp = ?3, humidity = ?4, wind_speed = ?5, district_key = ?6 "
+    "WHERE district = ?1 AND date = ?2 "
+    "AND (temp IS NOT ?3 OR humidity IS NOT ?4 OR wind_speed IS NOT ?5 "
+    "OR district_key IS NOT ?6)"
+)
+
+
+def district_key_sql(column: str) -> str:
+    """SQL expression computing :func:`~collector.processor.district_key`."""
+    expr = f"trim({column})"
+    for src, dst in zip(DISTRICT_FOLD_FROM, DISTRICT_FOLD_TO):
+        if not src.isascii():
+            expr = f"replace({expr}, '{src}', '{dst}')"
+    return f"lower({expr})"
+
+
+@dataclass
+class UpsertResult:
+    """Number of rows written by a bulk upsert."""
+
+    inserted: int = 0
+    updated: int = 0
+
+
+def upsert_statements(on_conflict: str = "replace") -> tuple[str, str | None]:
+    """Return the insert and optional update statement for a conflict policy.
+
+    ``replace`` overwrites existing rows whose values changed, ``ignore``
+    keeps the stored row and ``error`` raises :class:`sqlite3.IntegrityError`
+    so the whole batch is rolled back.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of {CONFLICT_POLICIES}")
+    if on_conflict == "error":
+        return INSERT_SQL, None
+    update_sql = UPDATE_SQL if on_conflict == "replace" else None
+    return INSERT_OR_IGNORE_SQL, update_sql
+
+
+def _date_text(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def iter_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """Yield weather rows as plain tuples ready to bind to SQLite."""
+    frame = df[COLUMNS].copy()
+    frame["date"] = frame["date"].map(_date_text)
+    frame["district_key"] = district_keys(frame["district"].astype("string"))
+    for col in VALUE_COLUMNS:
+        frame[col] = pd.to_numeric(frame[col], errors="coerce").astype(float)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+def iter_chunks(df: pd.DataFrame, chunk_size: int = CHUNK_SIZE) -> Iterator[list[tuple]]:
+    """Split dataframe rows into lists of at most *chunk_size* tuples."""
+    rows = iter_rows(df)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def upsert(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    on_conflict: str = "replace",
+    chunk_size: int = CHUNK_SIZE,
+) -> UpsertResult:
+    """Bulk upsert *df* on an open connection; the caller owns the transaction."""
+    insert_sql, update_sql = upsert_statements(on_conflict)
+    result = UpsertResult()
+    for chunk in iter_chunks(df, chunk_size):
+        result.inserted += conn.executemany(insert_sql, chunk).rowcount
+        if update_sql:
+            result.updated += conn.executemany(update_sql, chunk).rowcount
+    return result
+
+
+def range_query(
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    limit: int | None = None,
+    after: tuple[str, str] | None = None,
+) -> tuple[str, list]:
+    """Build the date range query, ordered by ``(date, district)``.
+
+    *after* is the ``(date, district)`` of the last row already returned;
+    rows are resumed from there so every page is an index range scan.
+    """
+    where = []
+    params: list = []
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+    if districts:
+        placeholders = ",".join("?" for _ in districts)
+        where.append(f"district_key IN ({placeholders})")
+        params.extend(district_key(d) for d in districts)
+    if after:
+        where.append("(date, district) > (?, ?)")
+        params.extend(after)
+    sql = "SELECT district, date, temp, humidity, wind_speed FROM weather"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY date, district"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def encode_cursor(date: str, district: str) -> str:
+    """Return an opaque page token for the row at ``(date, district)``."""
+    raw = json.dumps([date, district]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(token: str) -> tuple[str, str]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` if malformed."""
+    try:
+        date, district = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    return str(date), str(district)
+
+
+def next_cursor(page: pd.DataFrame, page_size: int) -> str | None:
+    """Token for the page after *page*, or ``None`` if it was the last one."""
+    if len(page) < page_size:
+        return None
+    last = page.iloc[-1]
+    return encode_cursor(last["date"], last["district"])
+
+
+LATEST_SQL = "SELECT MAX(date) FROM weather"
+
+
+def read_only_uri(db_path) -> str:
+    """``sqlite3`` URI that opens *db_path* read-only and never creates it."""
+    return f"{Path(db_path).resolve().as_uri()}?mode=ro"
+
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def date_lag(primary_latest, replica_latest) -> float:
+    """Seconds of data the replica is missing, from both ``MAX(date)`` values."""
+    if primary_latest is None:
+        return 0.0
+    if replica_latest is None:
+        return math.inf
+    return max((_utc(primary_latest) - _utc(replica_latest)).total_seconds(), 0.0)
+
+
+# name -> (table, length of the date prefix that forms a bucket, label)
+ROLLUPS = {
+    "hourly": ("weather_hourly", 13, "hour"),
+    "daily": ("weather_daily", 10, "day"),
+}
+STATS_TABLE = "weather_stats"
+# district value of the weather_stats row that summarises every district
+ALL_DISTRICTS = "*"
+
+_SUMMARY_COLUMNS = ", ".join(
+    f"{c}_count, {c}_sum, {c}_min, {c}_max" for c in VALUE_COLUMNS
+)
+_SUMMARY_DDL = "".join(
+    f"    {c}_count INTEGER NOT NULL DEFAULT 0,\n"
+    f"    {c}_sum REAL NOT NULL DEFAULT 0,\n"
+    f"    {c}_min REAL,\n"
+    f"    {c}_max REAL,\n"
+    for c in VALUE_COLUMNS
+)
+_SUMMARY_AGGREGATES = ", ".join(
+    f"COUNT({c}), TOTAL({c}), MIN({c}), MAX({c})" for c in VALUE_COLUMNS
+)
+_NEW_VALUES = ", ".join(
+    f"NEW.{c} IS NOT NULL, coalesce(NEW.{c}, 0), NEW.{c}, NEW.{c}"
+    for c in VALUE_COLUMNS
+)
+_MERGE = ",\n        ".join(
+    f"{c}_count = {c}_count + excluded.{c}_count,\n        "
+    f"{c}_sum = {c}_sum + excluded.{c}_sum,\n        "
+    f"{c}_min = coalesce(min({c}_min, excluded.{c}_min), {c}_min, excluded.{c}_min),\n        "
+    f"{c}_max = coalesce(max({c}_max, excluded.{c}_max), {c}_max, excluded.{c}_max)"
+    for c in VALUE_COLUMNS
+)
+
+
+def _merge_new_sql(table: str, key_columns: str, key_values: str) -> str:
+    """Statement folding the NEW weather row into a summary row."""
+    return (
+        f"INSERT INTO {table} ({key_columns}, {_SUMMARY_COLUMNS})\n"
+        f"    VALUES ({key_values}, {_NEW_VALUES})\n"
+        f"    ON CONFLICT ({key_columns}) DO UPDATE SET\n"
+        f"        {_MERGE};"
+    )
+
+
+def _rollup_table_sql(table: str) -> list[str]:
+    return [
+        f"CREATE TABLE IF NOT EXISTS {table} (\n"
+        "    district_key TEXT,\n"
+        "    bucket TEXT,\n"
+        f"{_SUMMARY_DDL}"
+        "    PRIMARY KEY (district_key, bucket)\n"
+        ")",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(bucket)",
+    ]
+
+
+def _aggregate_select(size: int) -> str:
+    return (
+        f"SELECT district_key, substr(date, 1, {size}), {_SUMMARY_AGGREGATES} "
+        "FROM weather"
+    )
+
+
+def _recompute_bucket_sql(table: str, size: int, row: str) -> str:
+    # Only runs when a stored row is updated or deleted, so re-aggregating
+    # the affected bucket from raw rows keeps min/max exact.  The range on
+    # ``date`` lets SQLite use idx_weather_district_key instead of scanning.
+    bucket = f"substr({row}.date, 1, {size})"
+    return (
+        f"DELETE FROM {table} WHERE district_key = {row}.district_key AND bucket = {bucket};\n"
+        f"    INSERT INTO {table} (district_key, bucket, {_SUMMARY_COLUMNS})\n"
+        f"    {_aggregate_select(size)}\n"
+        f"    WHERE district_key = {row}.district_key AND date >= {bucket}\n"
+        f"    AND date < {bucket} || char(1114111)\n"
+        f"    AND substr(date, 1, {size}) = {bucket}\n"
+        "    GROUP BY 1, 2;"
+    )
+
+
+def _rollup_trigger_sql(table: str, size: int) -> list[str]:
+    merge = _merge_new_sql(
+        table, "district_key, bucket", f"NEW.district_key, substr(NEW.date, 1, {size})"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON weather BEGIN\n"
+        f"    {merge}\n"
+        "END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON weather BEGIN\n"
+        f"    {_recompute_bucket_sql(table, size, 'OLD')}\n"
+        f"    {_recompute_bucket_sql(table, size, 'NEW')}\n"
+        "END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON weather BEGIN\n"
+        f"    {_recompute_bucket_sql(table, size, 'OLD')}\n"
+        "END",
+    ]
+
+
+def rebuild_rollups_sql() -> list[str]:
+    """Statements that recompute every rollup table from raw rows."""
+    stmts = []
+    for table, size, _ in ROLLUPS.values():
+        stmts.append(f"DELETE FROM {table}")
+        stmts.append(
+            f"INSERT INTO {table} (district_key, bucket, {_SUMMARY_COLUMNS}) "
+            f"{_aggregate_select(size)} GROUP BY 1, 2"
+        )
+    return stmts
+
+
+def rollup_query(
+    rollup: str,
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+) -> tuple[str, list]:
+    """Build the bucketed average query answered from a rollup table.
+
+    *start* and *end* are matched at bucket granularity, so a partial hour
+    (or day) selects the whole bucket.
+    """
+    table, size, label = ROLLUPS[rollup]
+    where = []
+    params: list = []
+    if start:
+        where.append("bucket >= ?")
+        params.append(start[:size])
+    if end:
+        where.append("bucket <= ?")
+        params.append(end)
+    if district:
+        where.append("district_key = ?")
+        params.append(district_key(district))
+    avgs = ", ".join(
+        f"SUM({c}_sum) / SUM({c}_count) AS avg_{c}" for c in VALUE_COLUMNS
+    )
+    sql = f"SELECT bucket AS {label}, {avgs} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " GROUP BY bucket ORDER BY bucket"
+    return sql, params
+
+
+STATS_KEYS = [
+    "avg_temp",
+    "avg_humidity",
+    "avg_wind_speed",
+    "max_temp",
+    "min_temp",
+    "max_humidity",
+    "min_humidity",
+    "max_wind_speed",
+    "min_wind_speed",
+]
+
+_STATS_TABLE_SQL = (
+    f"CREATE TABLE IF NOT EXISTS {STATS_TABLE} (\n"
+    "    district_key TEXT PRIMARY KEY,\n"
+    f"{_SUMMARY_DDL.rstrip().rstrip(',')}\n"
+    ")"
+)
+
+
+def _remove_old_sql(scope: str, source: str, from_summary: bool) -> str:
+    # Counts and sums are adjusted exactly; a min/max is only recomputed
+    # from *source* when the removed value was the current extreme.
+    def extreme(fn: str, c: str) -> str:
+        col = f"{c}_{fn.lower()}" if from_summary else c
+        return f"(SELECT {fn}({col}) FROM {source})"
+
+    sets = ",\n        ".join(
+        f"{c}_count = {c}_count - (OLD.{c} IS NOT NULL),\n        "
+        f"{c}_sum = {c}_sum - coalesce(OLD.{c}, 0),\n        "
+        f"{c}_min = CASE WHEN OLD.{c} <= {c}_min "
+        f"THEN {extreme('MIN', c)} ELSE {c}_min END,\n        "
+        f"{c}_max = CASE WHEN OLD.{c} >= {c}_max "
+        f"THEN {extreme('MAX', c)} ELSE {c}_max END"
+        for c in VALUE_COLUMNS
+    )
+    return f"UPDATE {STATS_TABLE} SET\n        {sets}\n    WHERE district_key = {scope};"
+
+
+def _stats_trigger_sql() -> list[str]:
+    # The per-district row is fixed up from that district's raw rows, then
+    # the global row from the per-district rows, never from the full table.
+    remove_district = _remove_old_sql(
+        "OLD.district_key", "weather WHERE district_key = OLD.district_key", False
+    )
+    remove_all = _remove_old_sql(
+        f"'{ALL_DISTRICTS}'",
+        f"{STATS_TABLE} WHERE district_key <> '{ALL_DISTRICTS}'",
+        True,
+    )
+    add_district = _merge_new_sql(STATS_TABLE, "district_key", "NEW.district_key")
+    add_all = _merge_new_sql(STATS_TABLE, "district_key", f"'{ALL_DISTRICTS}'")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {STATS_TABLE}_ai AFTER INSERT ON weather BEGIN\n"
+        f"    {add_district}\n"
+        f"    {add_all}\n"
+        "END",
+        f"CREATE TRIGGER IF NOT EXISTS {STATS_TABLE}_au AFTER UPDATE ON weather BEGIN\n"
+        f"    {remove_district}\n"
+        f"    {remove_all}\n"
+        f"    {add_district}\n"
+        f"    {add_all}\n"
+        "END",
+        f"CREATE TRIGGER IF NOT EXISTS {STATS_TABLE}_ad AFTER DELETE ON weather BEGIN\n"
+        f"    {remove_district}\n"
+        f"    {remove_all}\n"
+        "END",
+    ]
+
+
+def recompute_stats_sql() -> str:
+    """Query returning per-district summaries computed from raw rows."""
+    return (
+        f"SELECT district_key, {_SUMMARY_AGGREGATES} FROM weather GROUP BY district_key"
+    )
+
+
+def stored_stats_sql() -> str:
+    """Query returning the maintained per-district summaries."""
+    return (
+        f"SELECT district_key, {_SUMMARY_COLUMNS} FROM {STATS_TABLE} "
+        f"WHERE district_key <> '{ALL_DISTRICTS}' AND "
+        + " + ".join(f"{c}_count" for c in VALUE_COLUMNS)
+        + " > 0"
+    )
+
+
+def rebuild_stats_sql() -> list[str]:
+    """Statements that recompute the statistics summary from raw rows."""
+    totals = ", ".join(
+        f"coalesce(SUM({c}_count), 0), TOTAL({c}_sum), MIN({c}_min), MAX({c}_max)"
+        for c in VALUE_COLUMNS
+    )
+    return [
+        f"DELETE FROM {STATS_TABLE}",
+        f"INSERT INTO {STATS_TABLE} (district_key, {_SUMMARY_COLUMNS}) "
+        + recompute_stats_sql(),
+        f"INSERT INTO {STATS_TABLE} (district_key, {_SUMMARY_COLUMNS}) "
+        f"SELECT '{ALL_DISTRICTS}', {totals} FROM {STATS_TABLE}",
+    ]
+
+
+def statistics_query(district: str | None = None) -> tuple[str, list]:
+    """Build the statistics read: one row for all districts or one district."""
+    values = ", ".join(
+        f"SUM({c}_sum) / SUM({c}_count) AS avg_{c}" for c in VALUE_COLUMNS
+    ) + ", " + ", ".join(
+        f"MAX({c}_max) AS max_{c}, MIN({c}_min) AS min_{c}" for c in VALUE_COLUMNS
+    )
+    sql = f"SELECT {values} FROM {STATS_TABLE} WHERE "
+    return sql + "district_key = ?", [district_key(district) if district else ALL_DISTRICTS]
+
+
+def diff_statistics(expected: list[tuple], stored: list[tuple]) -> list[str]:
+    """Return districts whose stored summary differs from *expected*."""
+    want = {row[0]: row[1:] for row in expected}
+    have = {row[0]: row[1:] for row in stored}
+    mismatched = []
+    for district in sorted(set(want) | set(have), key=str):
+        a, b = want.get(district), have.get(district)
+        if a is None or b is None or not all(
+            x == y or (x is not None and y is not None and math.isclose(x, y, abs_tol=1e-6))
+            for x, y in zip(a, b)
+        ):
+            mismatched.append(district)
+    return mismatched
+
+
+SCHEMA_SQL = [INDEX_SQL, DISTRICT_INDEX_SQL]
+for _table, _size, _ in ROLLUPS.values():
+    SCHEMA_SQL += _rollup_table_sql(_table) + _rollup_trigger_sql(_table, _size)
+SCHEMA_SQL += [_STATS_TABLE_SQL] + _stats_trigger_sql()
+
+
+def _district_key_migration_sql() -> list[str]:
+    # Summaries used to be keyed by the raw district name; drop them before
+    # the backfill so its UPDATE does not fire the old triggers.
+    tables = [table for table, _, _ in ROLLUPS.values()] + [STATS_TABLE]
+    stmts = [
+        f"DROP TRIGGER IF EXISTS {table}_{event}"
+        for table in tables
+        for event in ("ai", "au", "ad")
+    ]
+    stmts += [f"DROP TABLE IF EXISTS {table}" for table in tables]
+    stmts += [
+        "ALTER TABLE weather ADD COLUMN district_key TEXT",
+        f"UPDATE weather SET district_key = {district_key_sql('district')}",
+    ]
+    return stmts
+
+
+# ``PRAGMA user_version`` N-1 -> N as (statements run before SCHEMA_SQL,
+# statements run after it).
+MIGRATIONS = {
+    1: ([], rebuild_rollups_sql()),
+    2: ([], rebuild_stats_sql()),
+    3: (_district_key_migration_sql(), rebuild_rollups_sql() + rebuild_stats_sql()),
+    4: (["DROP INDEX IF EXISTS idx_weather_date"], []),
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+def schema_statements(version: int) -> list[str]:
+    """Return the DDL and migrations for a database at *version*."""
+    pending = range(version + 1, SCHEMA_VERSION + 1)
+    stmts = [TABLE_SQL]
+    for target in pending:
+        stmts += MIGRATIONS[target][0]
+    stmts += SCHEMA_SQL
+    for target in pending:
+        stmts += MIGRATIONS[target][1]
+    if version < SCHEMA_VERSION:
+        stmts.append(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return stmts
+
+
+def pending_statements(version: int) -> list[str]:
+    """Like :func:`schema_statements`, but empty for a current database."""
+    if version == SCHEMA_VERSION:
+        return []
+    return schema_statements(version)
+
+
+def connection_pragmas(config: SQLiteConfig) -> list[str]:
+    """Return the PRAGMAs applied to every pooled connection."""
+    return [
+        f"PRAGMA journal_mode={config.journal_mode}",
+        f"PRAGMA synchronous={config.synchronous}",
+        f"PRAGMA mmap_size={config.mmap_size:d}",
+        f"PRAGMA cache_size={config.cache_size:d}",
+        f"PRAGMA busy_timeout={config.busy_timeout:d}",
+    ]
+
+
+def init_schema(conn: sqlite3.Connection) -> None:
+    """Create tables, indexes and triggers and apply pending migrations.
+
+    A database already at :data:`SCHEMA_VERSION` costs a single PRAGMA read.
+    """
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    for stmt in pending_statements(version):
+        conn.execute(stmt)
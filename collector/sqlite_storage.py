@@ -1,41 +1,161 @@
+import os
 import sqlite3
+import threading
+from contextlib import closing, contextmanager
 from pathlib import Path
+from typing import Iterator
 import pandas as pd
 
-TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS weather (
-    district TEXT,
-    date TEXT,
-    temp REAL,
-    humidity REAL,
-    wind_speed REAL,
-    PRIMARY KEY (district, date)
+from .config import SQLiteConfig, load_sqlite_config
+from .processor import district_key
+from .sqlite_common import (
+    CHUNK_SIZE,
+    PAGE_SIZE,
+    LATEST_SQL,
+    UpsertResult,
+    STATS_KEYS,
+    connection_pragmas,
+    date_lag,
+    decode_cursor,
+    diff_statistics,
+    init_schema,
+    next_cursor,
+    range_query,
+    read_only_uri,
+    rebuild_rollups_sql,
+    rebuild_stats_sql,
+    recompute_stats_sql,
+    rollup_query,
+    statistics_query,
+    stored_stats_sql,
+    upsert,
 )
-"""
 
-INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_weather_date ON weather(date DESC)"
+_config: SQLiteConfig = load_sqlite_config()
+_local = threading.local()
+_lock = threading.Lock()
+_initialized: set[str] = set()
+# replicas are opened read-only and never have their schema touched
+_read_only: set[str] = set()
+_connections: list[sqlite3.Connection] = []
+_generation = 0
 
 
 def init_db(db_path: Path) -> None:
     """Initialize SQLite database."""
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(TABLE_SQL)
-        conn.execute(INDEX_SQL)
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        init_schema(conn)
 
 
-def append_to_db(df: pd.DataFrame, db_path: Path) -> None:
-    """Append dataframe rows to SQLite database."""
-    if df.empty:
+def enable_pool(config: SQLiteConfig | None = None) -> None:
+    """Reuse one connection per thread and database instead of reconnecting.
+
+    Pooled connections run in WAL mode so readers never block the
+    collector's writes, and the schema is created once per database file
+    rather than before every query.
+    """
+    global _config
+    close_pool()
+    _config = config or load_sqlite_config()
+    _config.pool = True
+
+
+def disable_pool() -> None:
+    """Close pooled connections and go back to a connection per call."""
+    close_pool()
+    _config.pool = False
+
+
+def close_pool() -> None:
+    """Close every pooled connection opened by any thread."""
+    global _generation
+    with _lock:
+        for conn in _connections:
+            conn.close()
+        _connections.clear()
+        _initialized.clear()
+        _generation += 1
+
+
+def _pooled_connection(db_path: Path) -> sqlite3.Connection:
+    key = str(Path(db_path).resolve())
+    if getattr(_local, "generation", None) != _generation:
+        _local.conns = {}
+        _local.generation = _generation
+    conn = _local.conns.get(key)
+    if conn is not None:
+        return conn
+    conn = sqlite3.connect(
+        db_path, timeout=_config.busy_timeout / 1000, check_same_thread=False
+    )
+    for pragma in connection_pragmas(_config):
+        conn.execute(pragma)
+    with _lock:
+        if key not in _initialized:
+            with conn:
+                init_schema(conn)
+            _initialized.add(key)
+        _connections.append(conn)
+    _local.conns[key] = conn
+    return conn
+
+
+@contextmanager
+def _connect(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """Yield a connection inside a transaction, pooled if enabled."""
+    if str(Path(db_path).resolve()) in _read_only:
+        with closing(sqlite3.connect(read_only_uri(db_path), uri=True)) as conn:
+            yield conn
+        return
+    if _config.pool:
+        conn = _pooled_connection(db_path)
+        with conn:
+            yield conn
         return
-    init_db(db_path)
-    with sqlite3.connect(db_path) as conn:
-        df.to_sql("weather", conn, if_exists="append", index=False)
+    with closing(sqlite3.connect(db_path)) as conn:
+        with conn:
+            init_schema(conn)
+        with conn:
+            yield conn
+
+
+def append_to_db(
+    df: pd.DataFrame,
+    db_path: Path,
+    on_conflict: str = "replace",
+    chunk_size: int = CHUNK_SIZE,
+) -> UpsertResult:
+    """Upsert dataframe rows into SQLite database in a single transaction.
+
+    Rows are written in chunks of *chunk_size* with ``executemany``; rows
+    whose ``(district, date)`` already exist are handled according to
+    *on_conflict* (``replace``, ``ignore`` or ``error``).
+    """
+    if df.empty:
+        return UpsertResult()
+    with _connect(db_path) as conn:
+        return upsert(conn, df, on_conflict, chunk_size)
+
+
+def _latest_date(db_path: Path) -> str | None:
+    with closing(sqlite3.connect(read_only_uri(db_path), uri=True)) as conn:
+        return conn.execute(LATEST_SQL).fetchone()[0]
+
+
+def replica_lag(primary: Path, replica: Path) -> float:
+    """Return how many seconds of data *replica* is behind *primary*.
+
+    Both files are opened read-only, so probing never creates or migrates
+    a database, and *replica* is remembered as read-only for later reads.
+    """
+    lag = date_lag(_latest_date(primary), _latest_date(replica))
+    _read_only.add(str(Path(replica).resolve()))
+    return lag
 
 
 def query_latest(db_path: Path, limit: int = 100) -> pd.DataFrame:
     """Load latest rows from database ordered by date descending."""
-    init_db(db_path)
-    with sqlite3.connect(db_path) as conn:
+    with _connect(db_path) as conn:
         query = (
             "SELECT district, date, temp, humidity, wind_speed "
             "FROM weather ORDER BY date DESC LIMIT ?"
@@ -46,48 +166,42 @@ def query_latest(db_path: Path, limit: int = 100) -> pd.DataFrame:
 
 def query_by_district(db_path: Path, district: str, limit: int = 100) -> pd.DataFrame:
     """Load latest rows for a specific district."""
-    init_db(db_path)
-    with sqlite3.connect(db_path) as conn:
+    with _connect(db_path) as conn:
         query = (
             "SELECT district, date, temp, humidity, wind_speed "
-            "FROM weather WHERE LOWER(district) = LOWER(?) "
+            "FROM weather WHERE district_key = ? "
             "ORDER BY date DESC LIMIT ?"
         )
-        df = pd.read_sql(query, conn, params=(district, limit))
+        df = pd.read_sql(query, conn, params=(district_key(district), limit))
     return df
 
 
-def get_statistics(db_path: Path) -> dict:
-    """Return simple statistics over the entire dataset."""
-    init_db(db_path)
-    with sqlite3.connect(db_path) as conn:
-        row = conn.execute(
-            """
-            SELECT
-                AVG(temp) AS avg_temp,
-                AVG(humidity) AS avg_humidity,
-                AVG(wind_speed) AS avg_wind_speed,
-                MAX(temp) AS max_temp,
-                MIN(temp) AS min_temp,
-                MAX(humidity) AS max_humidity,
-                MIN(humidity) AS min_humidity,
-                MAX(wind_speed) AS max_wind_speed,
-                MIN(wind_speed) AS min_wind_speed
-            FROM weather
-            """
-        ).fetchone()
-    keys = [
-        "avg_temp",
-        "avg_humidity",
-        "avg_wind_speed",
-        "max_temp",
-        "min_temp",
-        "max_humidity",
-        "min_humidity",
-        "max_wind_speed",
-        "min_wind_speed",
-    ]
-    return dict(zip(keys, row))
+def get_statistics(db_path: Path, district: str | None = None) -> dict:
+    """Return statistics over the dataset or a single district.
+
+    Reads the ``weather_stats`` summary maintained on ingest instead of
+    aggregating the raw table.
+    """
+    sql, params = statistics_query(district)
+    with _connect(db_path) as conn:
+        row = conn.execute(sql, params).fetchone()
+    return dict(zip(STATS_KEYS, row))
+
+
+def verify_statistics(db_path: Path, repair: bool = False) -> list[str]:
+    """Compare the statistics summary with raw data.
+
+    Returns the districts whose summary is out of date; with *repair* the
+    summary is rebuilt from the raw rows.
+    """
+    with _connect(db_path) as conn:
+        expected = conn.execute(recompute_stats_sql()).fetchall()
+        stored = conn.execute(stored_stats_sql()).fetchall()
+        mismatched = diff_statistics(expected, stored)
+        if mismatched and repair:
+            for stmt in rebuild_stats_sql():
+                conn.execute(stmt)
+    return mismatched
 
 
 def query_range(
@@ -98,61 +212,104 @@ def query_range(
     limit: int | None = None,
 ) -> pd.DataFrame:
     """Return rows within a date range and optional district list."""
-    init_db(db_path)
-    where = []
-    params: list = []
-    if start:
-        where.append("date >= ?")
-        params.append(start)
-    if end:
-        where.append("date <= ?")
-        params.append(end)
-    if districts:
-        placeholders = ",".join("?" for _ in districts)
-        where.append(f"LOWER(district) IN ({placeholders})")
-        params.extend(d.lower() for d in districts)
-    sql = (
-        "SELECT district, date, temp, humidity, wind_speed FROM weather"
-    )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY date"
-    if limit:
-        sql += " LIMIT ?"
-        params.append(limit)
-    with sqlite3.connect(db_path) as conn:
+    sql, params = range_query(start, end, districts, limit)
+    with _connect(db_path) as conn:
         df = pd.read_sql(sql, conn, params=params)
     return df
 
 
+def query_range_page(
+    db_path: Path,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    page_size: int = PAGE_SIZE,
+    cursor: str | None = None,
+) -> tuple[pd.DataFrame, str | None]:
+    """Return one page of :func:`query_range` and the token for the next.
+
+    Pages are keyed on ``(date, district)`` so fetching a deep page costs
+    the same as the first one.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    sql, params = range_query(start, end, districts, page_size, after)
+    with _connect(db_path) as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    return df, next_cursor(df, page_size)
+
+
+def iter_range(
+    db_path: Path,
+    start: str | None = None,
+    end: str | None = None,
+    districts: list[str] | None = None,
+    chunk_size: int = PAGE_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows of :func:`query_range` in chunks of *chunk_size*."""
+    cursor = None
+    while True:
+        df, cursor = query_range_page(db_path, start, end, districts, chunk_size, cursor)
+        if not df.empty:
+            yield df
+        if cursor is None:
+            return
+
+
 def hourly_average(
     db_path: Path,
     start: str | None = None,
     end: str | None = None,
     district: str | None = None,
 ) -> pd.DataFrame:
-    """Return hourly averages of temp/humidity/wind."""
-    init_db(db_path)
-    where = []
-    params: list = []
-    if start:
-        where.append("date >= ?")
-        params.append(start)
-    if end:
-        where.append("date <= ?")
-        params.append(end)
-    if district:
-        where.append("LOWER(district) = LOWER(?)")
-        params.append(district)
-    sql = (
-        "SELECT substr(date,1,13) as hour, "
-        "AVG(temp) as avg_temp, AVG(humidity) as avg_humidity, "
-        "AVG(wind_speed) as avg_wind_speed "
-        "FROM weather"
-    )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " GROUP BY hour ORDER BY hour"
-    with sqlite3.connect(db_path) as conn:
+    """Return hourly averages of temp/humidity/wind from the hourly rollup."""
+    sql, params = rollup_query("hourly", start, end, district)
+    with _connect(db_path) as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    return df
+
+
+def daily_average(
+    db_path: Path,
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+) -> pd.DataFrame:
+    """Return daily averages of temp/humidity/wind from the daily rollup."""
+    sql, params = rollup_query("daily", start, end, district)
+    with _connect(db_path) as conn:
         df = pd.read_sql(sql, conn, params=params)
     return df
+
+
+def rebuild_rollups(db_path: Path) -> None:
+    """Recompute the hourly and daily rollup tables from raw rows."""
+    with _connect(db_path) as conn:
+        for stmt in rebuild_rollups_sql():
+            conn.execute(stmt)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SQLite storage maintenance")
+    parser.add_argument(
+        "--db", default=os.getenv("WEATHER_DB", "weather.db"), help="SQLite database path"
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild-rollups", help="Recompute hourly/daily rollups")
+    verify = sub.add_parser("verify-stats", help="Check statistics against raw data")
+    verify.add_argument("--repair", action="store_true", help="Rebuild on mismatch")
+    args = parser.parse_args()
+
+    if args.cmd == "rebuild-rollups":
+        rebuild_rollups(Path(args.db))
+    elif args.cmd == "verify-stats":
+        mismatched = verify_statistics(Path(args.db), repair=args.repair)
+        for district in mismatched:
+            print(f"statistics out of date: {district}")
+        if mismatched and not args.repair:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
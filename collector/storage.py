@@ -1,24 +1,158 @@
+import json
 from pathlib import Path
 import pandas as pd
 
+# keys per archive, with the (size, mtime) of the archive they describe
+_key_index: dict[Path, tuple[tuple[int, int], set[tuple[str, str]]]] = {}
 
-def append_json(df: pd.DataFrame, path: Path) -> None:
+
+def _monthly_file(path: Path, suffix: str) -> Path:
+    if path.is_dir() or path.suffix == "":
+        path.mkdir(parents=True, exist_ok=True)
+        path = path / f"weather_{pd.Timestamp.utcnow():%Y_%m}{suffix}"
+    return path
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".keys")
+
+
+def _record_key(record: dict) -> tuple[str, str]:
+    return str(record["district"]), str(record["date"])
+
+
+def _stat(path: Path) -> tuple[int, int]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _load_keys(path: Path) -> set[tuple[str, str]]:
+    """Return the ``(district, date)`` keys already written to *path*.
+
+    Keys are read from the sidecar index and cached until the archive
+    changes on disk, e.g. because another process appended to it; the index
+    is rebuilt from the archive itself if it is missing.
+    """
+    index = _index_path(path)
+    cached = _key_index.get(path)
+    if cached is not None and cached[0] == _stat(path) and index.exists():
+        return cached[1]
+    keys = set()
+    if index.exists():
+        with index.open(encoding="utf-8") as fh:
+            keys = {tuple(json.loads(line)) for line in fh if line.strip()}
+    elif path.exists():
+        with path.open(encoding="utf-8") as fh:
+            keys = {_record_key(json.loads(line)) for line in fh if line.strip()}
+        with index.open("w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(k, ensure_ascii=False) + "\n" for k in keys)
+    _key_index[path] = (_stat(path), keys)
+    return keys
+
+
+def _check_lines(path: Path) -> None:
+    with path.open("rb") as fh:
+        if fh.read(1) == b"[":
+            raise ValueError(
+                f"{path} is a JSON array archive; convert it with convert_to_lines first"
+            )
+
+
+def _lines_file(path: Path) -> Path:
+    path = _monthly_file(path, ".jsonl")
+    return path if path.suffix == ".jsonl" else path.with_suffix(".jsonl")
+
+
+def _append_lines(df: pd.DataFrame, path: Path) -> None:
+    if path.exists():
+        _check_lines(path)
+    keys = _load_keys(path)
+    text = df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+    lines, new_keys = [], []
+    for line in text.splitlines():
+        if not line:
+            continue
+        key = _record_key(json.loads(line))
+        if key in keys:
+            continue
+        keys.add(key)
+        lines.append(line + "\n")
+        new_keys.append(json.dumps(key, ensure_ascii=False) + "\n")
+    if not lines:
+        return
+    with path.open("a", encoding="utf-8") as fh:
+        fh.writelines(lines)
+    with _index_path(path).open("a", encoding="utf-8") as fh:
+        fh.writelines(new_keys)
+    _key_index[path] = (_stat(path), keys)
+
+
+def append_json(df: pd.DataFrame, path: Path, lines: bool = False) -> Path:
     """Append weather data to a JSON archive.
 
     If *path* is a directory, the file ``weather_YYYY_MM.json`` will be
     created inside it so that each month's data is stored separately.
+
+    With *lines* the archive is JSON Lines (``.jsonl``): only records whose
+    ``(district, date)`` is not yet in the sidecar ``.keys`` index are
+    appended, so the existing file is never read or rewritten.  A file
+    *path* with another suffix is written as ``<stem>.jsonl`` instead.
+
+    Returns the file that was written.
     """
-    if path.is_dir() or path.suffix == "":
-        path.mkdir(parents=True, exist_ok=True)
-        fname = f"weather_{pd.Timestamp.utcnow():%Y_%m}.json"
-        path = path / fname
+    if lines:
+        path = _lines_file(path)
+        _append_lines(df, path)
+        return path
+    path = _monthly_file(path, ".json")
     if path.exists():
         existing = pd.read_json(path)
         df = pd.concat([existing, df], ignore_index=True)
         df = df.drop_duplicates(subset=["district", "date"])
     df.to_json(path, orient="records", force_ascii=False, date_format="iso")
+    return path
+
+
+def convert_to_lines(path: Path) -> list[Path]:
+    """Convert ``orient="records"`` JSON archives to JSON Lines.
+
+    *path* may be a single file or a directory of ``weather_*.json`` files.
+    Each file is written next to the original with a ``.jsonl`` suffix and
+    its key index; the originals are left in place.
+    """
+    sources = sorted(path.glob("weather_*.json")) if path.is_dir() else [path]
+    converted = []
+    for src in sources:
+        target = src.with_suffix(".jsonl")
+        target.unlink(missing_ok=True)
+        _index_path(target).unlink(missing_ok=True)
+        _key_index.pop(target, None)
+        _append_lines(pd.read_json(src, dtype=False, convert_dates=False), target)
+        converted.append(target)
+    return converted
 
 
 def save_csv(df: pd.DataFrame, path: Path) -> None:
     """Save dataframe as CSV."""
     df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JSON archive maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    convert = sub.add_parser("convert", help="Convert JSON archives to JSON Lines")
+    convert.add_argument("path", help="Archive file or directory")
+    args = parser.parse_args()
+
+    if args.cmd == "convert":
+        for target in convert_to_lines(Path(args.path)):
+            print(f"wrote {target}")
+
+
+if __name__ == "__main__":
+    main()
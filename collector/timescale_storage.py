@@ -2,10 +2,26 @@ from __future__ import annotations
 
 """TimescaleDB storage utilities using SQLAlchemy."""
 
-from typing import Iterable
-from sqlalchemy import create_engine, text
+import os
+from typing import Iterable, Iterator
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 import pandas as pd
 
+from .config import TimescaleConfig, load_timescale_config
+from .engines import begin, get_engine
+from .postgres_storage import (
+    COPY_CHUNK_SIZE,
+    REPLICA_LAG_SQL,
+    STREAM_CHUNK_SIZE,
+    bulk_load,
+    iter_range_pg,
+    migrate_district_key,
+    range_sql,
+)
+from .processor import district_key
+from .sqlite_common import UpsertResult
+
 TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS weather (
     district TEXT NOT NULL,
@@ -13,56 +29,309 @@ CREATE TABLE IF NOT EXISTS weather (
     temp REAL,
     humidity REAL,
     wind_speed REAL,
+    district_key TEXT,
     PRIMARY KEY (district, date)
 )
 """
 
+VALUE_COLUMNS = ("temp", "humidity", "wind_speed")
+
+# Continuous aggregates, coarsest first: view -> (bucket width, refresh
+# policy start_offset, end_offset, schedule_interval).
+AGGREGATES = {
+    "weather_daily": ("1 day", "30 days", "1 day", "1 hour"),
+    "weather_hourly": ("1 hour", "3 days", "1 hour", "30 minutes"),
+}
+
+
+def aggregate_sql(view: str) -> list[str]:
+    """Return the statements creating *view* and its refresh policy."""
+    width, start_offset, end_offset, schedule = AGGREGATES[view]
+    cols = ", ".join(
+        f"count({c}) AS {c}_count, sum({c}) AS {c}_sum" for c in VALUE_COLUMNS
+    )
+    return [
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view} "
+        "WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS "
+        f"SELECT time_bucket(INTERVAL '{width}', date) AS bucket, district_key, "
+        f"min(district) AS district, {cols} "
+        "FROM weather GROUP BY bucket, district_key WITH NO DATA",
+        f"SELECT add_continuous_aggregate_policy('{view}', "
+        f"start_offset => INTERVAL '{start_offset}', "
+        f"end_offset => INTERVAL '{end_offset}', "
+        f"schedule_interval => INTERVAL '{schedule}', if_not_exists => TRUE)",
+    ]
+
+
+def _set_policy(conn: Connection, policy: str, key: str, interval: str) -> None:
+    # add_*_policy(if_not_exists) keeps an existing job even when its
+    # interval differs, so replace the job only when the setting changed.
+    job = conn.execute(
+        text(
+            "SELECT (config->>:key)::interval = CAST(:interval AS interval) "
+            "FROM timescaledb_information.jobs "
+            "WHERE hypertable_name = 'weather' AND proc_name = :proc"
+        ),
+        {"key": key, "interval": interval or None, "proc": f"policy_{policy}"},
+    ).first()
+    if job is not None and job[0]:
+        return
+    if job is not None:
+        conn.execute(text(f"SELECT remove_{policy}_policy('weather', if_exists => TRUE)"))
+    if interval:
+        conn.execute(
+            text(f"SELECT add_{policy}_policy('weather', CAST(:interval AS interval))"),
+            {"interval": interval},
+        )
+
 
-def init_ts(db_url: str) -> None:
-    """Initialize TimescaleDB hypertable."""
-    engine = create_engine(db_url)
-    with engine.begin() as conn:
+def apply_policies(conn: Connection, config: TimescaleConfig | None = None) -> None:
+    """Bring chunk interval, compression and retention in line with *config*.
+
+    Safe to run on every start: settings that already match are left alone.
+    """
+    config = config or load_timescale_config()
+    if config.drop_after:
+        longest_refresh = max((spec[1] for spec in AGGREGATES.values()), key=pd.Timedelta)
+        longer = conn.execute(
+            text("SELECT CAST(:drop AS interval) > CAST(:refresh AS interval)"),
+            {"drop": config.drop_after, "refresh": longest_refresh},
+        ).scalar()
+        if not longer:
+            # a refresh over dropped raw chunks would empty the aggregates
+            raise ValueError(f"drop_after must be longer than {longest_refresh}")
+    conn.execute(
+        text("SELECT set_chunk_time_interval('weather', CAST(:interval AS interval))"),
+        {"interval": config.chunk_interval},
+    )
+    enabled = conn.execute(
+        text(
+            "SELECT compression_enabled FROM timescaledb_information.hypertables "
+            "WHERE hypertable_name = 'weather'"
+        )
+    ).scalar()
+    if config.compress_after and not enabled:
+        conn.execute(
+            text(
+                "ALTER TABLE weather SET (timescaledb.compress, "
+                f"timescaledb.compress_segmentby = '{config.compress_segmentby}', "
+                "timescaledb.compress_orderby = 'date DESC')"
+            )
+        )
+    _set_policy(conn, "compression", "compress_after", config.compress_after)
+    _set_policy(conn, "retention", "drop_after", config.drop_after)
+
+
+def init_ts(
+    db_url: str, aggregates: bool = False, config: TimescaleConfig | None = None
+) -> None:
+    """Initialize TimescaleDB hypertable and its storage policies.
+
+    With *aggregates* the hourly and daily continuous aggregates used by
+    :func:`query_buckets_ts` are created along with their refresh policies.
+    Retention only drops raw chunks; aggregates keep their history.
+    """
+    with begin(db_url) as conn:
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
         conn.execute(text(TABLE_SQL))
         conn.execute(text("SELECT create_hypertable('weather','date', if_not_exists => TRUE)"))
+        migrate_district_key(conn)
+        apply_policies(conn, config)
+        if aggregates:
+            for view in AGGREGATES:
+                for stmt in aggregate_sql(view):
+                    conn.execute(text(stmt))
 
 
-def append_to_ts(df: pd.DataFrame, db_url: str) -> None:
-    """Append dataframe to TimescaleDB."""
-    if df.empty:
-        return
-    engine = create_engine(db_url)
-    with engine.begin() as conn:
-        df.to_sql("weather", conn, if_exists="append", index=False)
+def refresh_aggregates(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    config: TimescaleConfig | None = None,
+) -> None:
+    """Materialise the continuous aggregates for a window, e.g. after a backfill.
 
+    The refresh policies only look back a few buckets, so historical loads
+    need an explicit refresh.  With ``drop_after`` set the window starts no
+    earlier than ``now() - drop_after``: refreshing buckets whose raw chunks
+    were dropped would delete their materialised rows.
+    """
+    config = config or load_timescale_config()
+    engine = get_engine(db_url)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for view in reversed(list(AGGREGATES)):
+            conn.execute(
+                text(
+                    f"CALL refresh_continuous_aggregate('{view}', "
+                    "GREATEST(CAST(:start AS timestamptz), "
+                    "now() - CAST(:drop_after AS interval)), "
+                    "CAST(:end AS timestamptz))"
+                ),
+                {"start": start, "end": end, "drop_after": config.drop_after or None},
+            )
 
-def query_range_ts(
-    db_url: str,
+
+def pick_aggregate(bucket: str) -> str | None:
+    """Return the coarsest aggregate whose buckets tile *bucket*, if any."""
+    if any(unit in bucket.lower() for unit in ("mon", "year")):
+        return next(v for v, spec in AGGREGATES.items() if spec[0] == "1 day")
+    width = pd.Timedelta(bucket)
+    for view, spec in AGGREGATES.items():
+        size = pd.Timedelta(spec[0])
+        if width >= size and width % size == pd.Timedelta(0):
+            return view
+    return None
+
+
+def buckets_query(
+    bucket: str,
     start: str | None = None,
     end: str | None = None,
     districts: Iterable[str] | None = None,
-    limit: int | None = None,
-) -> pd.DataFrame:
-    """Query data from TimescaleDB within an optional time range and district list."""
-    engine = create_engine(db_url)
+) -> tuple[str, dict]:
+    """Build the per-district bucketed average query for :func:`query_buckets_ts`.
+
+    Reads from the coarsest continuous aggregate that can answer *bucket*
+    and falls back to raw rows for widths finer than an hour.
+    """
+    view = pick_aggregate(bucket)
+    if view:
+        source, column = view, "bucket"
+        avgs = ", ".join(
+            f"sum({c}_sum) / nullif(sum({c}_count), 0) AS avg_{c}" for c in VALUE_COLUMNS
+        )
+    else:
+        source, column = "weather", "date"
+        avgs = ", ".join(f"avg({c}) AS avg_{c}" for c in VALUE_COLUMNS)
     where = []
-    params = {}
+    params = {"bucket": bucket}
     if start:
-        where.append("date >= :start")
+        where.append(f"{column} >= :start")
         params["start"] = start
     if end:
-        where.append("date <= :end")
+        where.append(f"{column} <= :end")
         params["end"] = end
     if districts:
-        where.append("lower(district) IN :dlist")
-        params["dlist"] = tuple(d.lower() for d in districts)
-    sql = "SELECT district, date, temp, humidity, wind_speed FROM weather"
+        where.append("district_key IN :dlist")
+        params["dlist"] = tuple(district_key(d) for d in districts)
+    sql = (
+        f"SELECT time_bucket(CAST(:bucket AS interval), {column}) AS bucket, "
+        f"min(district) AS district, {avgs} FROM {source}"
+    )
     if where:
         sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY date"
-    if limit:
-        sql += " LIMIT :limit"
-        params["limit"] = limit
-    with engine.begin() as conn:
+    sql += " GROUP BY 1, district_key ORDER BY 1, 2"
+    return sql, params
+
+
+def query_buckets_ts(
+    db_url: str,
+    bucket: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Return per-district averages in *bucket*-wide time buckets (e.g. ``"6 hours"``)."""
+    sql, params = buckets_query(bucket, start, end, districts)
+    with begin(db_url) as conn:
+        df = pd.read_sql(text(sql), conn, params=params)
+    return df
+
+
+def append_to_ts(
+    df: pd.DataFrame,
+    db_url: str,
+    on_conflict: str = "replace",
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> UpsertResult:
+    """Upsert dataframe rows into TimescaleDB."""
+    return bulk_load(df, db_url, on_conflict, chunk_size)
+
+
+def query_range_ts(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+    limit: int | None = None,
+) -> pd.DataFrame:
+    """Query data from TimescaleDB within an optional time range and district list."""
+    sql, params = range_sql(start, end, districts, limit)
+    with begin(db_url) as conn:
         df = pd.read_sql(text(sql), conn, params=params)
     return df
+
+
+def replica_lag(primary: str, replica: str) -> float:
+    """Return the replay lag the standby at *replica* reports, in seconds."""
+    with begin(replica) as conn:
+        return float(conn.execute(text(REPLICA_LAG_SQL)).scalar())
+
+
+def iter_range_ts(
+    db_url: str,
+    start: str | None = None,
+    end: str | None = None,
+    districts: Iterable[str] | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    arrow: bool = False,
+) -> Iterator:
+    """Stream :func:`query_range_ts` in chunks through a server-side cursor."""
+    return iter_range_pg(db_url, start, end, districts, chunk_size, arrow)
+
+
+CHUNK_REPORT_SQL = """
+SELECT c.chunk_name AS chunk, c.range_start, c.range_end, c.is_compressed AS compressed,
+       coalesce(s.before_compression_total_bytes,
+                pg_total_relation_size(format('%I.%I', c.chunk_schema, c.chunk_name)::regclass))
+           AS before_bytes,
+       coalesce(s.after_compression_total_bytes,
+                pg_total_relation_size(format('%I.%I', c.chunk_schema, c.chunk_name)::regclass))
+           AS after_bytes
+FROM timescaledb_information.chunks c
+LEFT JOIN chunk_compression_stats('weather') s
+       ON s.chunk_schema = c.chunk_schema AND s.chunk_name = c.chunk_name
+WHERE c.hypertable_name = 'weather'
+ORDER BY c.range_start
+"""
+
+
+def chunk_report(db_url: str) -> pd.DataFrame:
+    """Return size and compression ratio of every ``weather`` chunk."""
+    with begin(db_url) as conn:
+        df = pd.read_sql(text(CHUNK_REPORT_SQL), conn)
+    df["ratio"] = (df["before_bytes"] / df["after_bytes"]).round(2)
+    return df
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TimescaleDB maintenance")
+    parser.add_argument(
+        "--db-url", default=os.getenv("TIMESCALE_URL"), help="TimescaleDB connection URL"
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    init = sub.add_parser("init", help="Create the hypertable and apply TS_* policies")
+    init.add_argument("--aggregates", action="store_true", help="Also create continuous aggregates")
+    refresh = sub.add_parser("refresh-aggregates", help="Materialise continuous aggregates")
+    refresh.add_argument(
+        "--start",
+        help="Window start (default: beginning of data); never before now() - TS_DROP_AFTER",
+    )
+    refresh.add_argument("--end", help="Window end (default: now)")
+    sub.add_parser("chunks", help="Report chunk sizes and compression ratios")
+    args = parser.parse_args()
+    if not args.db_url:
+        parser.error("--db-url or TIMESCALE_URL is required")
+
+    if args.cmd == "init":
+        init_ts(args.db_url, aggregates=args.aggregates)
+    elif args.cmd == "refresh-aggregates":
+        refresh_aggregates(args.db_url, args.start, args.end)
+    elif args.cmd == "chunks":
+        print(chunk_report(args.db_url).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
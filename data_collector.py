@@ -1,11 +1,15 @@
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from pandas import DataFrame
 import structlog
 
 from dotenv import load_dotenv
 
 from collector.logging_config import setup_logging
+from collector.processor import district_key, district_keys
 from risk_analyzer import add_risk_column
 from notifier import alert_high_risk
 
@@ -18,24 +22,91 @@ from collector import (
     append_to_db,
     append_to_ts,
     CollectorConfig,
+    DaemonConfig,
+    FanOut,
     load_config,
+    load_daemon_config,
+    load_s3_config,
     upload_file,
+    append_parquet,
+    sync_dir,
+    sync_file,
+    Watermark,
 )
 logger = structlog.get_logger(__name__)
 
 
 def fetch_weather(
-    district: Optional[str] = None, config: CollectorConfig | None = None
+    district: Optional[str] = None,
+    config: CollectorConfig | None = None,
+    watermark: Watermark | None = None,
 ) -> DataFrame:
-    """Fetch and preprocess weather data."""
+    """Fetch and preprocess weather data, dropping rows *watermark* has seen."""
     df = fetch_latest_weather(config)
     df = normalize(df)
     if district:
-        df = df[df["district"].str.lower() == district.lower()]
+        df = df[district_keys(df["district"].astype("string")) == district_key(district)]
+    if watermark is not None:
+        df = watermark.filter(df)
     df = clean(df)
     return df
 
 
+def build_sinks(
+    json_output: Path,
+    csv_output: Optional[Path] = None,
+    db_output: Optional[Path] = None,
+    db_url: str | None = None,
+    s3_bucket: str | None = None,
+    s3_key: str | None = None,
+    parquet_output: Optional[Path] = None,
+    json_lines: bool = False,
+    s3_sync: bool = False,
+) -> dict[str, Callable[[DataFrame], None]]:
+    """Return the configured storage sinks, each writing one batch.
+
+    S3 uploads run in the sink of the file they upload so they always see
+    its latest write.
+    """
+    s3_config = load_s3_config()
+
+    def json_sink(df: DataFrame) -> None:
+        written = append_json(df, json_output, lines=json_lines)
+        if s3_bucket and s3_sync:
+            if json_output.is_dir():
+                sync_dir(json_output, s3_bucket, s3_key or "", delete=s3_config.sync_delete)
+            else:
+                sync_file(written, s3_bucket, s3_key)
+        elif s3_bucket:
+            upload_file(written, s3_bucket, s3_key)
+
+    def parquet_sink(df: DataFrame) -> None:
+        append_parquet(df, parquet_output)
+        if s3_bucket and s3_sync:
+            sync_dir(
+                parquet_output,
+                s3_bucket,
+                s3_config.parquet_prefix,
+                delete=s3_config.sync_delete,
+            )
+
+    sinks: dict[str, Callable[[DataFrame], None]] = {"json": json_sink}
+    if csv_output:
+        sinks["csv"] = lambda df: save_csv(df, csv_output)
+    if parquet_output:
+        sinks["parquet"] = parquet_sink
+    if db_output:
+        sinks["sqlite"] = lambda df: append_to_db(df, db_output)
+    if db_url:
+        sinks["timescale"] = lambda df: append_to_ts(df, db_url)
+    return sinks
+
+
+def score_and_alert(df: DataFrame) -> None:
+    """Add risk scores and alert on high-risk districts."""
+    alert_high_risk(add_risk_column(df))
+
+
 def collect_and_save(
     json_output: Path,
     csv_output: Optional[Path] = None,
@@ -45,20 +116,36 @@ def collect_and_save(
     s3_key: str | None = None,
     district: Optional[str] = None,
     config: CollectorConfig | None = None,
+    parquet_output: Optional[Path] = None,
+    json_lines: bool = False,
+    s3_sync: bool = False,
+    write_lock: AbstractContextManager | None = None,
 ) -> None:
-    """Fetch weather data and save it in various formats."""
-    df = fetch_weather(district, config)
-    append_json(df, json_output)
-    if csv_output:
-        save_csv(df, csv_output)
-    if db_output:
-        append_to_db(df, db_output)
-    if db_url:
-        append_to_ts(df, db_url)
-    if s3_bucket:
-        upload_file(json_output, s3_bucket, s3_key)
-    df = add_risk_column(df)
-    alert_high_risk(df)
+    """Fetch weather data and save it in various formats.
+
+    With ``COLLECTOR_WATERMARK`` set, only records newer than the stored
+    per-district marks are processed, and the marks advance once every sink
+    has been written.  Callers collecting concurrently pass a shared
+    *write_lock*: the fetch runs unlocked, the writes one at a time.
+    """
+    config = config or load_config()
+    watermark = Watermark(Path(config.watermark_path)) if config.watermark_path else None
+    df = fetch_weather(district, config, watermark)
+    if watermark is not None and df.empty:
+        with write_lock or nullcontext():
+            watermark.commit()
+        logger.info("No new records")
+        return
+    sinks = build_sinks(
+        json_output, csv_output, db_output, db_url, s3_bucket, s3_key,
+        parquet_output, json_lines, s3_sync,
+    )
+    with write_lock or nullcontext():
+        for write in sinks.values():
+            write(df)
+        if watermark is not None:
+            watermark.commit()
+    score_and_alert(df)
     logger.info("Saved %d records to %s", len(df), json_output)
     if csv_output:
         logger.info("CSV saved to %s", csv_output)
@@ -66,6 +153,63 @@ def collect_and_save(
         logger.info("Database updated at %s", db_output)
 
 
+def _commit_acknowledged(watermark: Watermark, inflight: list) -> None:
+    """Commit the marks of finished batches that every durable sink stored."""
+    while inflight and all(f.done() for f in inflight[0][1]):
+        marks, futures = inflight.pop(0)
+        failed = [f.exception() for f in futures if f.exception() is not None]
+        if failed:
+            # the rows are fetched again next cycle; the sinks are idempotent
+            logger.warning("watermark_held", districts=len(marks), error=str(failed[0]))
+        else:
+            watermark.commit(marks)
+
+
+def run_daemon(
+    sinks: dict[str, Callable[[DataFrame], None]],
+    district: Optional[str] = None,
+    config: CollectorConfig | None = None,
+    daemon: DaemonConfig | None = None,
+    stop: threading.Event | None = None,
+) -> None:
+    """Collect every ``daemon.interval`` seconds until *stop* is set.
+
+    Each batch is handed to every sink and to risk alerting concurrently, so
+    a slow or failing sink only delays itself.  A failed fetch skips that
+    cycle.  With a watermark, a batch's marks advance only once every
+    storage sink has written it; until then its rows may be fetched again.
+    """
+    config = config or load_config()
+    daemon = daemon or load_daemon_config()
+    stop = stop or threading.Event()
+    watermark = Watermark(Path(config.watermark_path)) if config.watermark_path else None
+    fanout = FanOut({**sinks, "alerts": score_and_alert}, daemon.queue_size)
+    # (marks, futures of the storage sinks) per batch, oldest first
+    inflight: list = []
+    logger.info("collector_daemon_started", interval=daemon.interval, sinks=list(sinks))
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            if watermark is not None:
+                _commit_acknowledged(watermark, inflight)
+            try:
+                df = fetch_weather(district, config, watermark)
+            except Exception as exc:
+                logger.error("collect_failed", error=str(exc))
+            else:
+                if not df.empty:
+                    done = fanout.submit(df)
+                    if watermark is not None:
+                        inflight.append((watermark.detach(), [done[name] for name in sinks]))
+                logger.info("collect_cycle", records=len(df), seconds=time.monotonic() - started)
+            stop.wait(max(daemon.interval - (time.monotonic() - started), 0))
+    finally:
+        fanout.close()
+        if watermark is not None:
+            _commit_acknowledged(watermark, inflight)
+        logger.info("collector_daemon_stopped")
+
+
 def main() -> None:
     import argparse
 
@@ -76,15 +220,41 @@ def main() -> None:
         "--output", default="weather_data.json", help="Path to output JSON file"
     )
     parser.add_argument("--csv", help="Optional CSV output path")
+    parser.add_argument("--parquet", help="Optional Parquet archive directory")
+    parser.add_argument(
+        "--json-lines",
+        action="store_true",
+        help="Append new records as JSON Lines instead of rewriting the JSON file",
+    )
     parser.add_argument("--db", help="Optional SQLite database path")
     parser.add_argument("--db-url", help="TimescaleDB connection URL")
     parser.add_argument("--s3-bucket", help="Upload output to this S3 bucket")
     parser.add_argument("--s3-key", help="Key name when uploading to S3")
+    parser.add_argument(
+        "--s3-sync",
+        action="store_true",
+        help="Only upload changed files, including the Parquet archive under parquet/",
+    )
     parser.add_argument("--district", help="Filter for specific district")
     defaults = load_config()
     parser.add_argument("--retries", type=int, default=defaults.retries, help="Number of fetch retries")
     parser.add_argument("--retry-delay", type=int, default=defaults.retry_delay, help="Seconds between retries")
     parser.add_argument("--url", default=defaults.mgm_url, help="MGM API URL")
+    parser.add_argument(
+        "--watermark",
+        default=defaults.watermark_path,
+        help="JSON file of per-district high-water marks; only newer records are processed",
+    )
+    daemon_defaults = load_daemon_config()
+    parser.add_argument(
+        "--daemon", action="store_true", help="Keep running and collect on a schedule"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=daemon_defaults.interval, help="Seconds between daemon runs"
+    )
+    parser.add_argument(
+        "--sink-queue", type=int, default=daemon_defaults.queue_size, help="Batches buffered per sink"
+    )
     args = parser.parse_args()
 
     load_dotenv()
@@ -95,8 +265,38 @@ def main() -> None:
     db_path = Path(args.db) if args.db else None
     db_url = args.db_url
     config = CollectorConfig(
-        mgm_url=args.url, retries=args.retries, retry_delay=args.retry_delay
+        mgm_url=args.url,
+        retries=args.retries,
+        retry_delay=args.retry_delay,
+        watermark_path=args.watermark,
     )
+    if args.daemon:
+        import signal
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        sinks = build_sinks(
+            json_path,
+            csv_output=csv_path,
+            db_output=db_path,
+            db_url=db_url,
+            s3_bucket=args.s3_bucket,
+            s3_key=args.s3_key,
+            parquet_output=Path(args.parquet) if args.parquet else None,
+            json_lines=args.json_lines,
+            s3_sync=args.s3_sync,
+        )
+        try:
+            run_daemon(
+                sinks,
+                district=args.district,
+                config=config,
+                daemon=DaemonConfig(interval=args.interval, queue_size=args.sink_queue),
+                stop=stop,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
     collect_and_save(
         json_path,
         csv_output=csv_path,
@@ -106,8 +306,10 @@ def main() -> None:
         s3_key=args.s3_key,
         district=args.district,
         config=config,
+        parquet_output=Path(args.parquet) if args.parquet else None,
+        json_lines=args.json_lines,
+        s3_sync=args.s3_sync,
     )
 
-
 if __name__ == "__main__":
     main()
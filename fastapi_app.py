@@ -1,7 +1,7 @@
 from pathlib import Path
 import os
 from typing import List
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Header
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Header, Response
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
@@ -10,24 +10,36 @@ from prometheus_fastapi_instrumentator import Instrumentator
 import structlog
 import asyncio
 
-ASYNC = os.getenv("ASYNC_DB", "0") == "1"
+# ASYNC_DB: 0 = sqlite_storage in a thread, 1 = aiosqlite, pg = asyncpg
+# against TIMESCALE_URL
+ASYNC_DB = os.getenv("ASYNC_DB", "0")
+ASYNC = ASYNC_DB in ("1", "pg")
 
-if ASYNC:
+if ASYNC_DB == "pg":
+    from collector import async_pg_storage as storage
+elif ASYNC:
     from collector import async_storage as storage
 else:
     from collector import sqlite_storage as storage
+from collector.router import StorageRouter
 from collector.middlewares import RateLimitMiddleware
+from collector.sqlite_common import PAGE_SIZE
 from collector.logging_config import setup_logging
 from risk_analyzer import add_risk_column
 
 from services.legacy_harmony import start_guardian
 
-
-from services.legacy_harmony import start_guardian
-main 
-
+# with DB_REPLICAS set, reads go to healthy replicas and writes to the primary
+storage = StorageRouter.from_env(storage, path_targets=ASYNC_DB != "pg")
 DB_PATH = Path(os.getenv("WEATHER_DB", "weather.db"))
+DB_URL = os.getenv("TIMESCALE_URL")
 API_KEY = os.getenv("API_KEY")
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "10000"))
+
+def _db():
+    """Database the async backend talks to: a Postgres URL or SQLite path."""
+    return DB_URL if ASYNC_DB == "pg" else DB_PATH
+
 
 async def require_api_key(x_api_key: str = Header(default="")):
     if API_KEY and x_api_key != API_KEY:
@@ -38,24 +50,30 @@ logger = structlog.get_logger(__name__)
 
 async def lifespan(app: FastAPI):
     if ASYNC:
-        await storage.init_db(DB_PATH)
+        await storage.open_pool(_db())
     else:
         await asyncio.to_thread(storage.init_db, DB_PATH)
 
     start_guardian()
 
-
-    start_guardian()
-
- main
-
     yield
 
+    if ASYNC:
+        await storage.close_pool()
+    else:
+        storage.close_pool()
+
 app = FastAPI(title="Banksia API", lifespan=lifespan)
 
 redis_url = os.getenv("REDIS_URL")
 app.add_middleware(RateLimitMiddleware, max_requests=100, window=60, redis_url=redis_url)
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"])
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    # browsers hide response headers from scripts unless they are listed
+    expose_headers=["X-Next-Cursor"],
+)
 app.add_middleware(HTTPSRedirectMiddleware)
 
 # expose Prometheus metrics at /metrics
@@ -81,7 +99,7 @@ class WeatherRecord(BaseModel):
 async def latest_data(limit: int = 100, _=Depends(require_api_key)):
     try:
         if ASYNC:
-            df = await storage.query_latest(DB_PATH, limit)
+            df = await storage.query_latest(_db(), limit)
         else:
             df = await asyncio.to_thread(storage.query_latest, DB_PATH, limit)
     except Exception as exc:
@@ -94,7 +112,7 @@ async def latest_data(limit: int = 100, _=Depends(require_api_key)):
 async def by_district(name: str, limit: int = 100, _=Depends(require_api_key)):
     try:
         if ASYNC:
-            df = await storage.query_by_district(DB_PATH, name, limit)
+            df = await storage.query_by_district(_db(), name, limit)
         else:
             df = await asyncio.to_thread(storage.query_by_district, DB_PATH, name, limit)
     except Exception as exc:
@@ -116,12 +134,12 @@ class Stats(BaseModel):
 
 
 @app.get("/api/statistics", response_model=Stats)
-async def statistics(_=Depends(require_api_key)):
+async def statistics(district: str | None = None, _=Depends(require_api_key)):
     try:
         if ASYNC:
-            stats = await storage.get_statistics(DB_PATH)
+            stats = await storage.get_statistics(_db(), district)
         else:
-            stats = await asyncio.to_thread(storage.get_statistics, DB_PATH)
+            stats = await asyncio.to_thread(storage.get_statistics, DB_PATH, district)
     except Exception as exc:
         logger.error("stats_failed", error=str(exc))
         raise HTTPException(status_code=500, detail=str(exc))
@@ -157,7 +175,7 @@ async def websocket_weather(ws: WebSocket, api_key: str = Header(default="")):
         while True:
             await ws.receive_text()
             if ASYNC:
-                df = await storage.query_latest(DB_PATH, limit=1)
+                df = await storage.query_latest(_db(), limit=1)
             else:
                 df = await asyncio.to_thread(storage.query_latest, DB_PATH, 1)
             await manager.broadcast(df.to_json(orient="records"))
@@ -167,21 +185,39 @@ async def websocket_weather(ws: WebSocket, api_key: str = Header(default="")):
 
 @app.get("/api/data-range", response_model=List[WeatherRecord])
 async def data_range(
+    response: Response,
     start: str | None = None,
     end: str | None = None,
     districts: str | None = None,
     limit: int | None = None,
+    cursor: str | None = None,
     _=Depends(require_api_key),
 ):
+    """Return one page of rows ordered by ``(date, district)``.
+
+    *limit* is the page size, not the total number of rows: it defaults to
+    ``PAGE_SIZE`` and is capped at ``MAX_PAGE_SIZE``.  When more rows match,
+    the ``X-Next-Cursor`` header holds the token to pass as *cursor* for the
+    next page; its absence marks the last page.
+    """
+    page_size = min(limit or PAGE_SIZE, MAX_PAGE_SIZE)
     try:
         dlist = districts.split(",") if districts else None
         if ASYNC:
-            df = await storage.query_range(DB_PATH, start=start, end=end, districts=dlist, limit=limit)
+            df, next_cursor = await storage.query_range_page(
+                _db(), start=start, end=end, districts=dlist, page_size=page_size, cursor=cursor
+            )
         else:
-            df = await asyncio.to_thread(storage.query_range, DB_PATH, start, end, dlist, limit)
+            df, next_cursor = await asyncio.to_thread(
+                storage.query_range_page, DB_PATH, start, end, dlist, page_size, cursor
+            )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         logger.error("range_failed", error=str(exc))
         raise HTTPException(status_code=500, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return df.to_dict(orient="records")
 
 
@@ -194,7 +230,7 @@ async def hourly_avg(
 ):
     try:
         if ASYNC:
-            df = await storage.hourly_average(DB_PATH, start=start, end=end, district=district)
+            df = await storage.hourly_average(_db(), start=start, end=end, district=district)
         else:
             df = await asyncio.to_thread(storage.hourly_average, DB_PATH, start, end, district)
     except Exception as exc:
@@ -203,11 +239,29 @@ async def hourly_avg(
     return df.to_dict(orient="records")
 
 
+@app.get("/api/daily-average")
+async def daily_avg(
+    start: str | None = None,
+    end: str | None = None,
+    district: str | None = None,
+    _=Depends(require_api_key),
+):
+    try:
+        if ASYNC:
+            df = await storage.daily_average(_db(), start=start, end=end, district=district)
+        else:
+            df = await asyncio.to_thread(storage.daily_average, DB_PATH, start, end, district)
+    except Exception as exc:
+        logger.error("avg_failed", error=str(exc))
+        raise HTTPException(status_code=500, detail=str(exc))
+    return df.to_dict(orient="records")
+
+
 @app.get("/api/risk-score")
 async def risk_score_endpoint(limit: int = 100, _=Depends(require_api_key)):
     try:
         if ASYNC:
-            df = await storage.query_latest(DB_PATH, limit)
+            df = await storage.query_latest(_db(), limit)
         else:
             df = await asyncio.to_thread(storage.query_latest, DB_PATH, limit)
         df = add_risk_column(df)
@@ -1,18 +1,134 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import os
+import threading
+import time
+import uuid
 
+import structlog
+
+from collector.processor import district_key
 from data_collector import collect_and_save
 
-app = FastAPI(title="Collector Service")
+logger = structlog.get_logger(__name__)
 
 JSON_OUTPUT = Path(os.getenv("JSON_OUTPUT", "weather_data.json"))
 CSV_OUTPUT = os.getenv("CSV_OUTPUT")
 DB_OUTPUT = os.getenv("WEATHER_DB")
+COLLECT_WORKERS = int(os.getenv("COLLECT_WORKERS", "2"))
+JOB_HISTORY = int(os.getenv("COLLECT_JOB_HISTORY", "100"))
+
+# jobs fetch concurrently but share JSON_OUTPUT, the CSV and the database,
+# so their writes take turns
+_write_lock = threading.Lock()
+
+
+@dataclass
+class Job:
+    id: str
+    district: str | None
+    status: str = "queued"
+    requests: int = 1
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def as_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "district": self.district,
+            "status": self.status,
+            "requests": self.requests,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": (self.started_at or end) - self.created_at,
+            "run_seconds": end - self.started_at if self.started_at else None,
+        }
+
+
+class JobQueue:
+    """Runs collections on a worker pool, one job per district at a time.
+
+    A request for a district that already has a queued or running job joins
+    that job instead of starting another collection.  Finished jobs are kept
+    for ``history`` lookups.
+    """
+
+    def __init__(self, workers: int, history: int) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collect")
+        self.history = history
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.active: dict[str, Job] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, district: str | None) -> Job:
+        key = district_key(district) if district else ""
+        with self.lock:
+            job = self.active.get(key)
+            if job is not None:
+                job.requests += 1
+                return job
+            job = Job(uuid.uuid4().hex, district)
+            self.active[key] = self.jobs[job.id] = job
+            self._trim()
+        self.executor.submit(self._run, job, key)
+        return job
 
-@app.post("/collect")
+    def get(self, job_id: str) -> Job | None:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _trim(self) -> None:
+        finished = [j for j in self.jobs.values() if j.finished_at is not None]
+        for job in finished[: max(len(self.jobs) - self.history, 0)]:
+            del self.jobs[job.id]
+
+    def _run(self, job: Job, key: str) -> None:
+        job.started_at = time.time()
+        job.status = "running"
+        status, error = "failed", "interrupted"
+        try:
+            csv_path = Path(CSV_OUTPUT) if CSV_OUTPUT else None
+            db_path = Path(DB_OUTPUT) if DB_OUTPUT else None
+            collect_and_save(
+                JSON_OUTPUT,
+                csv_output=csv_path,
+                db_output=db_path,
+                district=job.district,
+                write_lock=_write_lock,
+            )
+        except Exception as exc:
+            status, error = "failed", str(exc)
+            logger.error("collect_job_failed", job=job.id, error=error)
+        else:
+            status, error = "succeeded", None
+        finally:
+            with self.lock:
+                job.status, job.error, job.finished_at = status, error, time.time()
+                self.active.pop(key, None)
+
+
+jobs = JobQueue(COLLECT_WORKERS, JOB_HISTORY)
+
+app = FastAPI(title="Collector Service")
+
+
+@app.post("/collect", status_code=202)
 async def collect(district: str | None = None):
-    csv_path = Path(CSV_OUTPUT) if CSV_OUTPUT else None
-    db_path = Path(DB_OUTPUT) if DB_OUTPUT else None
-    collect_and_save(JSON_OUTPUT, csv_output=csv_path, db_output=db_path, district=district)
-    return {"status": "ok"}
+    job = jobs.submit(district)
+    return {"status": job.status, "job_id": job.id}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.as_dict()
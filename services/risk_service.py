@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from pathlib import Path
+import asyncio
 import os
 from typing import List
 
 from collector import sqlite_storage, timescale_storage
+from collector.engines import dispose_engines
+from collector.router import StorageRouter
 from risk_analyzer import add_risk_column, load_model, predict_with_model
 from fastapi_app import WeatherRecord
 from pydantic import BaseModel
@@ -13,11 +16,25 @@ async def lifespan(app: FastAPI):
     global _model
     if MODEL_PATH.exists():
         _model = load_model(str(MODEL_PATH))
+    if ASYNC_PG:
+        await async_pg_storage.open_pool(DB_URL)
     yield
+    if ASYNC_PG:
+        await async_pg_storage.close_pool()
+    dispose_engines()
 
 app = FastAPI(title="Risk Service", lifespan=lifespan)
 DB_PATH = Path(os.getenv("WEATHER_DB", "weather.db"))
 DB_URL = os.getenv("TIMESCALE_URL")
+ASYNC_PG = bool(DB_URL) and os.getenv("ASYNC_DB", "0") == "pg"
+if ASYNC_PG:
+    from collector import async_pg_storage
+
+    reader = StorageRouter.from_env(async_pg_storage)
+elif DB_URL:
+    reader = StorageRouter.from_env(timescale_storage)
+else:
+    reader = StorageRouter.from_env(sqlite_storage, path_targets=True)
 MODEL_PATH = Path(os.getenv("MODEL_PATH", "models/model.joblib"))
 _model = None
 
@@ -26,12 +43,17 @@ class WeatherRecordWithRisk(WeatherRecord):
     risk: float
 
 
+async def _load(limit: int):
+    if ASYNC_PG:
+        return await reader.query_latest(DB_URL, limit)
+    if DB_URL:
+        return await asyncio.to_thread(reader.query_range_ts, DB_URL, limit=limit)
+    return await asyncio.to_thread(reader.query_latest, DB_PATH, limit)
+
+
 @app.get("/risk", response_model=List[WeatherRecord])
 async def risk(limit: int = 100):
-    if DB_URL:
-        df = timescale_storage.query_range_ts(DB_URL, limit=limit)
-    else:
-        df = sqlite_storage.query_latest(DB_PATH, limit)
+    df = await _load(limit)
     df = add_risk_column(df)
     return df.to_dict(orient="records")
 
@@ -40,10 +62,7 @@ async def risk(limit: int = 100):
 async def risk_ml(limit: int = 100):
     if _model is None:
         raise RuntimeError("Model not loaded")
-    if DB_URL:
-        df = timescale_storage.query_range_ts(DB_URL, limit=limit)
-    else:
-        df = sqlite_storage.query_latest(DB_PATH, limit)
+    df = await _load(limit)
     preds = predict_with_model(_model, df)
     df = df.assign(risk=preds)
     return df.to_dict(orient="records")
@@ -2,18 +2,31 @@ import importlib
 import sys
 
 modules = [
+    'tests.test_async_fetch',
+    'tests.test_async_pg_storage',
     'tests.test_async_storage',
     'tests.test_data_collector',
+    'tests.test_engines',
+    'tests.test_fanout',
+    'tests.test_http_cache',
+    'tests.test_influx_storage',
     'tests.test_kafka_streamer',
     'tests.test_metrics',
     'tests.test_mgm_client',
+    'tests.test_parquet_storage',
+    'tests.test_postgres_storage',
     'tests.test_processor',
+    'tests.test_resilience',
     'tests.test_risk',
+    'tests.test_router',
     'tests.test_s3_storage',
     'tests.test_satellite_client',
     'tests.test_services',
     'tests.test_sqlite_storage',
+    'tests.test_storage',
+    'tests.test_timescale_storage',
     'tests.test_visualize',
+    'tests.test_watermark',
 ]
 
 for m in modules:
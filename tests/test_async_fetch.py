@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import httpx
+import pandas as pd
+import pytest
+
+from collector import async_fetch
+from collector.async_fetch import close_fetcher, fetch_all, fetch_all_sync, get_fetcher
+from collector.config import CollectorConfig, FetchConfig, RetryPolicy
+
+MGM = [{"istNo": 1, "ilce": "A", "veriZamani": "2024-01-01T00:00:00", "sicaklik": 20}]
+SOURCES = {
+    "modis": "http://firms.test/modis.csv",
+    "viirs": "http://firms.test/viirs.csv",
+    "effis": "http://effis.test/fire.csv",
+}
+
+
+def _transport(delay=0.0, fail=()):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        if request.url.path in fail:
+            return httpx.Response(500)
+        if request.url.host == "mgm.test":
+            return httpx.Response(200, json=MGM)
+        return httpx.Response(200, text="latitude,longitude,brightness\n1,2,300\n")
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_runs_concurrently():
+    get_fetcher(FetchConfig(per_host=4), _transport(delay=0.2))
+    config = CollectorConfig(mgm_url="http://mgm.test/sonDurumlar", retries=1)
+    started = time.perf_counter()
+    try:
+        results = await fetch_all(config, SOURCES)
+    finally:
+        await close_fetcher()
+    assert time.perf_counter() - started < 0.6
+    assert list(results) == ["mgm", "modis", "viirs", "effis"]
+    assert results["mgm"].iloc[0]["ilce"] == "A"
+    assert list(results["modis"].columns) == ["latitude", "longitude", "brightness"]
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_serialises_requests():
+    get_fetcher(FetchConfig(per_host=1), _transport(delay=0.1))
+    sources = {"modis": SOURCES["modis"], "viirs": SOURCES["viirs"]}
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(async_fetch.fetch_csv_async(u, n) for n, u in sources.items()))
+    finally:
+        await close_fetcher()
+    assert time.perf_counter() - started >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_return_exceptions():
+    get_fetcher(transport=_transport(fail=("/viirs.csv",)))
+    config = CollectorConfig(mgm_url="http://mgm.test/sonDurumlar", retries=1)
+    try:
+        results = await fetch_all(
+            config, SOURCES, return_exceptions=True, policy=RetryPolicy(attempts=1)
+        )
+    finally:
+        await close_fetcher()
+    assert isinstance(results["viirs"], httpx.HTTPStatusError)
+    assert isinstance(results["effis"], pd.DataFrame)
+
+
+def test_fetch_all_sync(mocker):
+    original = async_fetch.Fetcher.__init__
+
+    def init(self, config=None, transport=None):
+        original(self, config, _transport())
+
+    mocker.patch.object(async_fetch.Fetcher, "__init__", init)
+    config = CollectorConfig(mgm_url="http://mgm.test/sonDurumlar", retries=1)
+    results = fetch_all_sync(config, {"effis": SOURCES["effis"]})
+    assert set(results) == {"mgm", "effis"}
+    assert len(async_fetch._fetchers) == 0
+
+
+def test_fetcher_per_loop_is_not_replaced():
+    async def use(close=False):
+        fetcher = get_fetcher(transport=_transport())
+        assert get_fetcher() is fetcher
+        if close:
+            await close_fetcher()
+        return fetcher
+
+    async def both():
+        first = await use()
+        # a second loop in another thread gets its own client...
+        other = await asyncio.to_thread(asyncio.run, use(close=True))
+        assert other is not first
+        # ...and this loop keeps using, and can still close, its own
+        assert get_fetcher() is first
+        await close_fetcher()
+        assert first.client.is_closed
+
+    asyncio.run(both())
@@ -0,0 +1,117 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from collector import async_pg_storage
+
+PG_TEST_URL = os.getenv("PG_TEST_URL")
+
+
+def test_range_query_binds_typed_params():
+    sql, params = async_pg_storage.range_query(
+        start="2024-01-01", districts=["Muğla"], limit=10, after=("2024-01-02 10:00", "Muğla")
+    )
+    assert "date >= $1::timestamptz" in sql
+    assert "district_key = ANY($2::text[])" in sql
+    assert "(date, district) > ($3::timestamptz, $4)" in sql
+    assert sql.endswith("ORDER BY date, district LIMIT $5")
+    assert params == [
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        ["mugla"],
+        datetime(2024, 1, 2, 10, tzinfo=timezone.utc),
+        "Muğla",
+        10,
+    ]
+
+
+def test_records_dedupe_and_convert():
+    df = pd.DataFrame([
+        {"district": "Datça", "date": "2024-01-01", "temp": 20, "humidity": None, "wind_speed": 5},
+        {"district": "Datça", "date": "2024-01-01", "temp": 21, "humidity": 40, "wind_speed": 5},
+    ])
+    (record,) = async_pg_storage._records(df)
+    assert record == ("Datça", datetime(2024, 1, 1, tzinfo=timezone.utc), 21.0, 40.0, 5.0, "datca")
+
+
+@pytest.mark.asyncio
+async def test_open_pool_creates_one_pool_and_closes_on_failure(mocker):
+    pool = mocker.MagicMock()
+    pool.close = mocker.AsyncMock()
+    create = mocker.patch("asyncpg.create_pool", mocker.AsyncMock(return_value=pool))
+    init = mocker.patch.object(async_pg_storage, "_init_schema", mocker.AsyncMock())
+    url = "postgresql://u@h/db"
+    try:
+        pools = await asyncio.gather(*(async_pg_storage.open_pool(url) for _ in range(3)))
+        assert pools == [pool] * 3
+        assert create.await_count == 1
+        await async_pg_storage.close_pool()
+
+        init.side_effect = RuntimeError("ddl failed")
+        pool.close.reset_mock()
+        with pytest.raises(RuntimeError):
+            await async_pg_storage.open_pool(url)
+        pool.close.assert_awaited_once()
+        assert url not in async_pg_storage._pools
+    finally:
+        async_pg_storage._pools.clear()
+
+
+async def _fresh_table():
+    import asyncpg
+
+    conn = await asyncpg.connect(async_pg_storage._dsn(PG_TEST_URL))
+    try:
+        await conn.execute("DROP TABLE IF EXISTS weather CASCADE")
+    finally:
+        await conn.close()
+
+
+@pytest.mark.skipif(not PG_TEST_URL, reason="PG_TEST_URL not set")
+@pytest.mark.asyncio
+async def test_async_pg_roundtrip():
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01 10:00", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "A", "date": "2024-01-01T18:00:00+03:00", "temp": 30, "humidity": 70, "wind_speed": 9},
+    ])
+    await _fresh_table()
+    try:
+        pool = await async_pg_storage.open_pool(PG_TEST_URL)
+        column = await pool.fetchval(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'weather' AND column_name = 'date'"
+        )
+        assert column == "timestamp with time zone"
+        first = await async_pg_storage.append_to_db(df, PG_TEST_URL)
+        assert (first.inserted, first.updated) == (2, 0)
+        again = await async_pg_storage.append_to_db(df.assign(temp=[21, 31]), PG_TEST_URL)
+        assert (again.inserted, again.updated) == (0, 2)
+        page, cursor = await async_pg_storage.query_range_page(PG_TEST_URL, page_size=1)
+        assert len(page) == 1 and cursor
+        rest, _ = await async_pg_storage.query_range_page(PG_TEST_URL, page_size=5, cursor=cursor)
+        assert rest["temp"].tolist() == [31]
+        window = await async_pg_storage.query_range(
+            PG_TEST_URL, start="2024-01-01T14:00:00Z", end="2024-01-01T16:00:00Z"
+        )
+        assert window["temp"].tolist() == [31]
+        stats = await async_pg_storage.get_statistics(PG_TEST_URL, "a")
+        assert stats["avg_temp"] == 26
+    finally:
+        await async_pg_storage.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_replica_lag_skips_schema(mocker):
+    pool = mocker.MagicMock()
+    pool.fetchval = mocker.AsyncMock(return_value=12.5)
+    mocker.patch("asyncpg.create_pool", mocker.AsyncMock(return_value=pool))
+    init = mocker.patch.object(async_pg_storage, "_init_schema", mocker.AsyncMock())
+    try:
+        lag = await async_pg_storage.replica_lag("postgresql://p/db", "postgresql://r/db")
+        assert lag == 12.5
+        init.assert_not_awaited()
+        assert await async_pg_storage.open_pool("postgresql://r/db") is pool
+    finally:
+        async_pg_storage._pools.clear()
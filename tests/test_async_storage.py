@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from pathlib import Path
 import pandas as pd
@@ -16,3 +17,78 @@ async def test_async_append_and_query(tmp_path: Path):
     out = await async_storage.query_latest(db, limit=1)
     assert len(out) == 1
     assert out.iloc[0]["district"] == "A"
+
+
+@pytest.mark.asyncio
+async def test_async_append_is_idempotent(tmp_path: Path):
+    db = tmp_path / "async.db"
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "B", "date": "2024-01-01", "temp": 21, "humidity": 51, "wind_speed": 6},
+    ])
+    first = await async_storage.append_to_db(df, db)
+    assert (first.inserted, first.updated) == (2, 0)
+    second = await async_storage.append_to_db(df.assign(temp=30), db, chunk_size=1)
+    assert (second.inserted, second.updated) == (0, 2)
+    out = await async_storage.query_latest(db, limit=10)
+    assert set(out["temp"]) == {30}
+
+
+@pytest.mark.asyncio
+async def test_async_daily_average(tmp_path: Path):
+    db = tmp_path / "async.db"
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01 10:00", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "A", "date": "2024-01-01 18:00", "temp": 30, "humidity": 70, "wind_speed": 9},
+    ])
+    await async_storage.append_to_db(df, db)
+    daily = await async_storage.daily_average(db, district="A")
+    assert list(daily["day"]) == ["2024-01-01"]
+    assert daily.iloc[0]["avg_temp"] == 25
+    hourly = await async_storage.hourly_average(db)
+    assert len(hourly) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_pool_reuses_connections(tmp_path: Path, mocker):
+    from collector.config import SQLiteConfig
+
+    db = tmp_path / "async.db"
+    pool = await async_storage.open_pool(db, SQLiteConfig(async_readers=2))
+    try:
+        connect = mocker.spy(async_storage.aiosqlite, "connect")
+        df = pd.DataFrame([
+            {"district": "A", "date": f"2024-01-0{i}", "temp": 20 + i, "humidity": 50, "wind_speed": 5}
+            for i in range(1, 4)
+        ])
+        await async_storage.append_to_db(df, db)
+        results = await asyncio.gather(
+            *(async_storage.query_latest(db, limit=10) for _ in range(5))
+        )
+        assert all(len(out) == 3 for out in results)
+        stats = await async_storage.get_statistics(db, "A")
+        assert stats["max_temp"] == 23
+        assert connect.call_count == 0
+        assert pool.readers.qsize() == 2
+        async with pool.read() as conn:
+            cursor = await conn.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == "wal"
+    finally:
+        await async_storage.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_async_current_schema_skips_ddl(tmp_path: Path, mocker):
+    from collector import sqlite_common
+
+    db = tmp_path / "async.db"
+    await async_storage.init_db(db)
+    statements = mocker.spy(sqlite_common, "schema_statements")
+    connect = mocker.spy(async_storage.aiosqlite, "connect")
+    await async_storage.append_to_db(pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+    ]), db)
+    assert len(await async_storage.query_latest(db, 1)) == 1
+    statements.assert_not_called()
+    # one connection per call, no second one just to check the schema
+    assert connect.call_count == 2
@@ -1,5 +1,6 @@
 import pandas as pd
 from pathlib import Path
+from collector.config import S3Config
 from data_collector import collect_and_save
 
 
@@ -48,3 +49,122 @@ def test_collect_s3_upload(tmp_path, mocker):
     out = tmp_path / "file.json"
     collect_and_save(out, s3_bucket="bucket", s3_key="k")
     upload_mock.assert_called_once()
+
+
+def test_collect_s3_sync(tmp_path, mocker):
+    df = pd.DataFrame([
+        {
+            "district": "B",
+            "date": "2024-01-02",
+            "temp": 21,
+            "humidity": 40,
+            "wind_speed": 3,
+        }
+    ])
+    mocker.patch("data_collector.fetch_latest_weather", return_value=df)
+    upload_mock = mocker.patch("data_collector.upload_file")
+    file_mock = mocker.patch("data_collector.sync_file")
+    dir_mock = mocker.patch("data_collector.sync_dir")
+    mocker.patch(
+        "data_collector.load_s3_config",
+        return_value=S3Config(parquet_prefix="lake/weather", sync_delete=True),
+    )
+    out = tmp_path / "file.json"
+    parquet = tmp_path / "parquet"
+    collect_and_save(out, s3_bucket="bucket", s3_key="k", parquet_output=parquet, s3_sync=True)
+    upload_mock.assert_not_called()
+    file_mock.assert_called_once_with(out, "bucket", "k")
+    dir_mock.assert_called_once_with(parquet, "bucket", "lake/weather", delete=True)
+
+
+def test_collect_watermark_skips_seen_rows(tmp_path, mocker):
+    from collector import CollectorConfig
+
+    sample = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01T10:00:00", "temp": 20, "humidity": 50, "wind_speed": 5},
+    ])
+    newer = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01T10:00:00", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "A", "date": "2024-01-01T11:00:00", "temp": 21, "humidity": 50, "wind_speed": 5},
+    ])
+    mocker.patch("data_collector.fetch_latest_weather", side_effect=[sample, sample, newer])
+    json_mock = mocker.patch("data_collector.append_json")
+    config = CollectorConfig(watermark_path=str(tmp_path / "marks.json"))
+    out = tmp_path / "out.json"
+
+    collect_and_save(out, config=config)
+    collect_and_save(out, config=config)
+    collect_and_save(out, config=config)
+
+    assert json_mock.call_count == 2
+    assert len(json_mock.call_args.args[0]) == 1
+
+
+def test_run_daemon_fans_out_until_stopped(mocker):
+    import threading
+
+    from collector import DaemonConfig
+    from data_collector import run_daemon
+
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+    ])
+    fetch = mocker.patch(
+        "data_collector.fetch_latest_weather", side_effect=[RuntimeError("down"), df, df]
+    )
+    mocker.patch("data_collector.score_and_alert")
+    stop = threading.Event()
+    written = []
+
+    def sink(batch):
+        written.append(len(batch))
+        stop.set()
+
+    run_daemon({"memory": sink}, daemon=DaemonConfig(interval=0, queue_size=2), stop=stop)
+    assert fetch.call_count >= 2
+    assert written[0] == 1
+
+
+def test_run_daemon_holds_watermark_until_sinks_store(tmp_path, mocker):
+    import json
+    import threading
+
+    from collector import CollectorConfig, DaemonConfig
+    from data_collector import run_daemon
+
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01T10:00:00", "temp": 20, "humidity": 50, "wind_speed": 5},
+    ])
+    mocker.patch("data_collector.fetch_latest_weather", return_value=df)
+    mocker.patch("data_collector.score_and_alert")
+    marks = tmp_path / "marks.json"
+    stop = threading.Event()
+    written = []
+
+    def flaky(batch):
+        written.append((len(batch), marks.exists()))
+        if len(written) == 1:
+            raise RuntimeError("db down")
+        stop.set()
+
+    run_daemon(
+        {"db": flaky},
+        config=CollectorConfig(watermark_path=str(marks)),
+        daemon=DaemonConfig(interval=0.01, queue_size=1),
+        stop=stop,
+    )
+    # the failed write left the mark alone, so the same row came back
+    assert written[:2] == [(1, False), (1, False)]
+    assert json.loads(marks.read_text()) == {"a": "2024-01-01T10:00:00"}
+
+
+def test_fetch_weather_matches_district_key(mocker):
+    from data_collector import fetch_weather
+
+    df = pd.DataFrame([
+        {"district": "Kadıköy", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "Üsküdar", "date": "2024-01-01", "temp": 21, "humidity": 50, "wind_speed": 5},
+    ])
+    mocker.patch("data_collector.fetch_latest_weather", return_value=df)
+    # "KADIKÖY".lower() is "kadiköy", which a plain lower() never matches
+    assert fetch_weather("KADIKÖY")["district"].tolist() == ["Kadıköy"]
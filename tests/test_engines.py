@@ -0,0 +1,39 @@
+from sqlalchemy import text
+
+from collector import engines
+from collector.config import DatabaseConfig
+from collector.metrics import DB_POOL_CHECKOUTS
+
+
+def test_get_engine_is_cached_per_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'a.db'}"
+    try:
+        first = engines.get_engine(url)
+        assert engines.get_engine(url) is first
+        assert engines.get_engine(f"sqlite:///{tmp_path / 'b.db'}") is not first
+    finally:
+        engines.dispose_engines()
+    assert engines.get_engine(url) is not first
+    engines.dispose_engines()
+
+
+def test_begin_records_pool_metrics(tmp_path):
+    url = f"sqlite:///{tmp_path / 'm.db'}"
+    label = engines.pool_label(url)
+    before = DB_POOL_CHECKOUTS.labels(label)._value.get()
+    try:
+        for _ in range(3):
+            with engines.begin(url) as conn:
+                assert conn.execute(text("SELECT 1")).scalar() == 1
+    finally:
+        engines.dispose_engines()
+    assert DB_POOL_CHECKOUTS.labels(label)._value.get() - before == 3
+
+
+def test_engine_options_for_postgres():
+    config = DatabaseConfig(pool_size=3, max_overflow=1, pool_recycle=60, statement_timeout=5000)
+    options = engines.engine_options("postgresql://u:secret@db/weather", config)
+    assert options["pool_size"] == 3
+    assert options["pool_recycle"] == 60
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert engines.pool_label("postgresql://u:secret@db/weather") == "db/weather"
@@ -0,0 +1,57 @@
+import threading
+
+import pandas as pd
+
+from collector.fanout import BatchDropped, FanOut
+from collector.metrics import SINK_DROPPED, SINK_ERRORS, SINK_LAG_SECONDS
+
+
+def test_slow_and_failing_sinks_are_isolated():
+    release = threading.Event()
+    written = []
+
+    def slow(df):
+        release.wait(5)
+        written.append(("slow", len(df)))
+
+    def broken(df):
+        raise RuntimeError("down")
+
+    errors = SINK_ERRORS.labels("broken")._value.get()
+    fanout = FanOut({"slow": slow, "broken": broken, "fast": lambda df: written.append(("fast", len(df)))})
+    done = fanout.submit(pd.DataFrame({"a": [1, 2]}))
+    fanout.submit(pd.DataFrame({"a": [3]}))
+    fanout.workers[2].queue.join()
+    assert done["fast"].result() is None and not done["slow"].done()
+    assert written == [("fast", 2), ("fast", 1)]
+
+    release.set()
+    fanout.close(timeout=5)
+    assert written[2:] == [("slow", 2), ("slow", 1)]
+    assert SINK_ERRORS.labels("broken")._value.get() == errors + 2
+    assert isinstance(done["broken"].exception(), RuntimeError)
+    assert SINK_LAG_SECONDS.labels("fast")._value.get() >= 0
+
+
+def test_full_queue_drops_oldest_batch():
+    release = threading.Event()
+    started = threading.Event()
+    written = []
+
+    def stuck(df):
+        started.set()
+        release.wait(5)
+        written.append(df["a"].iloc[0])
+
+    dropped = SINK_DROPPED.labels("stuck")._value.get()
+    fanout = FanOut({"stuck": stuck}, queue_size=1)
+    futures = [fanout.submit(pd.DataFrame({"a": [1]}))["stuck"]]
+    started.wait(5)
+    for value in (2, 3, 4):
+        futures.append(fanout.submit(pd.DataFrame({"a": [value]}))["stuck"])
+    release.set()
+    fanout.close(timeout=5)
+    assert written == [1, 4]
+    assert [f.exception() is None for f in futures] == [True, False, False, True]
+    assert isinstance(futures[1].exception(), BatchDropped)
+    assert SINK_DROPPED.labels("stuck")._value.get() == dropped + 2
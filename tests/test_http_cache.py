@@ -0,0 +1,99 @@
+import io
+import os
+
+import pandas as pd
+
+from collector import http_cache
+from collector.config import HttpCacheConfig
+from collector.http_cache import ResponseCache, fetch_frame
+from collector.metrics import HTTP_CACHE_BYTES_SAVED, HTTP_CACHE_HITS, HTTP_CACHE_MISSES
+from collector.satellite_client import fetch_modis_data
+
+CSV = "latitude,longitude,brightness\n1,2,300\n"
+
+
+def _response(mocker, status=200, text=CSV, headers=None):
+    response = mocker.Mock()
+    response.status_code = status
+    response.text = text
+    response.content = text.encode()
+    response.headers = headers or {}
+    response.raise_for_status.return_value = None
+    return response
+
+
+def _parse(response):
+    return pd.read_csv(io.StringIO(response.text))
+
+
+def test_revalidates_and_serves_cached_frame(tmp_path, mocker):
+    cache = ResponseCache(tmp_path, ttl=60, max_bytes=10**6)
+    get = mocker.patch("requests.get", side_effect=[
+        _response(mocker, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        _response(mocker, status=304, text=""),
+    ])
+    hits = HTTP_CACHE_HITS.labels("test")._value.get()
+    misses = HTTP_CACHE_MISSES.labels("test")._value.get()
+    saved = HTTP_CACHE_BYTES_SAVED.labels("test")._value.get()
+
+    first = fetch_frame("http://x/a.csv", "test", _parse, cache=cache)
+    parse = mocker.Mock()
+    second = fetch_frame("http://x/a.csv", "test", parse, cache=cache)
+
+    pd.testing.assert_frame_equal(first, second)
+    parse.assert_not_called()
+    assert get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert HTTP_CACHE_HITS.labels("test")._value.get() == hits + 1
+    assert HTTP_CACHE_MISSES.labels("test")._value.get() == misses + 1
+    assert HTTP_CACHE_BYTES_SAVED.labels("test")._value.get() == saved + len(CSV)
+
+
+def test_changed_response_replaces_entry(tmp_path, mocker):
+    cache = ResponseCache(tmp_path, ttl=60, max_bytes=10**6)
+    mocker.patch("requests.get", side_effect=[
+        _response(mocker, headers={"ETag": '"v1"'}),
+        _response(mocker, text=CSV + "3,4,310\n", headers={"ETag": '"v2"'}),
+    ])
+    fetch_frame("http://x/a.csv", "test", _parse, cache=cache)
+    df = fetch_frame("http://x/a.csv", "test", _parse, cache=cache)
+    assert len(df) == 2
+    assert cache.get("http://x/a.csv")["etag"] == '"v2"'
+
+
+def test_expired_entry_is_not_revalidated(tmp_path, mocker):
+    cache = ResponseCache(tmp_path, ttl=0, max_bytes=10**6)
+    get = mocker.patch("requests.get", return_value=_response(mocker, headers={"ETag": '"v1"'}))
+    fetch_frame("http://x/a.csv", "test", _parse, cache=cache)
+    mocker.patch("time.time", return_value=http_cache.time.time() + 10)
+    fetch_frame("http://x/a.csv", "test", _parse, cache=cache)
+    assert get.call_args.kwargs["headers"] == {}
+
+
+def test_evicts_least_recently_used(tmp_path, mocker):
+    cache = ResponseCache(tmp_path, ttl=60, max_bytes=10**6)
+    mocker.patch("requests.get", return_value=_response(mocker, headers={"ETag": '"v1"'}))
+    fetch_frame("http://x/a.csv", "test", _parse, cache=cache)
+    meta, frame = cache._paths("http://x/a.csv")
+    os.utime(meta, (1, 1))
+    cache.max_bytes = frame.stat().st_size
+    fetch_frame("http://x/b.csv", "test", _parse, cache=cache)
+    assert cache.get("http://x/a.csv") is None
+    assert cache.get("http://x/b.csv") is not None
+
+
+def test_satellite_client_uses_cache(tmp_path, mocker):
+    mocker.patch.object(http_cache, "_caches", {})
+    mocker.patch.object(
+        http_cache, "load_http_cache_config",
+        return_value=HttpCacheConfig(directory=str(tmp_path), ttl=60, max_bytes=10**6),
+    )
+    mocker.patch("requests.get", side_effect=[
+        _response(mocker, headers={"ETag": '"v1"'}),
+        _response(mocker, status=304, text=""),
+    ])
+    first = fetch_modis_data("http://x/modis.csv")
+    second = fetch_modis_data("http://x/modis.csv")
+    pd.testing.assert_frame_equal(first, second)
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from collector import influx_storage
+from collector.influx_storage import to_line_protocol, write_to_influx
+
+
+def test_to_line_protocol():
+    df = pd.DataFrame([
+        {"district": "Muğla Merkez", "date": "2024-01-01T10:00:00Z", "temp": 20, "humidity": None, "wind_speed": 5.5},
+        {"district": "a,b=c", "date": "2024-01-01", "temp": 1, "humidity": 40, "wind_speed": 2},
+        {"district": "X", "date": "2024-01-02", "temp": None, "humidity": None, "wind_speed": None},
+    ])
+    assert to_line_protocol(df) == [
+        "weather,district=Muğla\\ Merkez temp=20.0,wind_speed=5.5 1704103200000000000",
+        "weather,district=a\\,b\\=c temp=1.0,humidity=40.0,wind_speed=2.0 1704067200000000000",
+    ]
+
+
+def test_write_to_influx_reuses_client(mocker):
+    client_cls = mocker.patch("collector.influx_storage.InfluxDBClient")
+    write_api = client_cls.return_value.write_api.return_value
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+    ])
+    try:
+        write_to_influx(df, "http://influx", "t", "o", "b")
+        write_to_influx(df, "http://influx", "t", "o", "b")
+        assert client_cls.call_count == 1
+        assert write_api.write.call_count == 2
+        assert write_api.write.call_args.kwargs["record"] == to_line_protocol(df)
+    finally:
+        influx_storage.close_writers()
+    write_api.close.assert_called_once()
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from collector import parquet_storage
+from collector.parquet_storage import append_parquet, compact_parquet, read_parquet_range
+
+
+def _rows(temp):
+    return pd.DataFrame([
+        {"district": "Muğla", "date": "2024-01-31T23:00:00Z", "temp": temp, "humidity": 50, "wind_speed": 5},
+        {"district": "Antalya", "date": "2024-02-01T10:00:00Z", "temp": temp, "humidity": 40, "wind_speed": 3},
+    ])
+
+
+def test_append_parquet_partitions_by_month_and_district(tmp_path):
+    written = append_parquet(_rows(20), tmp_path)
+    assert len(written) == 2
+    assert (tmp_path / "month=2024-01" / "district=mugla").is_dir()
+    assert (tmp_path / "month=2024-02" / "district=antalya").is_dir()
+
+    out = read_parquet_range(tmp_path, start="2024-02-01", districts=["ANTALYA"])
+    assert list(out["district"]) == ["Antalya"]
+    assert read_parquet_range(tmp_path, end="2024-01-15").empty
+
+
+def test_compaction_keeps_newest_rows(tmp_path):
+    append_parquet(_rows(20), tmp_path)
+    append_parquet(_rows(25), tmp_path)
+    partition = tmp_path / "month=2024-01" / "district=mugla"
+    assert len(list(partition.glob("part-*.parquet"))) == 2
+    assert read_parquet_range(tmp_path)["temp"].tolist() == [25, 25]
+
+    assert compact_parquet(tmp_path) == 2
+    assert len(list(partition.glob("part-*.parquet"))) == 1
+    append_parquet(_rows(30), tmp_path)
+    assert read_parquet_range(tmp_path)["temp"].tolist() == [30, 30]
+
+
+def test_append_parquet_compacts_after_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(parquet_storage, "COMPACT_AFTER", 2)
+    for temp in (1, 2, 3):
+        append_parquet(_rows(temp).iloc[:1], tmp_path)
+    partition = tmp_path / "month=2024-01" / "district=mugla"
+    assert len(list(partition.glob("part-*.parquet"))) == 1
+    assert read_parquet_range(tmp_path)["temp"].tolist() == [3]
+
+
+def test_append_parquet_accepts_mixed_iso_dates(tmp_path):
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01T10:00:00Z", "temp": 1},
+        {"district": "A", "date": "2024-01-02", "temp": 2},
+        {"district": "A", "date": "2024-01-03 10:00", "temp": 3},
+    ])
+    append_parquet(df, tmp_path)
+    assert read_parquet_range(tmp_path)["temp"].tolist() == [1, 2, 3]
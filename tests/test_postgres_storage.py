@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from collector import postgres_storage
+from collector.postgres_storage import copy_upsert, merge_sql
+
+PG_TEST_URL = os.getenv("PG_TEST_URL")
+
+
+def _frame():
+    return pd.DataFrame([
+        {"district": "Muğla", "date": "2024-01-01 10:00", "temp": 20, "humidity": 50, "wind_speed": 5, "condition": "x"},
+        {"district": "Muğla", "date": "2024-01-01 10:00", "temp": 22, "humidity": 50, "wind_speed": 5, "condition": "x"},
+        {"district": "Datça", "date": "2024-01-01 10:00", "temp": 18, "humidity": None, "wind_speed": 4, "condition": "y"},
+    ])
+
+
+def test_copy_upsert_stages_chunks(mocker):
+    conn = mocker.MagicMock()
+    conn.execute.return_value.one.return_value = (1, 0)
+    copied = []
+    cursor = conn.connection.dbapi_connection.cursor.return_value.__enter__.return_value
+    cursor.copy_expert.side_effect = lambda sql, buf: copied.append(buf.read())
+
+    result = copy_upsert(conn, _frame(), chunk_size=1)
+
+    assert (result.inserted, result.updated) == (2, 0)
+    assert copied == [
+        "Muğla,2024-01-01 10:00,22,50.0,5,mugla\n",
+        "Datça,2024-01-01 10:00,18,,4,datca\n",
+    ]
+    statements = [str(c.args[0]) for c in conn.execute.call_args_list]
+    assert statements[0] == postgres_storage.STAGE_SQL
+    assert statements.count("TRUNCATE weather_stage") == 2
+
+
+def test_merge_sql_policies():
+    assert "DO UPDATE" in merge_sql("replace")
+    assert "DO NOTHING" in merge_sql("ignore")
+    assert "ON CONFLICT" not in merge_sql("error")
+    with pytest.raises(ValueError):
+        merge_sql("merge")
+
+
+@pytest.mark.skipif(not PG_TEST_URL, reason="PG_TEST_URL not set")
+def test_append_to_pg_is_idempotent():
+    from sqlalchemy import text
+
+    from collector.engines import begin
+
+    with begin(PG_TEST_URL) as conn:
+        conn.execute(text("DROP TABLE IF EXISTS weather"))
+    postgres_storage.init_pg(PG_TEST_URL)
+    first = postgres_storage.append_to_pg(_frame(), PG_TEST_URL)
+    assert (first.inserted, first.updated) == (2, 0)
+    second = postgres_storage.append_to_pg(_frame().assign(temp=30), PG_TEST_URL, chunk_size=1)
+    assert (second.inserted, second.updated) == (0, 2)
+    out = postgres_storage.query_range_pg(PG_TEST_URL, districts=["MUGLA"])
+    assert out["temp"].tolist() == [30]
+
+
+def test_iter_range_pg_streams_chunks(tmp_path):
+    from sqlalchemy import text
+
+    from collector.engines import begin, dispose_engines
+
+    url = f"sqlite:///{tmp_path / 'stream.db'}"
+    try:
+        with begin(url) as conn:
+            conn.execute(text(
+                "CREATE TABLE weather (district TEXT, date TEXT, temp REAL, "
+                "humidity REAL, wind_speed REAL, district_key TEXT)"
+            ))
+            conn.execute(
+                text("INSERT INTO weather VALUES ('A', :date, 20, 50, 5, 'a')"),
+                [{"date": f"2024-01-0{i}"} for i in range(1, 6)],
+            )
+        chunks = list(postgres_storage.iter_range_pg(url, start="2024-01-02", chunk_size=2))
+        assert [len(c) for c in chunks] == [2, 2]
+        assert chunks[0]["date"].tolist() == ["2024-01-02", "2024-01-03"]
+
+        (batch,) = postgres_storage.iter_range_pg(url, end="2024-01-01", arrow=True)
+        assert batch.num_rows == 1
+        assert batch.schema.names == ["district", "date", "temp", "humidity", "wind_speed"]
+    finally:
+        dispose_engines()
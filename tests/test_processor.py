@@ -41,3 +41,11 @@ def test_clean_removes_out_of_range_temp():
     cleaned_df = clean(df)
     assert len(cleaned_df) == 1
     assert cleaned_df.iloc[0]["temp"] == 25
+
+
+def test_district_key_folds_turkish_letters():
+    from collector.processor import district_key
+
+    assert district_key("Muğla") == district_key("MUĞLA") == district_key("mugla")
+    assert district_key(" İSTANBUL ") == "istanbul"
+    assert district_key("Iğdır") == "igdir"
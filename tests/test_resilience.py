@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+import requests
+
+from collector import resilience
+from collector.config import BreakerConfig, RetryPolicy
+from collector.metrics import CIRCUIT_BREAKER_STATE
+from collector.resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    call_with_retry,
+    call_with_retry_async,
+    get_breaker,
+    reset_breakers,
+)
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_delay_grows_with_jitter():
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=0.5)
+    for attempt, cap in [(0, 1), (1, 2), (2, 4), (5, 5)]:
+        delay = policy.delay(attempt)
+        assert cap / 2 <= delay <= cap
+
+
+def test_retries_then_succeeds(mocker):
+    reset_breakers()
+    sleep = mocker.patch("time.sleep")
+    fn = mocker.Mock(side_effect=[requests.ConnectionError(), _http_error(503), "ok"])
+    policy = RetryPolicy(attempts=3, base_delay=1, jitter=0)
+    assert call_with_retry(fn, "t1", policy) == "ok"
+    assert [c.args[0] for c in sleep.call_args_list] == [1, 2]
+
+
+def test_non_retryable_status_is_raised(mocker):
+    reset_breakers()
+    sleep = mocker.patch("time.sleep")
+    fn = mocker.Mock(side_effect=_http_error(404))
+    with pytest.raises(requests.HTTPError):
+        call_with_retry(fn, "t2", RetryPolicy(attempts=3))
+    assert fn.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_deadline_stops_retrying(mocker):
+    reset_breakers()
+    mocker.patch("time.sleep")
+    fn = mocker.Mock(side_effect=requests.ConnectionError())
+    with pytest.raises(requests.ConnectionError):
+        call_with_retry(fn, "t3", RetryPolicy(attempts=5, base_delay=10, jitter=0, deadline=15))
+    # waits 10s after the first failure, but 10s + 20s would pass the deadline
+    assert fn.call_count == 2
+
+
+def test_breaker_opens_and_recovers(mocker):
+    reset_breakers()
+    clock = mocker.patch("collector.resilience.time.monotonic", return_value=0.0)
+    resilience._breakers["t4"] = CircuitBreaker("t4", BreakerConfig(failures=2, cooldown=30))
+    fn = mocker.Mock(side_effect=requests.ConnectionError())
+    policy = RetryPolicy(attempts=1)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            call_with_retry(fn, "t4", policy)
+    assert get_breaker("t4").state == OPEN
+    assert CIRCUIT_BREAKER_STATE.labels("t4")._value.get() == OPEN
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(fn, "t4", policy)
+    assert fn.call_count == 2
+
+    clock.return_value = 31.0
+    fn.side_effect = None
+    fn.return_value = "ok"
+    assert call_with_retry(fn, "t4", policy) == "ok"
+    assert CIRCUIT_BREAKER_STATE.labels("t4")._value.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_async_retry_does_not_block(mocker):
+    reset_breakers()
+    real_sleep = asyncio.sleep
+    sleep = mocker.patch("asyncio.sleep", side_effect=lambda d: real_sleep(0))
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) < 2:
+            raise requests.ConnectionError()
+        return "ok"
+
+    policy = RetryPolicy(attempts=2, base_delay=3, jitter=0)
+    assert await call_with_retry_async(fn, "t5", policy) == "ok"
+    sleep.assert_called_once_with(3)
+
+
+def _open_breaker(mocker, source):
+    reset_breakers()
+    clock = mocker.patch("collector.resilience.time.monotonic", return_value=0.0)
+    breaker = resilience._breakers[source] = CircuitBreaker(
+        source, BreakerConfig(failures=1, cooldown=30)
+    )
+    breaker.failure()
+    clock.return_value = 31.0
+    return clock
+
+
+def test_half_open_trial_reopens_on_unexpected_error(mocker):
+    clock = _open_breaker(mocker, "t6")
+    fn = mocker.Mock(side_effect=KeyError("date"))
+    with pytest.raises(KeyError):
+        call_with_retry(fn, "t6", RetryPolicy(attempts=3), retry_on=(requests.RequestException,))
+    assert fn.call_count == 1
+    assert get_breaker("t6").state == OPEN
+    clock.return_value = 40.0
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(fn, "t6", RetryPolicy(attempts=1))
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_reopens_when_cancelled():
+    # the event loop reads time.monotonic too, so use a real clock here
+    reset_breakers()
+    breaker = resilience._breakers["t7"] = CircuitBreaker(
+        "t7", BreakerConfig(failures=1, cooldown=0)
+    )
+    breaker.failure()
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(call_with_retry_async(hang, "t7", RetryPolicy(attempts=1)), 0.01)
+    assert get_breaker("t7").state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancellation_does_not_count_as_failure():
+    reset_breakers()
+    resilience._breakers["t8"] = CircuitBreaker("t8", BreakerConfig(failures=2, cooldown=30))
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    for _ in range(5):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(call_with_retry_async(hang, "t8", RetryPolicy(attempts=1)), 0.01)
+    assert get_breaker("t8").state == CLOSED
+
+
+def test_opening_breaker_stops_retrying_at_once(mocker):
+    reset_breakers()
+    resilience._breakers["t9"] = CircuitBreaker("t9", BreakerConfig(failures=2, cooldown=30))
+    sleep = mocker.patch("time.sleep")
+    fn = mocker.Mock(side_effect=requests.ConnectionError())
+    with pytest.raises(requests.ConnectionError):
+        call_with_retry(fn, "t9", RetryPolicy(attempts=5, base_delay=1, jitter=0))
+    assert fn.call_count == 2
+    sleep.assert_called_once_with(1)
+    assert get_breaker("t9").state == OPEN
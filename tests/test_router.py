@@ -0,0 +1,123 @@
+import shutil
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from collector import sqlite_storage
+from collector.config import RouterConfig
+from collector.router import StorageRouter, is_read
+
+
+def _row(date, temp=20):
+    return pd.DataFrame([
+        {"district": "A", "date": date, "temp": temp, "humidity": 50, "wind_speed": 5},
+    ])
+
+
+def test_is_read():
+    assert is_read("query_latest") and is_read("iter_range") and is_read("get_statistics")
+    assert not is_read("append_to_db") and not is_read("rebuild_rollups")
+
+
+def test_router_reads_replica_and_falls_back_on_lag(tmp_path):
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    sqlite_storage.append_to_db(_row("2024-01-01 10:00"), primary)
+    shutil.copy(primary, replica)
+
+    router = StorageRouter(
+        sqlite_storage, [replica], RouterConfig(max_lag=3600, check_interval=0)
+    )
+    router.append_to_db(_row("2024-01-01 10:30"), primary)
+    assert len(sqlite_storage.query_latest(replica)) == 1
+    # 30 minutes behind is within max_lag, so reads see the replica
+    assert len(router.query_latest(primary)) == 1
+    assert router.replicas[0].lag == 1800
+
+    router.append_to_db(_row("2024-01-01 12:00"), primary)
+    # now two hours behind: reads go back to the primary
+    assert len(router.query_latest(primary)) == 3
+    assert router.route(primary) == (primary, "primary")
+
+
+def test_router_skips_unhealthy_replica(tmp_path):
+    primary = tmp_path / "primary.db"
+    sqlite_storage.append_to_db(_row("2024-01-01"), primary)
+    broken = tmp_path / "missing" / "replica.db"
+    router = StorageRouter(sqlite_storage, [broken], RouterConfig(check_interval=0))
+    assert len(router.query_latest(primary)) == 1
+    assert router.replicas[0].healthy is False
+
+
+@pytest.mark.asyncio
+async def test_router_wraps_async_backend(tmp_path):
+    from collector import async_storage
+
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    await async_storage.append_to_db(_row("2024-01-01"), primary)
+    shutil.copy(primary, replica)
+    router = StorageRouter(async_storage, [replica], RouterConfig(check_interval=0))
+    await router.append_to_db(_row("2024-01-01", temp=25), primary)
+    out = await router.query_latest(primary)
+    assert out["temp"].tolist() == [20]
+    assert router.route(primary) == (replica, "replica")
+
+
+def _user_version(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_router_never_migrates_replica(tmp_path):
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    sqlite_storage.append_to_db(_row("2024-01-01"), primary)
+    shutil.copy(primary, replica)
+    with sqlite3.connect(replica) as conn:
+        conn.execute("PRAGMA user_version = 0")
+
+    router = StorageRouter(sqlite_storage, [replica], RouterConfig(check_interval=0))
+    assert len(router.query_latest(primary)) == 1
+    assert router.route(primary) == (replica, "replica")
+    assert _user_version(replica) == 0
+
+
+def test_router_times_whole_iteration(tmp_path, mocker):
+    from collector import router as router_module
+
+    primary = tmp_path / "primary.db"
+    sqlite_storage.append_to_db(_row("2024-01-01"), primary)
+    observe = mocker.spy(router_module, "_observe")
+    chunks = StorageRouter(sqlite_storage, [], RouterConfig()).iter_range(primary)
+    assert observe.call_count == 0
+    assert len(list(chunks)) == 1
+    observe.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_async_router_never_migrates_replica(tmp_path):
+    from collector import async_storage
+
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    await async_storage.append_to_db(_row("2024-01-01"), primary)
+    shutil.copy(primary, replica)
+    with sqlite3.connect(replica) as conn:
+        conn.execute("PRAGMA user_version = 0")
+
+    router = StorageRouter(async_storage, [replica], RouterConfig(check_interval=0))
+    out = await router.query_latest(primary)
+    assert len(out) == 1
+    assert router.route(primary) == (replica, "replica")
+    assert _user_version(replica) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_router_passes_non_reads_through(tmp_path):
+    from collector import async_storage
+
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    router = StorageRouter(async_storage, [replica], RouterConfig(check_interval=0))
+    await router.open_pool(primary)
+    await router.append_to_db(_row("2024-01-01"), primary)
+    # lifespan shutdown calls close_pool() without a target
+    await router.close_pool()
+    assert async_storage._pools == {}
@@ -1,9 +1,45 @@
+import hashlib
+import json
+import os
 import boto3
+from botocore.exceptions import ClientError
 from pathlib import Path
-from collector.s3_storage import upload_file
+from collector import s3_storage
+from collector.s3_storage import reset_client, sync_dir, sync_file, upload_file
+
+
+class FakeS3:
+    """In-memory stand-in for the handful of S3 calls the sync uses."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = []
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        body, metadata = self.objects[(Bucket, Key)]
+        return {"ETag": f'"{hashlib.md5(body).hexdigest()}"', "Metadata": metadata}
+
+    def upload_file(self, filename, bucket, key, ExtraArgs=None, Config=None):
+        metadata = (ExtraArgs or {}).get("Metadata", {})
+        self.objects[(bucket, key)] = (Path(filename).read_bytes(), metadata)
+        self.uploads.append(key)
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+
+
+def _fake_s3(mocker):
+    reset_client()
+    fake = FakeS3()
+    mocker.patch("boto3.client", return_value=fake)
+    return fake
 
 
 def test_upload_file(tmp_path, mocker):
+    reset_client()
     path = tmp_path / "d.json"
     path.write_text("{}")
 
@@ -11,4 +47,95 @@ def test_upload_file(tmp_path, mocker):
     boto_mock = mocker.patch("boto3.client", return_value=client)
     upload_file(path, "bucket", "d.json")
     boto_mock.assert_called_with("s3")
-    client.upload_file.assert_called_once_with(str(path), "bucket", "d.json")
+    client.upload_file.assert_called_once_with(str(path), "bucket", "d.json", Config=mocker.ANY)
+    assert client.upload_file.call_args.kwargs["Config"].multipart_threshold > 0
+    reset_client()
+
+
+def test_client_is_reused(mocker):
+    s3 = _fake_s3(mocker)
+    assert s3_storage.get_client() is s3_storage.get_client()
+    boto3.client.assert_called_once_with("s3")
+
+
+def test_client_endpoint(mocker):
+    reset_client()
+    boto_mock = mocker.patch("boto3.client")
+    config = s3_storage.S3Config(endpoint_url="http://localhost:9000")
+    mocker.patch.object(s3_storage, "load_s3_config", return_value=config)
+    s3_storage.get_client()
+    boto_mock.assert_called_once_with("s3", endpoint_url="http://localhost:9000")
+    reset_client()
+
+
+def test_sync_file_skips_same_content(tmp_path, mocker):
+    s3 = _fake_s3(mocker)
+    path = tmp_path / "d.json"
+    path.write_text("{}")
+    assert sync_file(path, "bucket")
+    assert not sync_file(path, "bucket")
+    path.write_text('{"a": 1}')
+    assert sync_file(path, "bucket")
+    assert s3.uploads == ["d.json", "d.json"]
+
+
+def test_sync_file_matches_plain_etag(tmp_path, mocker):
+    s3 = _fake_s3(mocker)
+    path = tmp_path / "d.json"
+    path.write_text("{}")
+    s3.objects[("bucket", "d.json")] = (b"{}", {})
+    assert not sync_file(path, "bucket")
+
+
+def test_sync_dir_uploads_changed_partitions(tmp_path, mocker):
+    s3 = _fake_s3(mocker)
+    for part in ("month=2024-01/district=A", "month=2024-01/district=B"):
+        (tmp_path / part).mkdir(parents=True)
+        (tmp_path / part / "part-0.parquet").write_bytes(part.encode())
+
+    first = sync_dir(tmp_path, "bucket", "parquet")
+    assert sorted(first) == [
+        "parquet/month=2024-01/district=A/part-0.parquet",
+        "parquet/month=2024-01/district=B/part-0.parquet",
+    ]
+    assert not any(".s3sync" in key for key in s3.uploads)
+
+    assert sync_dir(tmp_path, "bucket", "parquet") == []
+
+    changed = tmp_path / "month=2024-01/district=B/part-0.parquet"
+    changed.write_bytes(b"new")
+    os.utime(changed, ns=(1, 1))
+    assert sync_dir(tmp_path, "bucket", "parquet") == [
+        "parquet/month=2024-01/district=B/part-0.parquet"
+    ]
+    assert len(s3.uploads) == 3
+
+
+def test_sync_dir_touched_file_is_not_reuploaded(tmp_path, mocker):
+    s3 = _fake_s3(mocker)
+    path = tmp_path / "weather_2024_01.jsonl"
+    path.write_text("{}\n")
+    sync_dir(tmp_path, "bucket")
+    os.utime(path, ns=(1, 1))
+    assert sync_dir(tmp_path, "bucket") == []
+    assert s3.uploads == ["weather_2024_01.jsonl"]
+
+
+def test_sync_dir_deletes_removed_files(tmp_path, mocker):
+    s3 = _fake_s3(mocker)
+    old = tmp_path / "month=2024-01" / "part-0.parquet"
+    new = tmp_path / "month=2024-01" / "part-1.parquet"
+    old.parent.mkdir()
+    old.write_bytes(b"old")
+    sync_dir(tmp_path, "bucket", "parquet")
+
+    new.write_bytes(b"compacted")
+    old.unlink()
+    sync_dir(tmp_path, "bucket", "parquet")
+    # without delete the removed partition file stays in the bucket
+    assert ("bucket", "parquet/month=2024-01/part-0.parquet") in s3.objects
+
+    assert sync_dir(tmp_path, "bucket", "parquet", delete=True) == []
+    assert sorted(s3.objects) == [("bucket", "parquet/month=2024-01/part-1.parquet")]
+    manifest = json.loads((tmp_path / s3_storage.MANIFEST).read_text())
+    assert list(manifest) == ["bucket/parquet/month=2024-01/part-1.parquet"]
@@ -1,9 +1,15 @@
+import io
+
 import pandas as pd
+import pyarrow.parquet as pq
+from urllib3.exceptions import ProtocolError
 from collector.satellite_client import (
     fetch_modis_data,
     fetch_viirs_data,
     fetch_sentinel2_data,
     fetch_effis_data,
+    iter_fire_csv,
+    stream_to_parquet,
 )
 
 def test_fetch_modis_data(mocker):
@@ -48,3 +54,79 @@ def test_fetch_effis_data(mocker):
     df = fetch_effis_data("http://example.com/effis.csv")
     assert isinstance(df, pd.DataFrame)
     assert list(df.columns) == ["lat", "lon", "intensity"]
+
+
+VIIRS_CSV = (
+    "latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,confidence,frp\n"
+    "38.1,27.2,330.5,0.4,0.4,2024-07-01,0130,N,n,5.1\n"
+    "38.2,27.3,341.0,0.4,0.4,2024-07-01,0131,N,h,9.8\n"
+    "38.3,27.4,350.2,0.4,0.4,2024-07-01,1042,N,l,2.0\n"
+)
+
+
+class _Raw(io.BytesIO):
+    decode_content = False
+
+
+def _streamed(mocker, body):
+    response = mocker.MagicMock()
+    response.raw = _Raw(body.encode())
+    response.raise_for_status.return_value = None
+    response.__enter__.return_value = response
+    return mocker.patch("requests.get", return_value=response)
+
+
+def test_iter_fire_csv_chunks_and_types(mocker):
+    get = _streamed(mocker, VIIRS_CSV)
+    chunks = list(iter_fire_csv("http://example.com/viirs.csv", "viirs", chunk_size=2))
+    assert get.call_args.kwargs["stream"] is True
+    assert [len(c) for c in chunks] == [2, 1]
+    df = pd.concat(chunks)
+    assert list(df.columns) == [
+        "latitude", "longitude", "bright_ti4", "acq_date", "acq_time", "confidence"
+    ]
+    assert df["acq_time"].tolist() == ["0130", "0131", "1042"]
+    assert df["bright_ti4"].dtype == "float64"
+
+
+def test_stream_to_parquet(tmp_path, mocker):
+    _streamed(mocker, VIIRS_CSV)
+    path = tmp_path / "fires" / "viirs.parquet"
+    rows = stream_to_parquet("http://example.com/viirs.csv", "viirs", path, chunk_size=2)
+    assert rows == 3
+    table = pq.read_table(path)
+    assert table.num_rows == 3
+    assert pq.ParquetFile(path).num_row_groups == 2
+    assert not list(path.parent.glob("*.tmp"))
+
+
+class _Truncated(_Raw):
+    def read1(self, *args):
+        data = super().read1(*args)
+        if not data:
+            raise ProtocolError("Connection broken: IncompleteRead")
+        return data
+
+    read = read1
+
+
+def test_stream_to_parquet_restarts_cut_off_download(tmp_path, mocker):
+    from collector.config import RetryPolicy
+    from collector.resilience import reset_breakers
+
+    reset_breakers()
+    mocker.patch("time.sleep")
+    cut = mocker.MagicMock()
+    cut.raw = _Truncated(VIIRS_CSV[:120].encode())
+    cut.__enter__.return_value = cut
+    full = mocker.MagicMock()
+    full.raw = _Raw(VIIRS_CSV.encode())
+    full.__enter__.return_value = full
+    get = mocker.patch("requests.get", side_effect=[cut, full])
+    path = tmp_path / "viirs.parquet"
+    rows = stream_to_parquet(
+        "http://example.com/viirs.csv", "viirs", path, chunk_size=2,
+        policy=RetryPolicy(attempts=2, base_delay=0, jitter=0),
+    )
+    assert get.call_count == 2
+    assert rows == 3 and pq.read_table(path).num_rows == 3
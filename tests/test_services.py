@@ -1,17 +1,57 @@
 from fastapi.testclient import TestClient
 import pandas as pd
 import importlib
+import threading
+import time
 
 from services import collector_service
 
 
+def _wait(client, job_id):
+    for _ in range(200):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
 def test_collector_service_collect(mocker):
     mocker.patch("services.collector_service.collect_and_save")
     client = TestClient(collector_service.app)
     resp = client.post("/collect")
-    assert resp.status_code == 200
-    assert resp.json()["status"] == "ok"
+    assert resp.status_code == 202
+    job = _wait(client, resp.json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["run_seconds"] >= 0
     collector_service.collect_and_save.assert_called_once()
+    kwargs = collector_service.collect_and_save.call_args.kwargs
+    assert kwargs["write_lock"] is collector_service._write_lock
+
+
+def test_collector_service_coalesces_requests(mocker):
+    release = threading.Event()
+    collect = mocker.patch(
+        "services.collector_service.collect_and_save", side_effect=lambda *a, **k: release.wait(5)
+    )
+    client = TestClient(collector_service.app)
+    first = client.post("/collect?district=Muğla").json()["job_id"]
+    second = client.post("/collect?district=mugla").json()["job_id"]
+    other = client.post("/collect?district=Fethiye").json()["job_id"]
+    assert first == second != other
+    release.set()
+    assert _wait(client, first)["requests"] == 2
+    _wait(client, other)
+    assert collect.call_count == 2
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_collector_service_failed_job(mocker):
+    mocker.patch("services.collector_service.collect_and_save", side_effect=RuntimeError("down"))
+    client = TestClient(collector_service.app)
+    job = _wait(client, client.post("/collect").json()["job_id"])
+    assert job["status"] == "failed"
+    assert job["error"] == "down"
 
 
 def test_risk_service(tmp_path, monkeypatch):
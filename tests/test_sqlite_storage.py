@@ -72,3 +72,213 @@ def test_hourly_average(tmp_path):
     out = hourly_average(db, district="A")
     assert len(out) == 1
     assert round(out.iloc[0]["avg_temp"], 1) == 21.0
+
+
+def test_pooled_connections_use_wal(tmp_path):
+    from collector import sqlite_storage
+
+    db = tmp_path / "pool.db"
+    sqlite_storage.enable_pool()
+    try:
+        df = pd.DataFrame([
+            {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+        ])
+        append_to_db(df, db)
+        with sqlite_storage._connect(db) as first, sqlite_storage._connect(db) as second:
+            assert first is second
+            mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+        assert len(query_latest(db, limit=10)) == 1
+    finally:
+        sqlite_storage.disable_pool()
+
+
+def test_append_to_db_upserts_overlapping_rows(tmp_path):
+    db = tmp_path / "upsert.db"
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "B", "date": "2024-01-01", "temp": 22, "humidity": 55, "wind_speed": 6},
+    ])
+    first = append_to_db(df, db)
+    assert (first.inserted, first.updated) == (2, 0)
+
+    again = append_to_db(df, db)
+    assert (again.inserted, again.updated) == (0, 0)
+
+    changed = pd.concat([df, pd.DataFrame([
+        {"district": "C", "date": "2024-01-01", "temp": 25, "humidity": 40, "wind_speed": 4},
+    ])], ignore_index=True)
+    changed.loc[0, "temp"] = 21
+    result = append_to_db(changed, db, chunk_size=2)
+    assert (result.inserted, result.updated) == (1, 1)
+    out = query_by_district(db, "A")
+    assert out.iloc[0]["temp"] == 21
+
+    ignored = append_to_db(changed.assign(temp=0), db, on_conflict="ignore")
+    assert (ignored.inserted, ignored.updated) == (0, 0)
+    assert query_by_district(db, "A").iloc[0]["temp"] == 21
+
+
+def test_append_to_db_error_policy_rolls_back(tmp_path):
+    import sqlite3
+    import pytest
+
+    db = tmp_path / "error.db"
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5},
+    ])
+    append_to_db(df, db)
+    batch = pd.concat([
+        pd.DataFrame([{"district": "B", "date": "2024-01-01", "temp": 1, "humidity": 1, "wind_speed": 1}]),
+        df,
+    ], ignore_index=True)
+    with pytest.raises(sqlite3.IntegrityError):
+        append_to_db(batch, db, on_conflict="error")
+    assert len(query_latest(db)) == 1
+
+
+def test_rollups_follow_updates_and_rebuild(tmp_path):
+    import sqlite3
+    from collector.sqlite_storage import daily_average, rebuild_rollups
+
+    db = tmp_path / "rollup.db"
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01 10:10", "temp": 20, "humidity": 50, "wind_speed": 5},
+        {"district": "A", "date": "2024-01-01 10:40", "temp": 22, "humidity": 60, "wind_speed": 7},
+        {"district": "B", "date": "2024-01-01 11:00", "temp": 30, "humidity": 40, "wind_speed": 3},
+    ])
+    append_to_db(df, db)
+    hourly = hourly_average(db)
+    assert list(hourly["hour"]) == ["2024-01-01 10", "2024-01-01 11"]
+    assert hourly.iloc[0]["avg_temp"] == 21
+
+    df.loc[0, "temp"] = 10
+    append_to_db(df, db)
+    assert hourly_average(db, district="a").iloc[0]["avg_temp"] == 16
+    daily = daily_average(db)
+    assert len(daily) == 1
+    assert daily.iloc[0]["avg_temp"] == (10 + 22 + 30) / 3
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM weather_hourly")
+    assert hourly_average(db).empty
+    rebuild_rollups(db)
+    assert len(hourly_average(db, start="2024-01-01 11:30")) == 1
+
+    with sqlite3.connect(db) as conn:
+        row = conn.execute(
+            "SELECT temp_min, temp_max FROM weather_daily WHERE district_key = 'a'"
+        ).fetchone()
+    assert row == (10, 22)
+
+
+def test_statistics_summary_tracks_updates_and_repairs(tmp_path):
+    import sqlite3
+    from collector.sqlite_storage import verify_statistics
+
+    db = tmp_path / "stats.db"
+    df = pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 10, "humidity": 40, "wind_speed": 3},
+        {"district": "A", "date": "2024-01-02", "temp": 30, "humidity": 50, "wind_speed": 4},
+        {"district": "B", "date": "2024-01-02", "temp": 20, "humidity": 60, "wind_speed": 7},
+    ])
+    append_to_db(df, db)
+    assert get_statistics(db)["max_temp"] == 30
+    assert get_statistics(db, district="a")["avg_temp"] == 20
+
+    df.loc[1, "temp"] = 12
+    append_to_db(df, db)
+    stats = get_statistics(db)
+    assert stats["max_temp"] == 20
+    assert round(stats["avg_temp"], 3) == round(42 / 3, 3)
+    assert get_statistics(db, district="A")["max_temp"] == 12
+    assert verify_statistics(db) == []
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE weather_stats SET temp_sum = 0 WHERE district_key = 'b'")
+    assert verify_statistics(db) == ["b"]
+    assert verify_statistics(db, repair=True) == ["b"]
+    assert verify_statistics(db) == []
+    assert get_statistics(db, district="B")["avg_temp"] == 20
+
+
+def test_district_key_lookup_and_migration(tmp_path):
+    import sqlite3
+
+    db = tmp_path / "legacy.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "CREATE TABLE weather (district TEXT, date TEXT, temp REAL, "
+            "humidity REAL, wind_speed REAL, PRIMARY KEY (district, date))"
+        )
+        conn.execute("INSERT INTO weather VALUES ('MUĞLA', '2024-01-01 10:00', 30, 20, 8)")
+    append_to_db(pd.DataFrame([
+        {"district": "Muğla", "date": "2024-01-01 11:00", "temp": 32, "humidity": 18, "wind_speed": 9},
+    ]), db)
+
+    assert len(query_by_district(db, "mugla")) == 2
+    assert len(query_range(db, districts=["MUGLA"])) == 2
+    assert get_statistics(db, district="muğla")["max_temp"] == 32
+    with sqlite3.connect(db) as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM weather WHERE district_key = ? ORDER BY date DESC",
+            ("mugla",),
+        ).fetchall()
+    assert "idx_weather_district_key" in str(plan)
+
+
+def test_query_range_pages_with_cursor(tmp_path):
+    from collector.sqlite_storage import iter_range, query_range_page
+
+    db = tmp_path / "pages.db"
+    df = pd.DataFrame([
+        {"district": d, "date": f"2024-01-0{day}", "temp": day, "humidity": 50, "wind_speed": 5}
+        for day in range(1, 4)
+        for d in ("A", "B")
+    ])
+    append_to_db(df, db)
+
+    page, cursor = query_range_page(db, page_size=4)
+    assert list(page["district"]) == ["A", "B", "A", "B"]
+    assert cursor is not None
+    page, cursor = query_range_page(db, page_size=4, cursor=cursor)
+    assert list(zip(page["district"], page["date"])) == [("A", "2024-01-03"), ("B", "2024-01-03")]
+    assert cursor is None
+
+    chunks = list(iter_range(db, districts=["b"], chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert set(pd.concat(chunks)["district"]) == {"B"}
+
+
+def test_data_range_endpoint_returns_next_cursor(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import fastapi_app
+
+    db = tmp_path / "api.db"
+    append_to_db(pd.DataFrame([
+        {"district": "A", "date": f"2024-01-0{day}", "temp": 20, "humidity": 50, "wind_speed": 5}
+        for day in range(1, 4)
+    ]), db)
+    monkeypatch.setattr(fastapi_app, "DB_PATH", db)
+    client = TestClient(fastapi_app.app, base_url="https://testserver")
+    resp = client.get("/api/data-range?limit=2", headers={"Origin": "https://dash.example"})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
+    assert "X-Next-Cursor" in resp.headers["Access-Control-Expose-Headers"]
+    resp = client.get(f"/api/data-range?limit=2&cursor={resp.headers['X-Next-Cursor']}")
+    assert [r["date"] for r in resp.json()] == ["2024-01-03"]
+    assert "X-Next-Cursor" not in resp.headers
+    assert client.get("/api/data-range?cursor=bogus").status_code == 400
+
+
+def test_current_schema_skips_ddl(tmp_path, mocker):
+    from collector import sqlite_common
+
+    db = tmp_path / "w.db"
+    init_db(db)
+    statements = mocker.spy(sqlite_common, "schema_statements")
+    query_latest(db, 1)
+    append_to_db(pd.DataFrame([
+        {"district": "A", "date": "2024-01-01", "temp": 20, "humidity": 50, "wind_speed": 5}
+    ]), db)
+    statements.assert_not_called()
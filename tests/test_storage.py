@@ -0,0 +1,70 @@
+import json
+
+import pandas as pd
+
+from collector import storage
+from collector.storage import append_json, convert_to_lines
+
+
+def _rows(*dates):
+    return pd.DataFrame([
+        {"district": "Bodrum", "date": d, "temp": 20, "humidity": 50, "wind_speed": 5}
+        for d in dates
+    ])
+
+
+def test_append_json_lines_skips_written_keys(tmp_path):
+    out = tmp_path / "weather.jsonl"
+    append_json(_rows("2024-01-01", "2024-01-02"), out, lines=True)
+    append_json(_rows("2024-01-02", "2024-01-03"), out, lines=True)
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["date"] for r in records] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert len((tmp_path / "weather.jsonl.keys").read_text().splitlines()) == 3
+
+
+def test_append_json_lines_uses_sidecar_index(tmp_path, mocker):
+    out = tmp_path / "weather.jsonl"
+    append_json(_rows("2024-01-01"), out, lines=True)
+    storage._key_index.clear()
+    reader = mocker.spy(storage, "_record_key")
+    append_json(_rows("2024-01-01"), out, lines=True)
+    # only the incoming row is parsed; the archive itself is not re-read
+    assert reader.call_count == 1
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_convert_to_lines(tmp_path):
+    append_json(_rows("2024-01-01", "2024-01-02"), tmp_path / "weather_2024_01.json")
+    (converted,) = convert_to_lines(tmp_path)
+    assert converted.name == "weather_2024_01.jsonl"
+    append_json(_rows("2024-01-02", "2024-01-03"), converted, lines=True)
+    assert len(converted.read_text(encoding="utf-8").splitlines()) == 3
+
+
+def test_append_json_lines_never_appends_to_json_array(tmp_path):
+    out = tmp_path / "weather_data.json"
+    append_json(_rows("2024-01-01"), out)
+    written = append_json(_rows("2024-01-02"), out, lines=True)
+    assert written == tmp_path / "weather_data.jsonl"
+    assert len(pd.read_json(out)) == 1
+
+    array = tmp_path / "array.jsonl"
+    array.write_text("[]")
+    try:
+        append_json(_rows("2024-01-02"), array, lines=True)
+    except ValueError as exc:
+        assert "convert_to_lines" in str(exc)
+    else:
+        raise AssertionError("appended to a JSON array")
+
+
+def test_append_json_lines_sees_other_writers(tmp_path):
+    out = tmp_path / "weather.jsonl"
+    append_json(_rows("2024-01-01"), out, lines=True)
+    # another process appends a record and its key
+    with out.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps({"district": "Bodrum", "date": "2024-01-02"}) + "\n")
+    with (tmp_path / "weather.jsonl.keys").open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(["Bodrum", "2024-01-02"]) + "\n")
+    append_json(_rows("2024-01-02"), out, lines=True)
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 2
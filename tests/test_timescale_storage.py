@@ -0,0 +1,105 @@
+import pytest
+
+from collector.timescale_storage import aggregate_sql, buckets_query, pick_aggregate
+
+
+@pytest.mark.parametrize(
+    "bucket, view",
+    [
+        ("15 minutes", None),
+        ("90 minutes", None),
+        ("1 hour", "weather_hourly"),
+        ("6 hours", "weather_hourly"),
+        ("1 day", "weather_daily"),
+        ("7 days", "weather_daily"),
+        ("1 month", "weather_daily"),
+    ],
+)
+def test_pick_aggregate_uses_coarsest_tiling_view(bucket, view):
+    assert pick_aggregate(bucket) == view
+
+
+def test_buckets_query_reads_aggregate_sums():
+    sql, params = buckets_query("1 day", start="2024-01-01", districts=["Muğla"])
+    assert "FROM weather_daily" in sql
+    assert "sum(temp_sum) / nullif(sum(temp_count), 0) AS avg_temp" in sql
+    assert params == {"bucket": "1 day", "start": "2024-01-01", "dlist": ("mugla",)}
+
+    sql, _ = buckets_query("5 minutes")
+    assert "FROM weather " in sql and "avg(temp)" in sql
+
+
+def test_aggregate_sql_adds_refresh_policy():
+    create, policy = aggregate_sql("weather_hourly")
+    assert "timescaledb.continuous" in create and "WITH NO DATA" in create
+    assert "add_continuous_aggregate_policy('weather_hourly'" in policy
+    assert "if_not_exists => TRUE" in policy
+
+
+class _FakeConn:
+    """Answers the catalog lookups made by apply_policies and records DDL."""
+
+    def __init__(self, mocker, compression_enabled, jobs):
+        self.mocker = mocker
+        self.compression_enabled = compression_enabled
+        self.jobs = jobs
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql)
+        result = self.mocker.Mock()
+        if "compression_enabled" in sql:
+            result.scalar.return_value = self.compression_enabled
+        elif "timescaledb_information.jobs" in sql:
+            matches = self.jobs.get(params["proc"])
+            result.first.return_value = None if matches is None else (matches,)
+        else:
+            result.scalar.return_value = True
+        return result
+
+
+def test_apply_policies_is_idempotent(mocker):
+    from collector.config import TimescaleConfig
+    from collector.timescale_storage import apply_policies
+
+    config = TimescaleConfig(compress_after="30 days", drop_after="1 year")
+    fresh = _FakeConn(mocker, compression_enabled=False, jobs={})
+    apply_policies(fresh, config)
+    ddl = [s for s in fresh.statements if "timescaledb_information" not in s]
+    assert any("compress_segmentby = 'district_key, district'" in s for s in ddl)
+    assert any("add_compression_policy" in s for s in ddl)
+    assert any("add_retention_policy" in s for s in ddl)
+
+    current = _FakeConn(
+        mocker,
+        compression_enabled=True,
+        jobs={"policy_compression": True, "policy_retention": False},
+    )
+    apply_policies(current, config)
+    assert not any("ALTER TABLE" in s for s in current.statements)
+    assert not any("compression_policy" in s for s in current.statements)
+    # a changed drop_after replaces the retention job
+    assert any("remove_retention_policy" in s for s in current.statements)
+    assert any("add_retention_policy" in s for s in current.statements)
+
+
+def test_refresh_aggregates_stays_within_retention(mocker):
+    from collector import timescale_storage
+    from collector.config import TimescaleConfig
+
+    conn = mocker.MagicMock()
+    engine = mocker.patch.object(timescale_storage, "get_engine").return_value
+    engine.connect.return_value.execution_options.return_value.__enter__.return_value = conn
+    timescale_storage.refresh_aggregates(
+        "postgresql://db", config=TimescaleConfig(drop_after="1 year")
+    )
+    assert conn.execute.call_count == len(timescale_storage.AGGREGATES)
+    stmt, params = conn.execute.call_args.args
+    assert "GREATEST(CAST(:start AS timestamptz), now() - CAST(:drop_after" in str(stmt)
+    assert params == {"start": None, "end": None, "drop_after": "1 year"}
+
+    timescale_storage.refresh_aggregates(
+        "postgresql://db", "2020-01-01", config=TimescaleConfig(drop_after="")
+    )
+    assert conn.execute.call_args.args[1]["drop_after"] is None
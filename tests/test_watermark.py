@@ -0,0 +1,58 @@
+import json
+
+import pandas as pd
+
+from collector.metrics import COLLECTOR_ROWS
+from collector.processor import normalize
+from collector.watermark import Watermark
+
+
+def _frame(rows):
+    return normalize(pd.DataFrame(
+        [{"ilce": d, "tarih": t, "sicaklik": 20, "nem": 50, "ruzgarHiz": 3} for d, t in rows]
+    ))
+
+
+def test_filter_drops_seen_rows(tmp_path):
+    path = tmp_path / "marks.json"
+    path.write_text(json.dumps({"mugla": "2024-01-01T12:00:00"}))
+    wm = Watermark(path)
+    skipped = COLLECTOR_ROWS.labels("skipped")._value.get()
+    df = wm.filter(_frame([
+        ("Muğla", "2024-01-01T12:00:00"),
+        ("Muğla", "2024-01-01T13:00:00"),
+        ("Fethiye", "2024-01-01T11:00:00"),
+    ]))
+    assert sorted(df["date"].dt.hour) == [11, 13]
+    assert COLLECTOR_ROWS.labels("skipped")._value.get() == skipped + 1
+    assert json.loads(path.read_text()) == {"mugla": "2024-01-01T12:00:00"}
+
+    wm.commit()
+    assert json.loads(path.read_text()) == {
+        "fethiye": "2024-01-01T11:00:00",
+        "mugla": "2024-01-01T13:00:00",
+    }
+
+
+def test_timezone_aware_dates(tmp_path):
+    wm = Watermark(tmp_path / "marks.json")
+    wm.filter(_frame([("A", "2024-01-01T12:00:00+03:00")]))
+    wm.commit()
+    df = Watermark(tmp_path / "marks.json").filter(_frame([
+        ("A", "2024-01-01T09:00:00Z"),
+        ("A", "2024-01-01T10:00:00Z"),
+    ]))
+    assert len(df) == 1
+
+
+def test_commit_keeps_marks_saved_by_another_job(tmp_path):
+    path = tmp_path / "marks.json"
+    first, second = Watermark(path), Watermark(path)
+    first.filter(_frame([("Muğla", "2024-01-01T12:00:00")]))
+    second.filter(_frame([("Fethiye", "2024-01-01T11:00:00")]))
+    first.commit()
+    second.commit()
+    assert json.loads(path.read_text()) == {
+        "fethiye": "2024-01-01T11:00:00",
+        "mugla": "2024-01-01T12:00:00",
+    }
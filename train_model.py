@@ -12,6 +12,26 @@ from risk_analyzer import (
 DB_PATH = Path(os.getenv("WEATHER_DB", "weather.db"))
 DB_URL = os.getenv("TIMESCALE_URL")
 MODEL_PATH = Path("models/model.joblib")
+TRAIN_COLUMNS = ["temp", "humidity", "wind_speed", "brightness", "risk"]
+
+
+def _training_rows(chunk: pd.DataFrame, sample: float) -> pd.DataFrame:
+    """Score *chunk* and keep only the columns the model uses, as float32."""
+    chunk = add_risk_column(chunk)
+    chunk = chunk[[c for c in TRAIN_COLUMNS if c in chunk.columns]].astype("float32")
+    if sample < 1:
+        chunk = chunk.sample(frac=sample, random_state=42)
+    return chunk
+
+
+def _fraction(value: str) -> float:
+    import argparse
+
+    fraction = float(value)
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"must be in (0, 1], got {value}")
+    return fraction
+
 
 def main() -> None:
     import argparse
@@ -25,17 +45,37 @@ def main() -> None:
         default=1000,
         help="Number of rows to fetch for training (0 for all)",
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=timescale_storage.STREAM_CHUNK_SIZE,
+        help="Rows per chunk when streaming the full history from TimescaleDB",
+    )
+    parser.add_argument(
+        "--sample",
+        type=_fraction,
+        default=1.0,
+        help="Fraction of each streamed chunk to keep for training (0-1]",
+    )
     args = parser.parse_args()
 
     limit = None if args.limit == 0 else args.limit
 
-    if DB_URL:
-        df = timescale_storage.query_range_ts(DB_URL, limit=limit)
+    if DB_URL and limit is None:
+        # only one raw chunk is buffered at a time, but the training frame
+        # still grows with the history; --sample downsamples each chunk
+        chunks = timescale_storage.iter_range_ts(DB_URL, chunk_size=args.chunk_size)
+        frames = [_training_rows(c, args.sample) for c in chunks]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     else:
-        sqlite_storage.init_db(DB_PATH)
-        df = sqlite_storage.query_latest(DB_PATH, limit=limit)
-
-    df = add_risk_column(df)
+        if DB_URL:
+            df = timescale_storage.query_range_ts(DB_URL, limit=limit)
+        else:
+            sqlite_storage.init_db(DB_PATH)
+            df = sqlite_storage.query_latest(DB_PATH, limit=limit)
+        df = add_risk_column(df)
+    if df.empty:
+        raise SystemExit("No weather rows to train on; collect data first")
     if args.tune:
         model = tune_random_forest(df, n_trials=args.trials)
     else: